@@ -0,0 +1,66 @@
+# The file includes the read-only JSON API of the aggregates behind the dashboard charts, for
+# other tools to read the totals without scraping the dashboard.
+# - `GET /api/v1/aggregates/<name>`, with the filters in the query string like the event export
+#   (see `request_filters`), returns the aggregate of the events matching the filters.
+# - Responses carry a strong ETag built from the dataset version and the filter state: they only
+#   change when a new version of the dataset is loaded. Pollers send it back in If-None-Match and
+#   get a 304 Not Modified, answered before anything is aggregated.
+# The version in the path (`v1`) changes when the format of a response does.
+from data_layer import filter_key
+
+API_VERSION = 'v1'
+
+# Aggregates of the API: grouping axes of the cube and columns of the records, as in the charts
+# - totals: the stat cards
+# - countries: the damage and disaster count maps
+# - years-by-type: the stacked bar chart of disasters per year and type
+# - yearly-deaths: the casualty trend line
+AGGREGATES = {
+    'totals': ([], ['count', 'total_deaths', 'total_affected', 'total_damage', 'last_update']),
+    'countries': (['country'], ['country', 'iso', 'count', 'total_damage']),
+    'years-by-type': (['year', 'type'], ['year', 'type', 'count']),
+    'yearly-deaths': (['year'], ['year', 'total_deaths']),
+}
+
+
+def aggregate_etag(dataset, name, filters):
+    """
+    Strong ETag of an aggregate response.
+
+    Parameters:
+    - dataset (DisasterData): The data layer.
+    - name (str): The aggregate, a key of `AGGREGATES`.
+    - filters (dict): The filter state returned by `normalize_filters`.
+
+    Returns:
+    - str: The API version, aggregate, dataset version and filter key, which identify the
+      response body.
+    """
+    return f"{API_VERSION}-{name}-{dataset.version}-{filter_key(filters)}"
+
+
+def aggregate_payload(dataset, name, filters):
+    """
+    Build the body of an aggregate response.
+
+    Parameters:
+    - dataset (DisasterData): The data layer.
+    - name (str): The aggregate, a key of `AGGREGATES`.
+    - filters (dict): The filter state returned by `normalize_filters`.
+
+    Returns:
+    - dict: The dataset version, the filter state and the aggregate: one record for
+      'totals', a list of records sorted by the group columns otherwise. Dates are
+      ISO strings ('YYYY-MM-DD'), missing ones (no matching event) are None.
+    """
+    by, columns = AGGREGATES[name]
+    aggregate = dataset.aggregate(filters, by)[columns]
+    if 'last_update' in columns:
+        aggregate['last_update'] = aggregate['last_update'].dt.strftime('%Y-%m-%d')
+    records = aggregate.astype(object).where(aggregate.notna(), None).to_dict(orient='records')
+    if not by:
+        # No matching event: zero totals, of the same types as the totals of other selections
+        records = records or [{column: dtype.type(0).item() if dtype.kind in 'iuf' else None
+                               for column, dtype in aggregate.dtypes.items()}]
+        records = records[0]
+    return {'version': dataset.version, 'filters': filters, 'data': records}
@@ -0,0 +1,270 @@
+// Clientside callbacks of the dash app: card headers, chart tooltips, export links and the
+// cascading geography dropdowns. They only use data already in the browser, so
+// they run here instead of sending a request to the server on every change.
+// `formatValue` and `generateHeader` are ports of `format_value` and
+// `generate_header` in utils.py and must give the same output.
+
+(function () {
+    var MONTHS = [
+        'January', 'February', 'March', 'April', 'May', 'June',
+        'July', 'August', 'September', 'October', 'November', 'December'
+    ];
+
+    var DISASTER_COLORS = {
+        'Drought': '#4C230A', 'Extreme temperature': '#E34B48', 'Volcanic activity': '#0D160B', 'Wildfire': 'orange',
+        'Earthquake': '#555B6E', 'Mass movement': '#84B59F', 'Flood': '#568EA3', 'Storm': '#BBE5ED'
+    };
+
+    var NO_TOOLTIP = [false, {x0: 0, y0: 0, x1: 0, y1: 0}, 'No data available'];
+
+    // Add 1 to the last digit of a string of decimal digits
+    function incrementDigits(digits) {
+        var chars = digits.split('');
+        var i = chars.length - 1;
+        while (i >= 0 && chars[i] === '9') {
+            chars[i] = '0';
+            i--;
+        }
+        if (i < 0) {
+            chars.unshift('1');
+        } else {
+            chars[i] = String(Number(chars[i]) + 1);
+        }
+        return chars.join('');
+    }
+
+    // Format a number with a fixed number of decimals, rounding half to even
+    // on the exact binary value like Python's f"{value:.{decimals}f}"
+    // (Number.toFixed rounds exact ties away from zero instead).
+    function toFixedHalfEven(value, decimals) {
+        var sign = value < 0 ? '-' : '';
+        var exact = Math.abs(value).toFixed(100).split('.');
+        var digits = exact[0] + exact[1].slice(0, decimals);
+        var rest = exact[1].slice(decimals).replace(/0+$/, '');
+
+        var roundUp = rest > '5' || (rest === '5' && Number(digits[digits.length - 1]) % 2 === 1);
+        if (roundUp) {
+            digits = incrementDigits(digits);
+        }
+
+        var intPart = digits.slice(0, digits.length - decimals) || '0';
+        return sign + (decimals > 0 ? intPart + '.' + digits.slice(digits.length - decimals) : intPart);
+    }
+
+    // Port of utils.format_value
+    function formatValue(value) {
+        if (value === null || value === undefined) {
+            return 'N/A';
+        } else if (value < 1000) {
+            return toFixedHalfEven(value, 0);
+        } else if (value < 1000000) {
+            return toFixedHalfEven(value / 1000, 1) + 'K';
+        } else if (value < 1000000000) {
+            return toFixedHalfEven(value / 1000000, 1) + 'M';
+        }
+        return toFixedHalfEven(value / 1000000000, 1) + 'B';
+    }
+
+    // Port of utils.generate_header
+    function generateHeader(headerText, selectedDisasters, selectedYear, selectedMonth) {
+        selectedDisasters = selectedDisasters || [];
+
+        // Disaster names
+        if (selectedDisasters.length === 1) {
+            headerText += selectedDisasters[0];
+        } else if (selectedDisasters.length === 2) {
+            headerText += selectedDisasters[0] + ' and ' + selectedDisasters[1];
+        } else {
+            headerText += 'disasters';
+        }
+
+        // Year or range of years
+        if (Array.isArray(selectedYear)) {
+            if (selectedYear[0] !== selectedYear[1]) {
+                headerText += ', ' + selectedYear[0] + ' to ' + selectedYear[1];
+            } else {
+                headerText += ' in ' + selectedYear[0];
+            }
+        } else if (selectedYear !== null && selectedYear !== undefined) {
+            headerText += ' in ' + selectedYear;
+        }
+
+        // Month
+        if (Array.isArray(selectedMonth)) {
+            if (selectedMonth.length === 1) {
+                headerText += ', in ' + MONTHS[selectedMonth[0] - 1];
+            } else if (selectedMonth.length === 2) {
+                headerText += ', in ' + MONTHS[selectedMonth[0] - 1] + ' and ' + MONTHS[selectedMonth[1] - 1];
+            } else if (selectedMonth.length > 2) {
+                headerText += ', in selected months';
+            }
+        } else if (selectedMonth) {
+            headerText += ', in ' + MONTHS[selectedMonth - 1];
+        }
+
+        return headerText;
+    }
+
+    // Build a dash html component
+    function component(type, children, props) {
+        return {namespace: 'dash_html_components', type: type, props: Object.assign({children: children}, props)};
+    }
+
+    // Tooltip line, styled like the former server-side tooltips
+    function line(type, text, className, color) {
+        var style = {margin: '0', textAlign: 'left'};
+        if (color) {
+            style.color = color;
+        }
+        return component(type, text, className ? {style: style, className: className} : {style: style});
+    }
+
+    function yearDisplay(selectedYear) {
+        if (Array.isArray(selectedYear)) {
+            return selectedYear[0] + ' - ' + selectedYear[1];
+        }
+        return String(selectedYear);
+    }
+
+    function firstCustomdata(pt) {
+        return pt.customdata ? pt.customdata[0] : null;
+    }
+
+    // Sorted dropdown options from a list of names
+    function sortedOptions(names) {
+        return names.slice().sort().map(function (name) {
+            return {label: name, value: name};
+        });
+    }
+
+    // The keys of an object, only those in `selected` when it's a non-empty list
+    function selectedKeys(object, selected) {
+        var keys = Object.keys(object);
+        if (!Array.isArray(selected) || selected.length === 0) {
+            return keys;
+        }
+        return keys.filter(function (key) {
+            return selected.indexOf(key) !== -1;
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        utils: {
+            format_value: formatValue,
+            generate_header: generateHeader
+        },
+
+        headers: {
+            // Card headers of the four charts
+            card_names: function (selectedContinent, selectedSubregion, selectedCountry,
+                                  selectedYear, selectedMonth, selectedDisasterType) {
+                return [
+                    generateHeader('Total damage (in US$) inflicted by ', selectedDisasterType, selectedYear, selectedMonth),
+                    generateHeader('Total number of ', selectedDisasterType, selectedYear, selectedMonth),
+                    generateHeader('Trends of ', selectedDisasterType, selectedYear, selectedMonth),
+                    generateHeader('Number of deaths by time from ', selectedDisasterType, selectedYear, selectedMonth)
+                ];
+            }
+        },
+
+        exports: {
+            // Links of the export buttons: the export URLs with the filter state of `store-data`
+            // in the query string (read by `request_filters` in data_layer.py)
+            links: function (store, csvHref, parquetHref) {
+                var filters = (store && store.filters) || {};
+                var params = [];
+                ['continent', 'subregion', 'country', 'year', 'month', 'type'].forEach(function (name) {
+                    (filters[name] || []).forEach(function (value) {
+                        params.push(name + '=' + encodeURIComponent(value));
+                    });
+                });
+                var query = params.length ? '?' + params.join('&') : '';
+                return [csvHref.split('?')[0] + query, parquetHref.split('?')[0] + query];
+            }
+        },
+
+        geography: {
+            // Subregions of the selected continents, none when no continent is selected
+            subregion_options: function (selectedContinent, hierarchy) {
+                if (!Array.isArray(selectedContinent) || selectedContinent.length === 0) {
+                    return [];
+                }
+                var subregions = [];
+                selectedKeys(hierarchy, selectedContinent).forEach(function (region) {
+                    subregions = subregions.concat(Object.keys(hierarchy[region]));
+                });
+                return sortedOptions(subregions);
+            },
+
+            // Countries of the selected continents and subregions, all of them when none is selected
+            country_options: function (selectedContinent, selectedSubregion, hierarchy) {
+                var countries = [];
+                selectedKeys(hierarchy, selectedContinent).forEach(function (region) {
+                    selectedKeys(hierarchy[region], selectedSubregion).forEach(function (subregion) {
+                        countries = countries.concat(hierarchy[region][subregion]);
+                    });
+                });
+                return sortedOptions(countries);
+            }
+        },
+
+        tooltips: {
+            // MapA: total damage of the hovered country
+            damage_map: function (hoverData, selectedYear, selectedDisasterType) {
+                if (!hoverData) {
+                    return NO_TOOLTIP;
+                }
+                var pt = hoverData.points[0];
+                var children = component('Div', [
+                    line('H5', String(pt.hovertext || pt.location)),
+                    line('H6', yearDisplay(selectedYear), 'text-muted b'),
+                    line('P', 'Total damage suffered: ' + formatValue(firstCustomdata(pt)) + ' US$', 'b')
+                ]);
+                return [true, pt.bbox, children];
+            },
+
+            // MapB: number of disasters in the hovered country
+            disaster_count_map: function (hoverData, selectedYear, selectedDisasterType) {
+                if (!hoverData) {
+                    return NO_TOOLTIP;
+                }
+                var pt = hoverData.points[0];
+                var children = component('Div', [
+                    line('H5', String(pt.hovertext || pt.location)),
+                    line('H6', yearDisplay(selectedYear), 'text-muted b'),
+                    line('P', 'Number of disasters: ' + firstCustomdata(pt), 'b')
+                ]);
+                return [true, pt.bbox, children];
+            },
+
+            // Stacked bar chart: number of disasters of the hovered type
+            stacked_bar_chart: function (hoverData, selectedYear, selectedDisasterType) {
+                if (!hoverData) {
+                    return NO_TOOLTIP;
+                }
+                var pt = hoverData.points[0];
+                var disasterType = firstCustomdata(pt);
+                var typeColor = DISASTER_COLORS[disasterType] || 'black';  // Default to 'black' if type is not found
+                var children = component('Div', [
+                    line('H5', String(disasterType), null, typeColor),
+                    line('H6', yearDisplay(selectedYear), 'text-muted b'),
+                    line('P', pt.y + ' occurences', 'b')
+                ]);
+                return [true, pt.bbox, children];
+            },
+
+            // Area chart: total deaths of the hovered year
+            casualty_trend: function (hoverData, selectedDisasterType) {
+                if (!hoverData) {
+                    return NO_TOOLTIP;
+                }
+                var pt = hoverData.points[0];
+                var children = component('Div', [
+                    line('H5', pt.x),
+                    line('P', 'Total deaths: ' + formatValue(pt.y), 'b')
+                ]);
+                return [true, pt.bbox, children];
+            }
+        }
+    });
+})();
@@ -0,0 +1,66 @@
+# Cost of polling the aggregate API (api.py) through the Flask test client: a full response
+# vs a conditional request with the ETag of the previous one, for every aggregate of the default
+# and a filtered view, with gzip. The conditional requests get a 304 without aggregating.
+#
+# Usage (from the repository root):
+#   python benchmarks/api_polling.py [--requests 200]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+QUERIES = {
+    'all events': '',
+    'Asia, floods, 2010-2020': '?continent=Asia&type=Flood&year=2010&year=2020',
+}
+
+
+def poll(client, url, headers, requests):
+    """
+    Send the same request several times.
+
+    Parameters:
+    - client (flask.testing.FlaskClient): The test client of the app.
+    - url (str): The requested URL.
+    - headers (dict): The request headers.
+    - requests (int): Number of requests.
+
+    Returns:
+    - tuple: (median latency in ms, status code, body size in bytes) of the requests.
+    """
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), response.status_code, len(response.data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure full and conditional requests of the aggregate API.')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per measure')
+    args = parser.parse_args()
+
+    import api
+    import dash_app
+
+    client = dash_app.server.test_client()
+    print(f"{'aggregate':<15} {'filters':<25} {'full':>18} {'conditional':>18}")
+    for name in api.AGGREGATES:
+        for label, query in QUERIES.items():
+            url = f'/api/{api.API_VERSION}/aggregates/{name}{query}'
+            headers = {'Accept-Encoding': 'gzip'}
+            etag = client.get(url, headers=headers).headers['ETag']
+            full, _, full_size = poll(client, url, headers, args.requests)
+            conditional, status, size = poll(client, url, dict(headers, **{'If-None-Match': etag}), args.requests)
+            assert status == 304, status
+            print(f"{name:<15} {label:<25} {full:>6.2f}ms {full_size:>7,}B {conditional:>6.2f}ms {size:>7,}B")
+
+
+if __name__ == '__main__':
+    main()
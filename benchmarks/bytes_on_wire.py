@@ -0,0 +1,177 @@
+# Bytes on the wire of the default view of the dashboard: every same-origin request of a first
+# page load (HTML, dash scripts and plotly.js, assets, layout, images, first callbacks), sent through the
+# Flask test client with each Accept-Encoding a browser may send. `identity` is what the
+# server sent before compression. The repeat visit is a second load by the same browser,
+# with the responses it could keep (see WireClient). Response headers aren't counted.
+#
+# Usage (from the repository root):
+#   python benchmarks/bytes_on_wire.py [--encodings identity gzip br] [--top 8]
+import argparse
+import collections
+import gzip
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadtest import DEFAULT_YEARS, Dashboard, find_component_prop
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+try:
+    import brotli
+except ImportError:  # Without brotli, the server only sends gzip
+    brotli = None
+
+# Same-origin scripts and stylesheets of the index page
+RESOURCE_URL = re.compile(r'<(?:script[^>]*\bsrc|link[^>]*\bhref)="(/[^"]*)"')
+
+# Scripts the dash renderer and the core components load on demand: the graphs, dropdowns and
+# sliders of the default view, and plotly.js
+DYNAMIC_SCRIPTS = ['dash/dcc/async-graph.js', 'dash/dcc/async-dropdown.js', 'dash/dcc/async-slider.js',
+                   'plotly/package_data/plotly.min.js']
+
+# A choropleth of the layout, its config holds the topojson URL
+MAP_ID = 'damage-map'
+
+
+def decode(body, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return body
+
+
+class WireClient:
+    """
+    The Flask test client with the interface of loadtest.DashClient, measuring every response.
+    Like a browser, it keeps the GET responses with an ETag or a max-age: it doesn't request
+    again those with a year-long max-age and revalidates the others with If-None-Match.
+
+    Parameters:
+    - server (flask.Flask): The server of the dash app.
+    - accept_encoding (str): Accept-Encoding header of the requests.
+    """
+
+    def __init__(self, server, accept_encoding):
+        self.client = server.test_client()
+        self.accept_encoding = accept_encoding
+        self.transfers = []  # (kind, path, bytes sent) of the requests sent
+        self.documents = {}  # JSON responses of `get_json`, by path
+        self.cache = {}  # Browser cache: (ETag, body, fresh) by path
+
+    def request(self, method, path, body=None, kind='callbacks'):
+        headers = {'Accept-Encoding': self.accept_encoding}
+        cached = self.cache.get(path) if method == 'GET' else None
+        if cached is not None:
+            etag, content, fresh = cached
+            if fresh:
+                return 200, content
+            headers['If-None-Match'] = etag
+
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        data = response.get_data()
+        self.transfers.append((kind, path, len(data)))
+        if response.status_code == 304:
+            return 200, cached[1]
+        content = decode(data, response.headers.get('Content-Encoding'))
+        fresh = (response.cache_control.max_age or 0) >= 365 * 24 * 3600
+        if method == 'GET' and response.status_code == 200 and (fresh or 'ETag' in response.headers):
+            self.cache[path] = (response.headers.get('ETag'), content, fresh)
+        return response.status_code, content
+
+    def get(self, path, kind):
+        status, body = self.request('GET', path, kind=kind)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return body
+
+    def get_json(self, path):
+        self.documents[path] = json.loads(self.get(path, 'layout'))
+        return self.documents[path]
+
+
+def image_sources(layout):
+    # `src` of the images of the `_dash-layout` JSON, including the checklist option labels
+    if isinstance(layout, dict):
+        sources = [layout['src']] if isinstance(layout.get('src'), str) else []
+        return sources + [src for value in layout.values() for src in image_sources(value)]
+    if isinstance(layout, list):
+        return [src for item in layout for src in image_sources(item)]
+    return []
+
+
+def page_load(client):
+    """
+    Send the requests of a load of the default view.
+
+    Parameters:
+    - client (WireClient): The browser, with the cache of its previous visits.
+
+    Returns:
+    - list: One (kind, path, bytes sent) tuple per request sent.
+    """
+    client.transfers = []
+    index = client.get('/', 'html').decode()
+    for url in RESOURCE_URL.findall(index):
+        client.get(url, 'css' if '.css' in url.split('?')[0] else 'scripts')
+    for script in DYNAMIC_SCRIPTS:
+        client.get(f'/_dash-component-suites/{script}', 'scripts')
+
+    # `Dashboard` requests the layout and the dependencies
+    dashboard = Dashboard(client)
+    layout = client.documents['/_dash-layout']
+    for src in sorted(set(image_sources(layout))):
+        if src.startswith('/'):
+            client.get(src, 'images')
+    # plotly.js downloads the world geometry of the maps, from the app when it serves it
+    map_config = find_component_prop(layout, MAP_ID, 'config') or {}
+    if map_config.get('topojsonURL'):
+        client.get(f"{map_config['topojsonURL']}world_110m.json", 'topojson')
+
+    values = [None, None, None, list(DEFAULT_YEARS), None, list(dashboard.disaster_types)]
+    dashboard.interaction(client, values, lambda *args: None)
+    return client.transfers
+
+
+def main():
+    available = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    parser = argparse.ArgumentParser(description='Measure the bytes on the wire of a load of the default view.')
+    parser.add_argument('--encodings', nargs='+', choices=available, default=available,
+                        help='Accept-Encoding values to compare (identity is always measured)')
+    parser.add_argument('--top', type=int, default=8, help='Number of requests listed')
+    args = parser.parse_args()
+
+    import dash_app
+
+    # `identity` gives the resource kinds of the table
+    encodings = ['identity'] + [encoding for encoding in args.encodings if encoding != 'identity']
+    visits = {}
+    for encoding in encodings:
+        client = WireClient(dash_app.server, encoding)
+        visits[encoding] = (page_load(client), page_load(client))
+    kinds = list(dict.fromkeys(kind for kind, _, _ in visits['identity'][0]))
+
+    print(f"{'default view':<14}" + ''.join(f"{encoding:>12}" for encoding in encodings))
+    totals = {encoding: collections.Counter() for encoding in encodings}
+    for encoding, (first, repeat) in visits.items():
+        for kind, _, size in first:
+            totals[encoding][kind] += size
+        totals[encoding]['first visit'] = sum(size for _, _, size in first)
+        totals[encoding]['repeat visit'] = sum(size for _, _, size in repeat)
+    for row in kinds + ['first visit', 'repeat visit']:
+        print(f"{row:<14}" + ''.join(f"{totals[e][row] / 1024:>10.1f}KB" for e in encodings))
+
+    first, repeat = visits[encodings[-1]]
+    print(f"\n{len(first)} requests, the largest ones of a first visit ({encodings[-1]}):")
+    for kind, path, size in sorted(first, key=lambda t: -t[2])[:args.top]:
+        print(f"  {size / 1024:>9.1f}KB  {kind:<10} {path.split('?')[0][:70]}")
+    print(f"Repeat visit: {len(repeat)} requests, {sum(1 for _, _, size in repeat if size)} with a body")
+
+
+if __name__ == '__main__':
+    main()
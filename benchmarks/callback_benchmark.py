@@ -0,0 +1,124 @@
+# Benchmark suite of the dash app callbacks on synthetic EM-DAT-shaped datasets.
+# Each callback function is driven directly (without the memoization) with a data layer
+# built from a synthetic dataset at several multiples of the public table size and with
+# representative filter mixes. It reports the time, peak memory and output payload size.
+#
+# Usage (from the repository root):
+#   python benchmarks/callback_benchmark.py [--scales 1 10 100] [--repeat 5] [--json results.json]
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+import plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings('ignore')
+
+# Representative filter mixes, as `store_data` arguments
+FILTER_MIXES = {
+    'default': (None, None, None, [2000, 2024], None, None),
+    'continent': (['Asia'], None, None, [2000, 2024], None, None),
+    'subregion': (['Asia'], ['South-eastern Asia'], None, [2010, 2024], None, None),
+    'countries': (None, None, ['China', 'India', 'Indonesia'], [2000, 2024], None, None),
+    'single year': (None, None, None, [2020, 2020], None, None),
+    'months and types': (None, None, None, [2000, 2024], [6, 7, 8], ['Flood', 'Storm']),
+}
+
+# The callback functions of dash_app, by name: the app is only imported once the arguments
+# are parsed (it loads the dataset)
+CALLBACKS = [
+    'store_data',
+    'update_stat_cards',
+    'mapA_damage_choropleth',
+    'mapB_disaster_count_choropleth',
+    'plot_bar_total_disaster',
+    'plot_line_casualty_trend',
+    'compute_views',
+]
+
+
+def payload_bytes(output):
+    # Size of the callback output as dash serializes it in the response
+    if hasattr(output, 'to_plotly_json'):
+        output = output.to_plotly_json()
+    return len(json.dumps(output, cls=plotly.utils.PlotlyJSONEncoder))
+
+
+def measure(func, repeat):
+    """
+    Time a function and measure its peak memory.
+
+    Parameters:
+    - func (callable): The function, called without arguments.
+    - repeat (int): Number of timed calls.
+
+    Returns:
+    - tuple: The output, the median time in seconds and the peak traced memory in bytes.
+    """
+    output = func()  # Warm-up (e.g. the chart skeletons of a new dataset version)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return output, statistics.median(seconds), peak
+
+
+def run_scale(scale, repeat, seed):
+    import dash_app
+    from data_layer import DisasterData
+    from synthetic import make_cleaned_emdat
+
+    start = time.perf_counter()
+    dataset = DisasterData(make_cleaned_emdat(scale, seed))
+    print(f"\nscale {scale}x: {len(dataset.events):,} events, data layer built in "
+          f"{time.perf_counter() - start:.1f} s, cube {dataset.cube.nbytes / 1e6:.1f} MB")
+    print(f"{'callback':<32} {'filters':<17} {'ms':>8} {'peak KB':>9} {'payload KB':>11}")
+
+    results = []
+    for mix, args in FILTER_MIXES.items():
+        store = dash_app.store_data(*args)
+        for name in CALLBACKS:
+            callback = getattr(dash_app, name)
+            if name == 'store_data':
+                func = lambda: callback(*args)
+            else:
+                func = lambda: callback.__wrapped__(dataset, store)  # Bypass the memoization
+            output, seconds, peak = measure(func, repeat)
+            size = payload_bytes(output)
+            results.append({'scale': scale, 'events': len(dataset.events), 'callback': name, 'filters': mix,
+                            'ms': seconds * 1000, 'peak_bytes': peak, 'payload_bytes': size})
+            print(f"{name:<32} {mix:<17} {seconds * 1000:>8.2f} {peak / 1024:>9.0f} {size / 1024:>11.1f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the dash app callbacks on synthetic data.')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100],
+                        help='Dataset sizes, in multiples of the public table')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed calls per measure')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--json', help='Also write the results to this JSON file, e.g. to keep a baseline')
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scales:
+        results += run_scale(scale, args.repeat, args.seed)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Memory of the event export on a synthetic dataset 100x the public table: the streamed CSV
+# and Parquet of export.py vs building the whole file in memory (and vs the JSON records the
+# former `store-data` held). The whole selection is exported, the worst case. Each streamed
+# file is consumed chunk by chunk and only counted, like a response sent to the browser.
+# Peak memory is the growth of the peak resident memory of the process during the export,
+# on top of the loaded dataset (Linux and glibc: the peak is reset through /proc/self/clear_refs).
+#
+# Usage (from the repository root):
+#   python benchmarks/export_benchmark.py [--scale 100] [--chunk-rows 50000]
+import argparse
+import ctypes
+import io
+import gc
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import export
+from data_layer import DisasterData, normalize_filters, pa, pq
+from synthetic import make_cleaned_emdat
+
+
+def resident_memory(field):
+    # VmRSS (current) or VmHWM (peak) of the process, in bytes
+    with open('/proc/self/status') as status:
+        return int(re.search(rf'{field}:\s+(\d+)', status.read()).group(1)) * 1024
+
+
+def measure(produce):
+    """
+    Run an export and measure it.
+
+    Parameters:
+    - produce (callable): Returns an iterable of bytes.
+
+    Returns:
+    - tuple: (seconds, bytes produced, number of chunks, peak memory in MB).
+    """
+    gc.collect()
+    # Gives the freed memory back to the system, so the export can't reuse it unseen
+    ctypes.CDLL(None).malloc_trim(0)
+    pa.default_memory_pool().release_unused()
+    # Resets the peak resident memory to the current one
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+    base = resident_memory('VmRSS')
+    start = time.perf_counter()
+    size = chunks = 0
+    for chunk in produce():
+        size += len(chunk)
+        chunks += 1
+    seconds = time.perf_counter() - start
+    return seconds, size, chunks, (resident_memory('VmHWM') - base) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the memory of the streamed event export.')
+    parser.add_argument('--scale', type=float, default=100, help='Size of the dataset relative to the public table')
+    parser.add_argument('--chunk-rows', type=int, default=export.CHUNK_ROWS, help='Rows encoded at a time')
+    args = parser.parse_args()
+
+    dataset = DisasterData(make_cleaned_emdat(args.scale))
+    filters = normalize_filters()
+    print(f"{len(dataset.events):,} events, all of them exported, {args.chunk_rows:,} rows per chunk\n")
+
+    def selection():
+        # The whole selection at once
+        return dataset.events.loc[dataset.index.mask(filters), export.EXPORT_COLUMNS]
+
+    def whole_csv():
+        return [selection().to_csv(index=False, date_format='%Y-%m-%d').encode()]
+
+    def whole_parquet():
+        buffer = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(selection(), preserve_index=False),
+                       buffer, compression='snappy')
+        return [buffer.getvalue()]
+
+    def json_records():
+        # What `store-data` used to hold, for comparison
+        return [json.dumps(selection().to_dict(orient='records'), default=str).encode()]
+
+    runs = [
+        ('CSV, streamed', lambda: export.csv_chunks(dataset, filters, args.chunk_rows)),
+        ('CSV, in memory', whole_csv),
+        ('Parquet, streamed', lambda: export.parquet_chunks(dataset, filters, args.chunk_rows)),
+        ('Parquet, in memory', whole_parquet),
+        ('JSON records', json_records),
+    ]
+    print(f"{'export':<20} {'time':>8} {'size':>10} {'chunks':>7} {'peak memory':>12}")
+    for name, produce in runs:
+        seconds, size, chunks, peak = measure(produce)
+        print(f"{name:<20} {seconds:>7.2f}s {size / 1024 / 1024:>8.1f}MB {chunks:>7} {peak:>10.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
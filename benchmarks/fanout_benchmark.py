@@ -0,0 +1,98 @@
+# End-to-end benchmark of one filter change: the single fan-out callback vs the split
+# callbacks (`store-data`, then one request per view). Each mode runs the dash app in a
+# fresh process and sends the `_dash-update-component` requests a browser would send.
+#
+# Usage (from the repository root):
+#   python benchmarks/fanout_benchmark.py [--interactions 200] [--seed 0]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in the child process: replay random filter changes, report requests, bytes and latency
+CHILD_CODE = """
+import json, random, sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, 'benchmarks')
+import dash_app
+from data_layer import load_dataset
+from filter_benchmark import random_filters
+
+client = dash_app.server.test_client()
+dependencies = client.get('/_dash-dependencies').get_json()
+controls = ['continent-dropdown', 'subregion-dropdown', 'country-dropdown',
+            'year-slider', 'month-dropdown', 'disaster-type-checkbox']
+
+
+def outputs_of(dependency):
+    outputs = [o.rsplit('.', 1) for o in dependency['output'].strip('.').split('...')]
+    outputs = [{'id': i, 'property': p} for i, p in outputs]
+    return outputs if dependency['output'].startswith('..') else outputs[0]
+
+
+def post(dependency, inputs):
+    # One `_dash-update-component` request, returns (seconds, response bytes)
+    body = {'output': dependency['output'], 'outputs': outputs_of(dependency), 'inputs': inputs,
+            'changedPropIds': [f"{i['id']}.{i['property']}" for i in inputs], 'state': []}
+    start = time.perf_counter()
+    response = client.post('/_dash-update-component', json=body)
+    seconds = time.perf_counter() - start
+    assert response.status_code == 200, response.data[:200]
+    return seconds, len(response.data)
+
+
+# Callbacks triggered by the filter controls and by `store-data`
+by_controls = [d for d in dependencies if d['inputs'] and all(i['id'] in controls for i in d['inputs'])
+               and len(d['inputs']) == len(controls) and not d.get('clientside_function')]
+by_store = [d for d in dependencies if [i['id'] for i in d['inputs']] == ['store-data']]
+
+rng = random.Random(int(sys.argv[1]))
+data = load_dataset()
+results = []
+for _ in range(int(sys.argv[2])):
+    values = random_filters(rng, data)
+    inputs = [{'id': c, 'property': 'value', 'value': v} for c, v in zip(controls, values)]
+    first = [post(d, inputs) for d in by_controls]
+    store = dash_app.store_data(*values)
+    second = [post(d, [{'id': 'store-data', 'property': 'data', 'value': store}]) for d in by_store]
+    # The browser sends the requests of a stage in parallel, the stages one after the other
+    results.append({
+        'requests': len(first) + len(second),
+        'bytes': sum(b for _, b in first + second),
+        'sequential': sum(s for s, _ in first + second),
+        'critical_path': max(s for s, _ in first) + (max(s for s, _ in second) if second else 0),
+    })
+print(json.dumps(results))
+"""
+
+
+def run_mode(split, seed, interactions):
+    env = dict(os.environ, DASHBOARD_SPLIT_CALLBACKS='1' if split else '0')
+    env.pop('DASHBOARD_CACHE_DIR', None)  # Measure computed views, not disk cache hits
+    output = subprocess.check_output([sys.executable, '-c', CHILD_CODE, str(seed), str(interactions)],
+                                     cwd=ROOT, env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the fan-out callback with the split callbacks.')
+    parser.add_argument('--interactions', type=int, default=200, help='Number of random filter changes')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'requests':>8} {'KB':>7} {'sequential ms':>14} {'critical path ms':>17} {'p95 ms':>7}")
+    for name, split in [('split', True), ('fan-out', False)]:
+        results = run_mode(split, args.seed, args.interactions)
+        critical = sorted(r['critical_path'] * 1000 for r in results)
+        print(f"{name:<8} {statistics.mean(r['requests'] for r in results):>8.1f} "
+              f"{statistics.mean(r['bytes'] for r in results) / 1024:>7.1f} "
+              f"{statistics.median(r['sequential'] for r in results) * 1000:>14.1f} "
+              f"{statistics.median(critical):>17.1f} {critical[int(len(critical) * 0.95) - 1]:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
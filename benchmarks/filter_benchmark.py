@@ -0,0 +1,92 @@
+# Micro-benchmark of the event filter: the former `store_data` mask vs the bitmap index.
+# Both run on the same randomized filter combinations and must select the same rows.
+#
+# Usage (from the repository root):
+#   python benchmarks/filter_benchmark.py [--combinations 500] [--seed 0]
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_layer import load_dataset, normalize_filters, FilterIndex
+
+
+def legacy_mask(data, selected_continent, selected_subregion, selected_country,
+                selected_year, selected_month, selected_disaster_type):
+    # The mask built by `store_data` before the bitmap index (without the in-place month cast)
+    mask = pd.Series([True] * len(data))
+    if selected_continent and isinstance(selected_continent, list):
+        mask &= data['region'].isin(selected_continent)
+    if selected_subregion and isinstance(selected_subregion, list):
+        mask &= data['subregion'].isin(selected_subregion)
+    if selected_country and isinstance(selected_country, list):
+        mask &= data['country'].isin(selected_country)
+    if selected_year:
+        mask &= (data['year'] >= str(selected_year[0])) & (data['year'] <= str(selected_year[1]))
+    if selected_month and isinstance(selected_month, list):
+        mask &= data['month'].astype(int).isin(selected_month)
+    if selected_disaster_type and isinstance(selected_disaster_type, list):
+        mask &= data['type'].isin(selected_disaster_type)
+    return mask.to_numpy()
+
+
+def random_selection(rng, values, p_none):
+    # None (no filter) with probability `p_none`, otherwise a few random values
+    if rng.random() < p_none:
+        return None
+    return rng.sample(values, rng.randint(1, min(5, len(values))))
+
+
+def random_filters(rng, data):
+    first_year = rng.randint(2000, 2024)
+    return (
+        random_selection(rng, sorted(data['region'].unique()), 0.7),
+        random_selection(rng, sorted(data['subregion'].unique()), 0.85),
+        random_selection(rng, sorted(data['country'].unique()), 0.85),
+        [first_year, rng.randint(first_year, 2024)],
+        random_selection(rng, list(range(1, 13)), 0.6),
+        random_selection(rng, sorted(data['type'].unique()), 0.3),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the legacy filter mask with the bitmap index.')
+    parser.add_argument('--combinations', type=int, default=500, help='Number of random filter combinations')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    data = load_dataset()
+    data['year'] = data['year'].astype(str)  # As in the dash app at the time of the legacy mask
+
+    start = time.perf_counter()
+    index = FilterIndex(data)
+    build_seconds = time.perf_counter() - start
+
+    rng = random.Random(args.seed)
+    combinations = [random_filters(rng, data) for _ in range(args.combinations)]
+
+    start = time.perf_counter()
+    legacy = [legacy_mask(data, *c) for c in combinations]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [index.mask(normalize_filters(*c)) for c in combinations]
+    index_seconds = time.perf_counter() - start
+
+    mismatches = sum(not np.array_equal(a, b) for a, b in zip(legacy, indexed))
+    print(f"events: {len(data)}, combinations: {args.combinations}, mismatches: {mismatches}")
+    print(f"index build: {build_seconds * 1000:.1f} ms, "
+          f"index size: {sum(b.nbytes for d in index.bitmaps.values() for b in d.values()) / 1024:.0f} KiB")
+    print(f"legacy mask: {legacy_seconds / args.combinations * 1e6:9.1f} us/request")
+    print(f"bitmap mask: {index_seconds / args.combinations * 1e6:9.1f} us/request "
+          f"({legacy_seconds / index_seconds:.1f}x faster)")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# Startup time of the dash app: how long `import dash_app` takes and which modules it spends
+# it on, from the `python -X importtime` report. Importing the app is the startup critical path
+# (gunicorn imports it before serving), so a Cloud Run cold start waits for all of it.
+# The check fails (exit code 1) when the import exceeds the time budget or when a module that
+# should only be loaded on first use (e.g. plotly.express) is imported at startup.
+#
+# Usage (from the repository root):
+#   python benchmarks/import_time.py [--budget 2.0] [--runs 3] [--lazy plotly.express openpyxl]
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# `import time: <self us> | <cumulative us> | <indented module name>`
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+# Maximum import time of the app, in seconds (also checked by tests/test_startup.py)
+DEFAULT_BUDGET = 2.0
+
+# Modules only needed to build figures or to read the .xlsx fallback
+DEFAULT_LAZY_MODULES = ['plotly.express', 'openpyxl']
+
+
+def import_report(module='dash_app'):
+    """
+    Import a module in a fresh interpreter with `-X importtime` and parse the report.
+
+    Parameters:
+    - module (str): The module to import.
+
+    Returns:
+    - list: One (module name, depth, self seconds, cumulative seconds) tuple per imported
+      module, in import order (a module comes after the modules it imports).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    report = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            report.append((name, len(indent) // 2, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure and check the import time of the dash app.')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='Maximum import time, in seconds')
+    parser.add_argument('--runs', type=int, default=3, help='Number of imports, the fastest one is checked')
+    parser.add_argument('--lazy', nargs='*', default=DEFAULT_LAZY_MODULES,
+                        help='Modules that must not be imported at startup')
+    parser.add_argument('--top', type=int, default=12, help='Number of modules listed')
+    args = parser.parse_args()
+
+    # The fastest run is the least disturbed by the machine, the OS file cache is warm after the first one
+    report = min((import_report() for _ in range(args.runs)), key=lambda r: r[-1][3])
+    total = report[-1][3]
+
+    print(f"import dash_app: {total:.2f} s (budget {args.budget:.2f} s), {len(report)} modules")
+    print(f"\n{'direct imports of dash_app':<40} {'cumulative':>10}")
+    for name, depth, _, cumulative in sorted((r for r in report if r[1] == 1), key=lambda r: -r[3])[:args.top]:
+        print(f"{name:<40} {cumulative:>9.3f}s")
+    print(f"\n{'slowest modules by own time':<40} {'self':>10}")
+    for name, _, self_time, _ in sorted(report, key=lambda r: -r[2])[:args.top]:
+        print(f"{name:<40} {self_time:>9.3f}s")
+
+    failures = []
+    if total > args.budget:
+        failures.append(f"import takes {total:.2f} s, over the {args.budget:.2f} s budget")
+    imported = {r[0] for r in report}
+    failures += [f"{module} is imported at startup" for module in args.lazy if module in imported]
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
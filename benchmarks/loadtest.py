@@ -0,0 +1,282 @@
+# Load-testing harness: replays dashboard sessions against a running server.
+# Every virtual user sends the `_dash-update-component` requests a browser sends for each
+# filter change of a session (slider moves, continent -> subregion -> country cascades,
+# month and disaster type changes, resets), on its own keep-alive connection.
+# Hovers and the dropdown cascade options are clientside, so they send no request; they
+# only add think time. Reports latency percentiles, throughput and errors per callback.
+#
+# Usage (from the repository root), with the server running, e.g.
+#   gunicorn --bind :8050 --workers 1 --threads 8 dash_app:server
+#   python benchmarks/loadtest.py --url http://127.0.0.1:8050 --users 8 --duration 30
+# Sessions are synthetic by default; save them with --record sessions.jsonl and replay
+# the same ones later with --sessions sessions.jsonl.
+import argparse
+import collections
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitoring import FILTER_CONTROLS, callback_label
+
+DEFAULT_YEARS = [2000, 2024]
+MONTHS = list(range(1, 13))
+
+
+class DashClient:
+    """
+    A keep-alive connection to the dash server, sending callback requests like the browser.
+
+    Parameters:
+    - url (str): Base URL of the server.
+    """
+
+    def __init__(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        self.prefix = parsed.path.rstrip('/')
+        self.connection = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=60)
+
+    def request(self, method, path, body=None):
+        """
+        Send a request and return (status, response body), reconnecting once if the
+        server closed the keep-alive connection.
+        """
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        for attempt in range(2):
+            try:
+                self.connection.request(method, self.prefix + path, payload, headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                self.connection.close()
+                if attempt:
+                    raise
+
+    def get_json(self, path):
+        status, body = self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return json.loads(body)
+
+
+def find_component_prop(layout, component_id, prop):
+    # Depth-first search of a component property in the `_dash-layout` JSON
+    if isinstance(layout, dict):
+        props = layout.get('props', {})
+        if props.get('id') == component_id:
+            return props.get(prop)
+        children = props.get('children')
+        return find_component_prop(children, component_id, prop) if children is not None else None
+    if isinstance(layout, list):
+        for child in layout:
+            found = find_component_prop(child, component_id, prop)
+            if found is not None:
+                return found
+    return None
+
+
+def parse_outputs(output):
+    # `outputs` of a request body from the `output` string of a dependency
+    outputs = [dict(zip(('id', 'property'), item.rsplit('.', 1))) for item in output.strip('.').split('...')]
+    return outputs if output.startswith('..') else outputs[0]
+
+
+class Dashboard:
+    """
+    The server-side callbacks of a running dashboard, read from `_dash-dependencies`.
+
+    Parameters:
+    - client (DashClient): A connection to the server.
+    """
+
+    def __init__(self, client):
+        dependencies = [d for d in client.get_json('/_dash-dependencies') if not d.get('clientside_function')]
+        layout = client.get_json('/_dash-layout')
+        self.geography = find_component_prop(layout, 'geography-data', 'data') or {}
+        self.disaster_types = find_component_prop(layout, 'disaster-type-checkbox', 'value') or []
+
+        # Callbacks triggered by the filter controls, then by `store-data` (split callbacks only)
+        self.by_controls = [d for d in dependencies
+                            if {i['id'] for i in d['inputs']} == set(FILTER_CONTROLS)]
+        self.by_store = [d for d in dependencies if [i['id'] for i in d['inputs']] == ['store-data']]
+
+    def interaction(self, client, values, record):
+        """
+        Send the requests of one filter change, the stages one after the other.
+
+        Parameters:
+        - client (DashClient): The user's connection.
+        - values (list): Values of the filter controls, in `FILTER_CONTROLS` order.
+        - record (callable): Called with (callback label, seconds, status) for each request.
+        """
+        inputs = [{'id': c, 'property': 'value', 'value': v} for c, v in zip(FILTER_CONTROLS, values)]
+        store = None
+        for dependency in self.by_controls:
+            response = self._post(client, dependency, inputs, record)
+            if response and 'store-data' in response.get('response', {}):
+                store = response['response']['store-data']['data']
+        if store is not None:
+            for dependency in self.by_store:
+                self._post(client, dependency, [{'id': 'store-data', 'property': 'data', 'value': store}], record)
+
+    def _post(self, client, dependency, inputs, record):
+        body = {'output': dependency['output'], 'outputs': parse_outputs(dependency['output']),
+                'inputs': inputs, 'changedPropIds': [f"{i['id']}.{i['property']}" for i in inputs],
+                'state': []}
+        label = callback_label(body)
+        start = time.perf_counter()
+        try:
+            status, content = client.request('POST', '/_dash-update-component', body)
+        except (OSError, http.client.HTTPException):
+            record(label, time.perf_counter() - start, 'connection error')
+            return None
+        record(label, time.perf_counter() - start, status)
+        return json.loads(content) if status == 200 else None
+
+
+def synthetic_session(rng, dashboard, steps=12):
+    """
+    Generate a dashboard session: a list of filter changes from the default view.
+
+    Parameters:
+    - rng (random.Random): Random generator.
+    - dashboard (Dashboard): The dashboard, for its geography and disaster types.
+    - steps (int): Number of user actions.
+
+    Returns:
+    - list: One dict per action with 'action' and 'values' (None when it sends no request).
+    """
+    types = list(dashboard.disaster_types)
+    state = {'continent': None, 'subregion': None, 'country': None,
+             'year': list(DEFAULT_YEARS), 'month': None, 'type': list(types)}
+    session = [{'action': 'load', 'values': list(state.values())}]
+
+    for _ in range(steps):
+        action = rng.choices(['slider', 'cascade', 'months', 'types', 'hover', 'reset'],
+                             weights=[30, 20, 15, 15, 15, 5])[0]
+        if action == 'slider':
+            # Release one handle of the year slider a few years away
+            start, end = state['year']
+            if rng.random() < 0.5:
+                start = min(max(DEFAULT_YEARS[0], start + rng.randint(-6, 6)), end)
+            else:
+                end = max(min(DEFAULT_YEARS[1], end + rng.randint(-6, 6)), start)
+            state['year'] = [start, end]
+        elif action == 'cascade' and dashboard.geography:
+            # Continent, then one of its subregions, then a few of its countries: one request each
+            continent = rng.choice(sorted(dashboard.geography))
+            subregion = rng.choice(sorted(dashboard.geography[continent]))
+            countries = dashboard.geography[continent][subregion]
+            state.update(continent=[continent], subregion=None, country=None)
+            session.append({'action': 'continent', 'values': list(state.values())})
+            state['subregion'] = [subregion]
+            session.append({'action': 'subregion', 'values': list(state.values())})
+            state['country'] = rng.sample(countries, min(len(countries), rng.randint(1, 3)))
+            action = 'country'
+        elif action == 'months':
+            state['month'] = sorted(rng.sample(MONTHS, rng.randint(1, 4))) if rng.random() < 0.8 else None
+        elif action == 'types':
+            # Untick or tick one disaster type
+            disaster_type = rng.choice(types)
+            selected = [t for t in state['type'] if t != disaster_type]
+            state['type'] = selected if disaster_type in state['type'] else state['type'] + [disaster_type]
+        elif action == 'reset':
+            state.update(continent=None, subregion=None, country=None, year=list(DEFAULT_YEARS),
+                         month=None, type=list(types))
+
+        session.append({'action': action, 'values': None if action == 'hover' else list(state.values())})
+    return session
+
+
+class Results:
+    """
+    Thread-safe collection of request latencies and statuses per callback.
+    """
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self.interactions = 0
+        self._lock = threading.Lock()
+
+    def record(self, label, seconds, status):
+        with self._lock:
+            self.latencies[label].append(seconds)
+            if status != 200 and status != 204:
+                self.errors[label] += 1
+
+    def report(self, elapsed):
+        def percentile(values, q):
+            return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"{self.interactions} interactions, {total} requests in {elapsed:.1f} s: "
+              f"{self.interactions / elapsed:.1f} interactions/s, {total / elapsed:.1f} requests/s, "
+              f"{sum(self.errors.values()) / max(total, 1):.2%} errors")
+        print(f"{'callback':<48} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            short = label if len(label) <= 48 else label[:45] + '...'
+            print(f"{short:<48} {len(values):>8} {len(values) / elapsed:>7.1f} {percentile(values, 0.5):>8.1f} "
+                  f"{percentile(values, 0.95):>8.1f} {percentile(values, 0.99):>8.1f} {self.errors[label]:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay dashboard sessions against a running server.')
+    parser.add_argument('--url', default='http://127.0.0.1:8050', help='Base URL of the dashboard')
+    parser.add_argument('--users', type=int, default=8, help='Number of concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Test duration, in seconds')
+    parser.add_argument('--think', type=float, default=0.0, help='Mean think time between two actions, in seconds')
+    parser.add_argument('--sessions', help='Replay the sessions of this JSONL file instead of synthetic ones')
+    parser.add_argument('--record', help='Save the synthetic sessions to this JSONL file')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic sessions')
+    args = parser.parse_args()
+
+    dashboard = Dashboard(DashClient(args.url))
+    rng = random.Random(args.seed)
+    if args.sessions:
+        with open(args.sessions) as f:
+            sessions = [json.loads(line) for line in f if line.strip()]
+    else:
+        sessions = [synthetic_session(rng, dashboard) for _ in range(max(50, args.users * 10))]
+        if args.record:
+            with open(args.record, 'w') as f:
+                f.writelines(json.dumps(session) + '\n' for session in sessions)
+
+    results = Results()
+    deadline = time.perf_counter() + args.duration
+
+    def user(index):
+        client = DashClient(args.url)
+        user_rng = random.Random(args.seed * 1000 + index)
+        i = index
+        while time.perf_counter() < deadline:
+            for step in sessions[i % len(sessions)]:
+                if time.perf_counter() >= deadline:
+                    return
+                if args.think:
+                    time.sleep(user_rng.expovariate(1 / args.think))
+                if step['values'] is not None:
+                    dashboard.interaction(client, step['values'], results.record)
+                    with results._lock:
+                        results.interactions += 1
+            i += args.users
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(args.users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.report(time.perf_counter() - start)
+    return 1 if sum(results.errors.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# Memory of the gunicorn workers, with the app loaded by each worker or once before forking
+# them (`preload_app`, see gunicorn.conf.py). Each configuration starts gunicorn, replays
+# dashboard sessions on it (see loadtest.py) so every worker has served requests, then reads
+# /proc/<pid>/smaps_rollup (Linux only) of the workers:
+# - RSS: resident memory, shared pages included (what `ps` and `top` show),
+# - USS: pages private to the worker, freed if it exits,
+# - PSS: resident memory with each shared page divided by the number of processes sharing it.
+# The total PSS of the master and the workers is the memory the server really uses.
+#
+# Usage (from the repository root):
+#   python benchmarks/memory_report.py [--workers 1 4 8] [--duration 10]
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from loadtest import Dashboard, DashClient, Results, synthetic_session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def memory(pid):
+    """
+    Read the memory of a process from /proc/<pid>/smaps_rollup.
+
+    Returns:
+    - dict: 'rss', 'pss' and 'uss' in MB.
+    """
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0]) / 1024
+    return {'rss': fields['Rss'], 'pss': fields['Pss'],
+            'uss': fields['Private_Clean'] + fields['Private_Dirty']}
+
+
+def children(pid):
+    # Process ids of the gunicorn workers
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def run(workers, preload, port, duration, threads=8):
+    """
+    Start gunicorn, load it with dashboard sessions and measure its processes.
+
+    Returns:
+    - tuple: (memory of the master, list of memory of each worker).
+    """
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+               '--threads', str(threads), '--timeout', '0', 'dash_app:server']
+    with tempfile.NamedTemporaryFile('w', suffix='.py') as empty_config:
+        # Without preload: the settings of the command line only, like the former Dockerfile command
+        command += ['--config', 'gunicorn.conf.py' if preload else empty_config.name]
+        master = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            url = f'http://127.0.0.1:{port}'
+            deadline = time.time() + 300
+            while True:
+                try:
+                    urllib.request.urlopen(url + '/_dash-layout', timeout=5)
+                    if len(children(master.pid)) == workers:
+                        break
+                except OSError:
+                    pass
+                if time.time() > deadline or master.poll() is not None:
+                    raise RuntimeError(f"gunicorn didn't start with {workers} workers")
+                time.sleep(0.5)
+
+            # Enough concurrent sessions to reach every worker
+            dashboard = Dashboard(DashClient(url))
+            rng = random.Random(0)
+            sessions = [synthetic_session(rng, dashboard) for _ in range(workers * 4)]
+            results = Results()
+            stop_at = time.perf_counter() + duration
+
+            def user(session):
+                client = DashClient(url)
+                while time.perf_counter() < stop_at:
+                    for step in session:
+                        if step['values'] is not None:
+                            dashboard.interaction(client, step['values'], results.record)
+
+            users = [threading.Thread(target=user, args=(session,)) for session in sessions]
+            for thread in users:
+                thread.start()
+            for thread in users:
+                thread.join()
+            if sum(results.errors.values()):
+                raise RuntimeError(f"{sum(results.errors.values())} failed requests")
+
+            return memory(master.pid), [memory(pid) for pid in children(master.pid)]
+        finally:
+            master.terminate()
+            master.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the memory of the gunicorn workers.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='Numbers of workers to measure')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of load before measuring')
+    parser.add_argument('--port', type=int, default=8071, help='Port of the measured server')
+    args = parser.parse_args()
+
+    print(f"{'mode':<16} {'workers':>7} {'RSS/worker':>11} {'USS/worker':>11} {'master RSS':>11} {'total PSS':>10}")
+    for preload in (False, True):
+        for workers in args.workers:
+            master, worker_memory = run(workers, preload, args.port, args.duration)
+            rss = sum(m['rss'] for m in worker_memory) / workers
+            uss = sum(m['uss'] for m in worker_memory) / workers
+            total = master['pss'] + sum(m['pss'] for m in worker_memory)
+            mode = 'preload_app' if preload else 'load per worker'
+            print(f"{mode:<16} {workers:>7} {rss:>9.0f}MB {uss:>9.0f}MB {master['rss']:>9.0f}MB {total:>8.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# Startup-time benchmark: loading the cleaned dataset from the .xlsx file vs the Parquet artifact.
+# Each load runs in a fresh Python process to measure a cold start, like a new gunicorn worker.
+#
+# Usage (from the repository root):
+#   python benchmarks/startup_benchmark.py [--repeat 5]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in the child process: time the import of pandas + the data load, report peak RSS
+CHILD_CODE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import data_layer
+if sys.argv[1] == 'xlsx':
+    data = data_layer.read_xlsx()
+else:
+    data = data_layer.read_parquet_if_fresh()
+    assert data is not None, 'Parquet artifact is missing or stale, run data_cleaning.py first'
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'rows': len(data),
+    'frame_mb': data.memory_usage(deep=True).sum() / 1e6,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3,
+}))
+"""
+
+
+def run_once(path):
+    output = subprocess.check_output([sys.executable, '-c', CHILD_CODE, path], cwd=ROOT)
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare cold-start load times of the .xlsx file and the Parquet artifact.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of cold starts per load path')
+    args = parser.parse_args()
+
+    print(f"{'path':<8} {'rows':>6} {'median s':>9} {'min s':>7} {'frame MB':>9} {'max RSS MB':>11}")
+    for path in ['xlsx', 'parquet']:
+        runs = [run_once(path) for _ in range(args.repeat)]
+        seconds = [r['seconds'] for r in runs]
+        print(f"{path:<8} {runs[0]['rows']:>6} {statistics.median(seconds):>9.3f} {min(seconds):>7.3f} "
+              f"{runs[0]['frame_mb']:>9.2f} {max(r['max_rss_mb'] for r in runs):>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Synthetic EM-DAT-shaped data for the benchmarks.
+# The geography (region, subregion, country, ISO) is resampled from the cleaned public
+# table so the hierarchy stays consistent; types, dates and impacts follow the
+# proportions of the public table.
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_layer import load_dataset
+
+# Raw disaster types and their share in the public table (including the types the cleaning drops)
+RAW_TYPES = {
+    'Flood': 0.405, 'Storm': 0.257, 'Epidemic': 0.085, 'Earthquake': 0.066,
+    'Extreme temperature': 0.052, 'Mass movement (wet)': 0.046, 'Drought': 0.041,
+    'Wildfire': 0.031, 'Volcanic activity': 0.013, 'Infestation': 0.003,
+    'Mass movement (dry)': 0.0013, 'Glacial lake outburst flood': 0.0005,
+    'Impact': 0.0001, 'Animal incident': 0.0001,
+}
+
+# Share of missing values of the impact columns in the public table
+MISSING_SHARE = {'Total Deaths': 0.29, 'Total Affected': 0.2, "Total Damage, Adjusted ('000 US$)": 0.67}
+
+
+def make_raw_emdat(n_rows, seed=0):
+    """
+    Generate a raw EM-DAT public table with `n_rows` rows.
+
+    Parameters:
+    - n_rows (int): Number of rows.
+    - seed (int): Random seed.
+
+    Returns:
+    - pd.DataFrame: A table with the raw EM-DAT columns used by `data_cleaning.py`.
+    """
+    rng = np.random.default_rng(seed)
+
+    geography = load_dataset()[['iso', 'country', 'subregion', 'region']].drop_duplicates('country')
+    geography = geography.iloc[rng.integers(0, len(geography), n_rows)].reset_index(drop=True)
+
+    types = np.array(list(RAW_TYPES))
+    weights = np.array(list(RAW_TYPES.values()))
+    years = rng.integers(2000, 2025, n_rows)
+    months = rng.integers(1, 13, n_rows).astype(float)
+    months[rng.random(n_rows) < 0.007] = np.nan
+
+    raw = pd.DataFrame({
+        'DisNo.': [f"{y}-{i:07d}-{iso}" for i, (y, iso) in enumerate(zip(years, geography['iso']))],
+        'Disaster Type': types[rng.choice(len(types), n_rows, p=weights / weights.sum())],
+        'ISO': geography['iso'],
+        'Country': geography['country'],
+        'Subregion': geography['subregion'],
+        'Region': geography['region'],
+        'Start Year': years,
+        'Start Month': months,
+        'Total Deaths': np.round(rng.lognormal(2, 2, n_rows)),
+        'Total Affected': np.round(rng.lognormal(8, 3, n_rows)),
+        "Total Damage, Adjusted ('000 US$)": np.round(rng.lognormal(11, 3, n_rows)),
+        'Last Update': pd.Timestamp('2023-09-25') + pd.to_timedelta(rng.integers(0, 360, n_rows), unit='D'),
+    })
+    for col, share in MISSING_SHARE.items():
+        raw.loc[rng.random(n_rows) < share, col] = np.nan
+    return raw
+
+
+def make_cleaned_emdat(scale, seed=0):
+    """
+    Generate a cleaned dataset with `scale` times as many events as the public table.
+
+    Parameters:
+    - scale (float): Size of the dataset relative to the cleaned public table.
+    - seed (int): Random seed.
+
+    Returns:
+    - pd.DataFrame: A cleaned dataset, as produced by `data_cleaning.clean_data`.
+    """
+    import data_cleaning
+
+    # About 10% of the raw rows are dropped by the cleaning (removed types and null months)
+    target = int(len(load_dataset()) * scale)
+    cleaned = data_cleaning.clean_data(make_raw_emdat(int(target / 0.9) + 100, seed))
+    return cleaned.iloc[:target].reset_index(drop=True)
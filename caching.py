@@ -0,0 +1,196 @@
+# The file includes the caches used by the dash app callbacks.
+# One cache instance is shared by all the threads of a gunicorn worker, so every
+# operation is guarded by a lock.
+import functools
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+try:
+    import diskcache
+except ImportError:  # The disk cache is optional, memoization stays in memory only
+    diskcache = None
+
+
+# Every LRU cache, to give them new locks in forked processes (e.g. background callback jobs):
+# a lock held by another thread at the time of the fork would never be released in the child
+_caches = weakref.WeakSet()
+
+
+def _reset_locks():
+    for cache in list(_caches):
+        cache._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_locks)
+
+
+class LRUCache:
+    """
+    A thread-safe least-recently-used cache bounded by item count and, optionally, total size.
+
+    Parameters:
+    - max_items (int): Maximum number of entries kept in the cache.
+    - max_bytes (int): Maximum total size of the entries, in bytes.
+      None to only bound the number of entries.
+    - sizeof (callable): Function returning the size of a value in bytes (e.g. `len` for bytes).
+    """
+
+    def __init__(self, max_items=128, max_bytes=None, sizeof=sys.getsizeof):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for `key` (marking it as recently used), or `default`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Store `value` under `key`, evicting the least recently used entries when the
+        item or memory limit is exceeded. Values larger than `max_bytes` are not cached.
+        """
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self._entries) > self.max_items or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def discard(self, predicate):
+        """
+        Remove the entries whose key matches `predicate`.
+
+        Returns:
+        - int: Number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self.total_bytes -= self._entries.pop(key)[1]
+        return len(keys)
+
+    def clear(self):
+        """
+        Remove all the entries and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class FilterMemo:
+    """
+    Memoize callbacks whose output only depends on the dataset and the filter state.
+
+    Results are kept in a bounded in-memory LRU cache and, when a directory is given
+    and diskcache is installed, in a local disk cache that survives worker restarts.
+    Keys include the dataset version, so results of another dataset are never served.
+
+    Parameters:
+    - key_func (callable): Function mapping the data layer and the callback argument to a canonical
+      filter key.
+    - max_items (int): Maximum number of results kept in memory.
+    - disk_dir (str): Directory of the disk cache, or None to keep results in memory only.
+    - disk_size_limit (int): Maximum size of the disk cache, in bytes.
+    - results_version (int): Version of what the memoized callbacks return, in every key. Bump it
+      when their outputs change, so a disk cache written by an older release isn't served.
+    """
+
+    def __init__(self, key_func, max_items=256, disk_dir=None, disk_size_limit=256 * 1024 * 1024,
+                 results_version=1):
+        self.key_func = key_func
+        self.results_version = results_version
+        self.memory = LRUCache(max_items=max_items, max_bytes=None)
+        self.disk = None
+        if disk_dir and diskcache is not None:
+            self.disk = diskcache.Cache(disk_dir, size_limit=disk_size_limit, tag_index=True)
+        self.disk_hits = 0
+
+    def memoize(self, func):
+        """
+        Decorate a callback taking the data layer and one argument, so its results are
+        cached by dataset version, results version and filter key.
+        """
+        @functools.wraps(func)
+        def wrapper(dataset, arg):
+            key = (dataset.version, self.results_version, func.__name__, self.key_func(dataset, arg))
+
+            result = self.memory.get(key)
+            if result is not None:
+                return result
+
+            if self.disk is not None:
+                result = self.disk.get(key)
+                if result is not None:
+                    self.disk_hits += 1
+                    self.memory.put(key, result)
+                    return result
+
+            result = func(dataset, arg)
+            self.memory.put(key, result)
+            if self.disk is not None:
+                # Tag the entry with its dataset version, to evict the whole version at once
+                self.disk.set(key, result, tag=dataset.version)
+            return result
+
+        return wrapper
+
+    def invalidate(self, version):
+        """
+        Drop the results computed from a dataset version.
+
+        Parameters:
+        - version (str): The dataset version.
+
+        Returns:
+        - int: Number of entries removed from memory and disk.
+        """
+        removed = self.memory.discard(lambda key: key[0] == version)
+        if self.disk is not None:
+            removed += self.disk.evict(version)
+        return removed
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+        - dict: Number of entries in memory, memory hits and misses, and disk hits.
+        """
+        return {
+            'entries': len(self.memory),
+            'hits': self.memory.hits,
+            'misses': self.memory.misses,
+            'disk_hits': self.disk_hits,
+        }
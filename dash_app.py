@@ -1,55 +1,102 @@
+import functools
+import hmac
+import logging
+import os
+import tempfile
+import threading
 import dash
+import flask
 from dash import clientside_callback
-from dash.dependencies import Input, Output, State
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import dash_bootstrap_components as dbc
-import pandas as pd
-import plotly.express as px
 # Load pre-defined functions that help our work
 from utils import *
+from data_layer import normalize_filters, filter_key, request_filters, DatasetRegistry
+from figures import build_choropleth_template, choropleth_trace_updates, choropleth_patch, figure_skeleton
+from caching import FilterMemo, LRUCache
+import api
+import export
+import geometry
+from serving import asset_url, cache_assets, enable_compression, revalidated_etag
 
+logger = logging.getLogger(__name__)
 
 
-# Load the dataset
-file_path = 'dataset/cleaned_emrat.xlsx'
-data = pd.read_excel(file_path)
+# Load the dataset (from the Parquet artifact when it's up to date, otherwise from the .xlsx file)
+# and build the read-only data layer: typed events, bitmap index and aggregate cube.
+# It's shared by all the threads and never modified, every callback only queries it.
+# The registry swaps in new versions of the dataset without restarting (see the end of the file),
+# so callbacks get the data layer from `registry.bind`, not from the module-level `dataset`.
+registry = DatasetRegistry()
+dataset = registry.current()  # The data layer at startup, for the module-level setup below
 
 
 #### I. DATA & FUNCTIONS PREPARATION 
-# Make sure datatypes are correct
-data['last_update'] = pd.to_datetime(data['last_update'], errors='coerce')
-# In dash, there is a problem with int64 dtype that'll not allow the dashboard to run.
-# `year` is currently int64 and we work around this by converting `year` to str.
-# When plotting with plotly, we'll convert it back to int later.
-data['year'] = data['year'].astype(str)
+# Datatypes are set once when building the data layer (`year` and `month` as int,
+# `last_update` as datetime). `store-data` only holds the filter state, so `year`
+# doesn't need the old str workaround for int64 in dash anymore.
+# The statistics, filter options and figures are computed by the callbacks and the layout
+# from the current data layer, nothing else is derived from the dataset at import.
+
+
+@functools.cache
+def get_map_templates():
+    # Base figures of the two maps, built on first use (page load or warm-up) and then kept.
+    # The map callbacks only patch the trace data.
+    damage_map_template = build_choropleth_template(
+        'damage_by_country', 'damage_category', damage_bin_options[0][2],
+        legend=dict(orientation='h', yanchor="bottom", y=-0.1, xanchor="center", x=0.5, title=None)
+    )
+    disaster_count_map_template = build_choropleth_template(
+        'total_disasters', 'disaster_category', disaster_count_bin_options[0][2],
+        legend=dict(orientation='h', yanchor="bottom", y=-0.1, xanchor="center", x=0.5,
+                    traceorder="normal", itemsizing="constant", title=None)
+    )
+    return damage_map_template, disaster_count_map_template
+
+
+def default_filters(dataset):
+    """
+    Get the filter state of the default view.
+
+    Parameters:
+    - dataset (DisasterData): The data layer the view is built from.
 
-# Calculate key statistics
-## Total statistics
-total_deaths = data['total_deaths'].sum()
-total_affected = data['total_affected'].sum()
-total_damage = data['total_damage'].sum()
+    Returns:
+    - dict: The default years and every disaster type of this version of the dataset.
+    """
+    return normalize_filters(selected_year=[2000, 2024], selected_disaster_type=list(dataset.disaster_types))
 
-## Most statistics
-most_deaths_country = data.groupby('country')['total_deaths'].sum().idxmax()
-most_affected_country = data.groupby('country')['total_affected'].sum().idxmax()
-most_damaged_country = data.groupby('country')['total_damage'].sum().idxmax()
 
-# Last update date
-last_updated = data['last_update'].max()
+def get_filters(dataset, store):
+    """
+    Get the normalized filter state kept in `store-data`.
 
-# Prepare Year + Month filter data
-data['YearMonth'] = data['year'].astype(str) + '-' + data['month'].astype(str)
+    Parameters:
+    - dataset (DisasterData): The data layer bound to the callback.
+    - store (dict): The `store-data` content, with a 'filters' entry.
 
-# Get unique values for the dropdowns
-years = sorted(data['year'].unique())
-months = sorted(data['month'].unique())
-continents = sorted(data['region'].unique())
-subregions = sorted(data['subregion'].unique())
-countries = sorted(data['country'].unique())
-disaster_types = sorted(data['type'].unique())
+    Returns:
+    - dict: The filter state, or the default filters of the dataset when the store is empty.
+    """
+    if not store:
+        return default_filters(dataset)
 
-# Get max-min year
-max_year = max(years)
-min_year = min(years)
+    # Normalize again, so the filter state is canonical whatever the browser sends back
+    filters = store['filters']
+    return normalize_filters(filters['continent'], filters['subregion'], filters['country'],
+                             filters['year'], filters['month'], filters['type'])
+
+
+# Memoize the figure and statistic callbacks by canonical filter state (bounded, with hit/miss counters).
+# Set DASHBOARD_CACHE_DIR to also keep the results in a local disk cache that survives worker restarts.
+# `results_version` is bumped when the memoized callbacks return other outputs (2: stat card rankings).
+figure_memo = FilterMemo(
+    key_func=lambda dataset, store: filter_key(get_filters(dataset, store)),
+    max_items=256,
+    disk_dir=os.environ.get('DASHBOARD_CACHE_DIR'),
+    results_version=2
+)
 
 
 
@@ -76,601 +123,628 @@ app = dash.Dash(
 app.title = "Global Disaster Statistics - DataViz 2024"
 server = app.server
 
+# Responses are compressed (brotli or gzip) and versioned assets cached by browsers for a year,
+# see serving.py. Set DASHBOARD_COMPRESSION=0 when a proxy in front of the app compresses them.
+if os.environ.get('DASHBOARD_COMPRESSION', '1') not in ('', '0'):
+    enable_compression(server)
+cache_assets(app)
+
+# World geometry of the maps, served from assets/topojson/ (see geometry.py) instead of the plotly CDN.
+# Its URL holds a hash of the file, so browsers can keep it for a year.
+topojson_version = geometry.topojson_version()
+map_config = {'scrollZoom': False}
+if topojson_version:
+    map_config['topojsonURL'] = app.get_relative_path(f'/geo/{topojson_version}/')
+
+    @server.route('/geo/<version>/<name>.json')
+    def serve_topojson(version, name):
+        # Only the current version can be kept for a year: a stale or made-up hash would get the
+        # current file cached under its URL
+        if version != topojson_version:
+            flask.abort(404)
+        response = flask.send_from_directory(os.path.abspath(geometry.TOPOJSON_DIR), f'{name}.json',
+                                             max_age=365 * 24 * 3600)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+else:
+    logger.warning("%s is missing, the maps load the world geometry from the plotly CDN "
+                   "(run `python geometry.py --fetch`)", geometry.topojson_path())
+
+
+def check_map_locations(dataset):
+    # Countries that can't be drawn on the maps (see `python geometry.py` for the full report)
+    path = geometry.topojson_path() if topojson_version else None
+    failures = geometry.validate_countries(dataset.events, path)
+    if failures:
+        listed = ', '.join(f"{country} ({iso}, {reason})" for country, iso, reason in failures[:10])
+        more = f" and {len(failures) - 10} more" if len(failures) > 10 else ''
+        logger.warning("%d countries are left out of the maps: %s%s", len(failures), listed, more)
+
+
+check_map_locations(dataset)
+
+# Number of countries in the rankings of the stat cards (tooltip of the country cards)
+TOP_COUNTRIES = 5
+
+# Style of the graphs, dimmed while a background job builds them (DASHBOARD_BACKGROUND_CALLBACKS)
+graph_style = {'height': '100%'}
+updating_graph_style = {'height': '100%', 'opacity': 0.5, 'transition': 'opacity 0.3s'}
+
 # Layout of the dashboard: Consists of 2 rows.
 # R1 includes the title and filter bars.
 # R2 includes the dashboard cards (statistics & charts).
 # There'll be more detailed layers in each of the rows.
-app.layout = html.Div([
-    # Row 1: Title and filter bar
-    dbc.Row([
-        # Col 1 of Row 1: Dashboard title
-        dbc.Col(
-            [html.H1('Global Disaster Statistics'),
-             html.P(id='last-updated-card')],
-            className = ['align-items-center', 'flex-column', 'text-center', 'justify-content-center','align-content-center'],
-            xs=12, sm=12, md=12, lg=2, xl=2 # Match with Col 2 of Row 1
-        ),
-        # Col 2 of Row 1: Filters
-        dbc.Col(
-            [
-            dbc.Card([
-            # Must make all filters in the same row as we can't directly have a `dbc.Col` inside a `dbc.Col`
-            dbc.Row([
-                # Filter 1: Year and Month (Year above Month)
-                dbc.Col([
-                    html.Div([
-                        # Year slider
-                        html.Label(
-                            'Year',
-                            id = 'tt-year',
-                            style={'cursor':'pointer'}
-                        ),
-                        dbc.Tooltip(
-                            'Pull both the slider bar to change the year period. If you want to select a single year, pull them together at the same place.',
-                            target='tt-year'
-                        ),
-                        dcc.RangeSlider(
-                            # There is an developer's issue with dtype int64 (data['year'] dtype) with dcc.RangeSlider.
-                            # We'll have to state the years manually in this part.
-                            id='year-slider',
-                            min=2000, 
-                            max=2024, 
-                            step=1,
-                            value=[2000, 2024],
-                            marks={str(i): {'label': str(i)} for i in range(2000, 2025, 4)},
-                            tooltip={"placement": "bottom", "always_visible": True},
-                            #className="form-range"
-                        ),
-                        
-                        # Month dropdown
-                        html.Label(
-                            'Month',
-                            id='tt-month',
-                            style={'cursor':'pointer'}
-                        ),
-                        dbc.Tooltip(
-                            'Select the preferred month for the filter. Multiple months can be selected.',
-                            target='tt-month'
-                        ),
-                        dcc.Dropdown(
-                            id='month-dropdown',
-                            options=[
-                                {'label': 'January', 'value': 1},
-                                {'label': 'February', 'value': 2},
-                                {'label': 'March', 'value': 3},
-                                {'label': 'April', 'value': 4},
-                                {'label': 'May', 'value': 5},
-                                {'label': 'June', 'value': 6},
-                                {'label': 'July', 'value': 7},
-                                {'label': 'August', 'value': 8},
-                                {'label': 'September', 'value': 9},
-                                {'label': 'October', 'value': 10},
-                                {'label': 'November', 'value': 11},
-                                {'label': 'December', 'value': 12}],
-                            placeholder='Select Month',
-                            multi=True
-                        ),
-                        dbc.Row([
-                            html.Div([
-                                dbc.Button("Reset Filter", id="clear-filter"),
-                                dbc.Button("Dashboard Guide", id="open-modal"),
-                                html.Div("Press Reset Filter if the plots don't load", style = {"fontSize": "14px", "textAlign":"center"}),
-                                dbc.Modal(
-                                    [
-                                        dbc.ModalHeader(dbc.ModalTitle("How to use the dashboard")),
-                                        dbc.ModalBody(
-                                            html.Div([
-                                                html.P(
-                                                    "Welcome to Team A's Global Disaster Statistics Dashboard! There are 3 filters to help you view the data from different perspectives, including:",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                                html.Ul(
-                                                    [
-                                                        html.Li("Time filter (year and month)"),
-                                                        html.Li("Geographical filter (Continent/Subregion/Country)"),
-                                                        html.Li("Disaster filter (different types of disasters)"),
-                                                    ],
-                                                    style={'marginLeft': '20px', 'marginBottom': '5px'}  # Adjusted margin
-                                                ),
-                                                html.P(
-                                                    "To apply the filters to the dashboard, select your preferred attributes and choose the values you desire. Multiple values can be chosen in each filter.",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                                html.P(
-                                                    "To reset the filters, press the 'Reset Filter' button.",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                                html.P(
-                                                    "Point at each label to see hints and explanations related to the components/statistics.",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                                html.P(
-                                                    "At each plot, hover on data points on the graphs to see detailed information about the presenting data.",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                                html.P(
-                                                    "Plotly offers useful interaction to play with the plots, which you can find in the hidden bar on the top right of each graph:",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                                html.Ul(
-                                                    [
-                                                        html.Li("Click the 'Camera' icon to download the current plot as a picture."),
-                                                        html.Li("'Pan' icon helps navigate the content inside the plot."),
-                                                        html.Li("You can choose the data zone using the 'Box' or 'Lasso' select tool, which helps to filter the selected data."),
-                                                        html.Li("Zoom in and zoom out with '+' and '-' buttons."),
-                                                        html.Li("To reset the applied Plotly interaction, press the 'Reset' icon."),
-                                                    ],
-                                                    style={'marginLeft': '20px', 'marginBottom': '5px'}  # Adjusted margin
-                                                ),
-                                                html.P(
-                                                    "The dashboard was initially made for Macquarie DataViz challenge 2024 entry by Team A: @Mason, @Erik, @Anh Duc @Viet Anh. Feel free to contact us for discussions and let us know if we can improve anything: pphungwork@gmail.com (Mason).",
-                                                    style={'marginBottom': '5px'}  # Reduced margin
-                                                ),
-                                            ])
-                                        ),
-                                        dbc.ModalFooter(
-                                            dbc.Button(
-                                                "I got it!", id="close-modal", className="ms-auto", n_clicks=0
-                                            )
-                                        ),
-                                    ],
-                                    id="modal",
-                                    is_open=False,
-                                ),
-                                
-                                # dbc.Button("Download as JPG", id='download-image') # Under development
-                            ], className='d-flex align-items-center justify-content-between')
-                        ])
-                    ], className = 'd-flex flex-column justify-content-between h-100'),
-                ], className = ['h-100'], 
-                xs=12, sm=12, md=12, lg=4, xl=4),
-                
-                # Filter 2: Location (Continent, Subregion, Country in vertical stack)
-                dbc.Col([
-                    html.Div([
-                        # Continent dropdown
-                        html.Label(
-                            'Continent',
-                            id='tt-continent',
-                            style={'cursor': 'pointer'}
-                        ),
-                        dbc.Tooltip(
-                            'Select the preferred continent for the filter. Multiple continents can be selected.',
-                            target='tt-continent'
-                        ),
-                        dcc.Dropdown(
-                            id='continent-dropdown',
-                            options=[{'label': c, 'value': c} for c in continents],
-                            placeholder='Select Continent',
-                            multi=True
-                        ),
-                        
-                        # Region dropdown
-                        html.Label(
-                            'Region',
-                            id='tt-region',
-                            style={'cursor':'pointer'}
-                        ),
-                        dbc.Tooltip(
-                            'Select the preferred region in the selected continents. Multiple regions can be selected.',
-                            target='tt-region'
-                        ),
-                        dcc.Dropdown(
-                            id='subregion-dropdown',
-                            placeholder='Select Subregion',
-                            multi=True
-                        ),
-                        
-                        # Country dropdown
-                        html.Label(
-                            'Country',
-                            id='tt-country',
-                            style={'cursor':'pointer'}
-                        ),
-                        dbc.Tooltip(
-                            'Select the preferred countries or type the country names for the filter. Country list is affected by selected continents & regions.',
-                            target='tt-country'
-                        ),
-                        dcc.Dropdown(
-                            id='country-dropdown',
-                            placeholder='Select Country',
-                            multi=True
-                        )
-                        ]),  
-                ], className = ['h-100'], 
-                xs=12, sm=12, md=12, lg=3, xl=4),
-                # Filter 3: Disaster Type
-                dbc.Col([
-                    html.Div([
-                        html.Label(
-                            'Disaster type',
-                            id = 'tt-disastertype', 
-                            spellCheck = 'false',
-                            style={'cursor':'pointer'}
-                        ),
-                        dbc.Tooltip(
-                            'Select the preferred disaster types for the filter. Multiple disaster types can be selected.',
-                            target='tt-disastertype'
-                        ),
-                        dcc.Checklist(
-                            className="form-check",
-                            id='disaster-type-checkbox',
-                            options = [
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/drought.jpg", 
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Drought", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Drought",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/earthquake.jpg", 
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Earthquake", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Earthquake",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/extreme_temp.jpg", 
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Extreme temp", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Extreme temperature",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/flood.jpg", 
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Flood", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Flood",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/mass_movement.jpg", 
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Mass movement", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Mass movement",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/storm.jpeg",
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Storm", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Storm",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/volcanic.jpg", 
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Volcanic activity", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Volcanic activity",
-                                },
-                                {
-                                    "label": [
-                                        html.Img(src="/assets/images/disaster_types/wildfire.jpg",
-                                                 style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
-                                        html.Span("Wildfire", style={"padding-left": 10}),
-                                    ],
-                                    "value": "Wildfire",
-                                }
-                            ],
-                            value=disaster_types,
-                            inline = True,
-                            style={
-                                'display': 'flex', 'flexDirection': 'row', 
-                                'flexWrap': 'wrap', 'display':'grid',
-                                'gridTemplateColumns': 'repeat(2, 1fr)', 'gap': '5px',
-                                'text-overflow': 'ellipsis', 'overflow': 'hidden', 'white-space': 'nowrap'
-                            }
-                        )
-                    ])
-                ], className = ['h-100'], 
-                xs=12, sm=12, md=12, lg=5, xl=4)
-            ])],style = {'padding': '0 0.5rem'}, className = 'justify-content-center')], 
-            className = ['col', 'dflex', 'h-100'], 
-            xs=12, sm=12, md=12, lg=10, xl=10  # Match with Col 1 of Row 1
-        )
-    ], className=['row']),  # Match with Row 2 classes
-    
-    # Row 2: Statistics cards and graphs                
-    dbc.Spinner(
-        color="black",
-        fullscreen_style={"visibility":"visible", "filter": "blur(2px)"},
-        children=[html.Div([
-            dbc.Row([
-                # Col 1 of Row 2: Statistics
-                dbc.Col(
-                    [
-                        # Card 1: Total deaths
-                        dbc.Card([
-                            dbc.CardHeader(
-                                'Total Casualty',
-                                id="tt-card1",
-                                style={'textAlign': 'center'}
+def serve_layout():
+    """
+    Build the layout of the dashboard with the current version of the dataset.
+
+    Returns:
+    - dash.html.Div: The layout. It's built on each page load, so a newly swapped-in dataset
+      shows up without restarting.
+    """
+    dataset = registry.current()
+    # Dash also builds the layout once at startup, outside of any request, to validate the
+    # callbacks. Only the component ids matter then, so the map figures are left out.
+    damage_map_figure, disaster_count_map_figure = get_map_templates() if flask.has_request_context() else ({}, {})
+    return html.Div([
+        # Row 1: Title and filter bar
+        dbc.Row([
+            # Col 1 of Row 1: Dashboard title
+            dbc.Col(
+                [html.H1('Global Disaster Statistics'),
+                 html.P(id='last-updated-card')],
+                className = ['align-items-center', 'flex-column', 'text-center', 'justify-content-center','align-content-center'],
+                xs=12, sm=12, md=12, lg=2, xl=2 # Match with Col 2 of Row 1
+            ),
+            # Col 2 of Row 1: Filters
+            dbc.Col(
+                [
+                dbc.Card([
+                # Must make all filters in the same row as we can't directly have a `dbc.Col` inside a `dbc.Col`
+                dbc.Row([
+                    # Filter 1: Year and Month (Year above Month)
+                    dbc.Col([
+                        html.Div([
+                            # Year slider
+                            html.Label(
+                                'Year',
+                                id = 'tt-year',
+                                style={'cursor':'pointer'}
                             ),
                             dbc.Tooltip(
-                                "The number of fatalities (deceased and missing combined) during the period caused by the selected disasters.",
-                                target='tt-card1'
+                                'Pull both the slider bar to change the year period. If you want to select a single year, pull them together at the same place.',
+                                target='tt-year'
                             ),
-                            dbc.CardBody(
-                                html.Div([
-                                    html.H3(id='total-deaths-card', style={'textAlign': 'center', 'alignItems': 'center'}),
-                                ], className='card-stats-body')
-                            )
-                        ], className='stats-card d-flex'),
-                        # Card 2: Total Affected
-                        dbc.Card([
-                            dbc.CardHeader(
-                                'Total People Affected',
-                                id="tt-card2",
-                                style={'textAlign': 'center'}
+                            dcc.RangeSlider(
+                                # There is an developer's issue with dtype int64 (data['year'] dtype) with dcc.RangeSlider.
+                                # We'll have to state the years manually in this part.
+                                id='year-slider',
+                                min=2000, 
+                                max=2024, 
+                                step=1,
+                                value=[2000, 2024],
+                                marks={str(i): {'label': str(i)} for i in range(2000, 2025, 4)},
+                                tooltip={"placement": "bottom", "always_visible": True},
+                                #className="form-range"
+                            ),
+                        
+                            # Month dropdown
+                            html.Label(
+                                'Month',
+                                id='tt-month',
+                                style={'cursor':'pointer'}
                             ),
                             dbc.Tooltip(
-                                "Including: 1. whom with physical injuries, trauma, or illness requiring immediate medical assistance due to the disasters; 2. whom required shelter due to their house being destroyed or heavily damaged during the disasters; 3. whom required immediate assistance due to the disasters.",
-                                target='tt-card2'
+                                'Select the preferred month for the filter. Multiple months can be selected.',
+                                target='tt-month'
+                            ),
+                            dcc.Dropdown(
+                                id='month-dropdown',
+                                options=[
+                                    {'label': 'January', 'value': 1},
+                                    {'label': 'February', 'value': 2},
+                                    {'label': 'March', 'value': 3},
+                                    {'label': 'April', 'value': 4},
+                                    {'label': 'May', 'value': 5},
+                                    {'label': 'June', 'value': 6},
+                                    {'label': 'July', 'value': 7},
+                                    {'label': 'August', 'value': 8},
+                                    {'label': 'September', 'value': 9},
+                                    {'label': 'October', 'value': 10},
+                                    {'label': 'November', 'value': 11},
+                                    {'label': 'December', 'value': 12}],
+                                placeholder='Select Month',
+                                multi=True
                             ),
-                            dbc.CardBody(
+                            dbc.Row([
                                 html.Div([
-                                    html.H3(id='total-affected-card', style={'textAlign': 'center', 'alignItems': 'center'}),
-                                ], className='card-stats-body')
-                            )
-                        ], className='stats-card d-flex'),
-                        # Card 3: Total Damage
-                        dbc.Card([
-                            dbc.CardHeader(
-                                'Total Damage',
-                                id="tt-card3",
-                                style={'textAlign': 'center'}
+                                    dbc.Button("Reset Filter", id="clear-filter"),
+                                    dbc.Button("Dashboard Guide", id="open-modal"),
+                                    # Links to the events of the current view, streamed by the server (see export.py)
+                                    dbc.Button("Export CSV", id="export-csv", href=app.get_relative_path('/export/events.csv'),
+                                               external_link=True, download='disasters.csv'),
+                                    dbc.Button("Export Parquet", id="export-parquet", href=app.get_relative_path('/export/events.parquet'),
+                                               external_link=True, download='disasters.parquet'),
+                                    dbc.Modal(
+                                        [
+                                            dbc.ModalHeader(dbc.ModalTitle("How to use the dashboard")),
+                                            dbc.ModalBody(
+                                                html.Div([
+                                                    html.P(
+                                                        "Welcome to Team A's Global Disaster Statistics Dashboard! There are 3 filters to help you view the data from different perspectives, including:",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                    html.Ul(
+                                                        [
+                                                            html.Li("Time filter (year and month)"),
+                                                            html.Li("Geographical filter (Continent/Subregion/Country)"),
+                                                            html.Li("Disaster filter (different types of disasters)"),
+                                                        ],
+                                                        style={'marginLeft': '20px', 'marginBottom': '5px'}  # Adjusted margin
+                                                    ),
+                                                    html.P(
+                                                        "To apply the filters to the dashboard, select your preferred attributes and choose the values you desire. Multiple values can be chosen in each filter.",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                    html.P(
+                                                        "To reset the filters, press the 'Reset Filter' button.",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                    html.P(
+                                                        "Point at each label to see hints and explanations related to the components/statistics.",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                    html.P(
+                                                        "At each plot, hover on data points on the graphs to see detailed information about the presenting data.",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                    html.P(
+                                                        "Plotly offers useful interaction to play with the plots, which you can find in the hidden bar on the top right of each graph:",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                    html.Ul(
+                                                        [
+                                                            html.Li("Click the 'Camera' icon to download the current plot as a picture."),
+                                                            html.Li("'Pan' icon helps navigate the content inside the plot."),
+                                                            html.Li("You can choose the data zone using the 'Box' or 'Lasso' select tool, which helps to filter the selected data."),
+                                                            html.Li("Zoom in and zoom out with '+' and '-' buttons."),
+                                                            html.Li("To reset the applied Plotly interaction, press the 'Reset' icon."),
+                                                        ],
+                                                        style={'marginLeft': '20px', 'marginBottom': '5px'}  # Adjusted margin
+                                                    ),
+                                                    html.P(
+                                                        "The dashboard was initially made for Macquarie DataViz challenge 2024 entry by Team A: @Mason, @Erik, @Anh Duc @Viet Anh. Feel free to contact us for discussions and let us know if we can improve anything: pphungwork@gmail.com (Mason).",
+                                                        style={'marginBottom': '5px'}  # Reduced margin
+                                                    ),
+                                                ])
+                                            ),
+                                            dbc.ModalFooter(
+                                                dbc.Button(
+                                                    "I got it!", id="close-modal", className="ms-auto", n_clicks=0
+                                                )
+                                            ),
+                                        ],
+                                        id="modal",
+                                        is_open=False,
+                                    ),
+                                
+                                    # dbc.Button("Download as JPG", id='download-image') # Under development
+                                ], className='d-flex align-items-center justify-content-between')
+                            ])
+                        ], className = 'd-flex flex-column justify-content-between h-100'),
+                    ], className = ['h-100'], 
+                    xs=12, sm=12, md=12, lg=4, xl=4),
+                
+                    # Filter 2: Location (Continent, Subregion, Country in vertical stack)
+                    dbc.Col([
+                        html.Div([
+                            # Continent dropdown
+                            html.Label(
+                                'Continent',
+                                id='tt-continent',
+                                style={'cursor': 'pointer'}
                             ),
                             dbc.Tooltip(
-                                "The value of all economic losses directly or indirectly due to the disaster. Adjusted for inflation using the Consumer Price Index.",
-                                target='tt-card3'
+                                'Select the preferred continent for the filter. Multiple continents can be selected.',
+                                target='tt-continent'
                             ),
-                            dbc.CardBody(
-                                html.Div([
-                                    html.H3(id='total-damage-card', style={'textAlign': 'center', 'alignItems': 'center'}),
-                                ], className='card-stats-body')
-                            )
-                        ], className='stats-card d-flex'),
-                        # Card 4: Country with most deaths
-                        dbc.Card([
-                            dbc.CardHeader(
-                                'Highest Casualty',
-                                id="tt-card4",
-                                style={'textAlign': 'center'}
+                            dcc.Dropdown(
+                                id='continent-dropdown',
+                                options=[{'label': c, 'value': c} for c in dataset.continents],
+                                placeholder='Select Continent',
+                                multi=True
+                            ),
+                        
+                            # Region dropdown
+                            html.Label(
+                                'Region',
+                                id='tt-region',
+                                style={'cursor':'pointer'}
                             ),
                             dbc.Tooltip(
-                                "The country with the highest number of fatalities caused by the disasters.",
-                                target='tt-card4'
+                                'Select the preferred region in the selected continents. Multiple regions can be selected.',
+                                target='tt-region'
                             ),
-                            dbc.CardBody(
-                                html.Div([
-                                    html.H3(id='most-deaths-country-card')],
-                                    style={'textAlign': 'center', 'alignItems': 'center'},
-                                    className='card-stats-body'
-                                )
-                            )
-                        ], className='stats-card d-flex'),
-                        # Card 5: Most affected country
-                        dbc.Card([
-                            dbc.CardHeader(
-                                'Most People Affected',
-                                id="tt-card5",
-                                style={'textAlign': 'center'}
+                            dcc.Dropdown(
+                                id='subregion-dropdown',
+                                placeholder='Select Subregion',
+                                multi=True
+                            ),
+                        
+                            # Country dropdown
+                            html.Label(
+                                'Country',
+                                id='tt-country',
+                                style={'cursor':'pointer'}
                             ),
                             dbc.Tooltip(
-                                "The country with the highest number of people affected by the disasters.",
-                                target='tt-card5'
+                                'Select the preferred countries or type the country names for the filter. Country list is affected by selected continents & regions.',
+                                target='tt-country'
                             ),
-                            dbc.CardBody(
-                                html.Div(
-                                    [html.H3(id='most-affected-country-card')],
-                                    style={'textAlign': 'center', 'alignItems': 'center'},
-                                    className='card-stats-body'
-                                )
+                            dcc.Dropdown(
+                                id='country-dropdown',
+                                placeholder='Select Country',
+                                multi=True
                             )
-                        ], className='stats-card d-flex'),
-                        # Card 6: Most damaged country
-                        dbc.Card([
-                            dbc.CardHeader(
-                                'Highest Damaged',
-                                id="tt-card6",
-                                style={'textAlign': 'center'}
+                            ]),  
+                    ], className = ['h-100'], 
+                    xs=12, sm=12, md=12, lg=3, xl=4),
+                    # Filter 3: Disaster Type
+                    dbc.Col([
+                        html.Div([
+                            html.Label(
+                                'Disaster type',
+                                id = 'tt-disastertype', 
+                                spellCheck = 'false',
+                                style={'cursor':'pointer'}
                             ),
                             dbc.Tooltip(
-                                "The country suffered the highest economical losses caused by the disasters.",
-                                target='tt-card6'
+                                'Select the preferred disaster types for the filter. Multiple disaster types can be selected.',
+                                target='tt-disastertype'
                             ),
-                            dbc.CardBody(
-                                html.Div(
-                                    [html.H3(id='most-damaged-country-card')],
-                                    style={'textAlign': 'center', 'alignItems': 'center'},
-                                    className='card-stats-body'
-                                )
+                            dcc.Checklist(
+                                className="form-check",
+                                id='disaster-type-checkbox',
+                                options = [
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/drought.jpg'), 
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Drought", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Drought",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/earthquake.jpg'), 
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Earthquake", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Earthquake",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/extreme_temp.jpg'), 
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Extreme temp", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Extreme temperature",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/flood.jpg'), 
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Flood", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Flood",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/mass_movement.jpg'), 
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Mass movement", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Mass movement",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/storm.jpeg'),
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Storm", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Storm",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/volcanic.jpg'), 
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Volcanic activity", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Volcanic activity",
+                                    },
+                                    {
+                                        "label": [
+                                            html.Img(src=asset_url(app, 'images/disaster_types/wildfire.jpg'),
+                                                     style={'width': '60px', 'height': '35px', 'objectFit': 'cover', 'padding-left': 10}),
+                                            html.Span("Wildfire", style={"padding-left": 10}),
+                                        ],
+                                        "value": "Wildfire",
+                                    }
+                                ],
+                                value=list(dataset.disaster_types),
+                                inline = True,
+                                style={
+                                    'display': 'flex', 'flexDirection': 'row', 
+                                    'flexWrap': 'wrap', 'display':'grid',
+                                    'gridTemplateColumns': 'repeat(2, 1fr)', 'gap': '5px',
+                                    'text-overflow': 'ellipsis', 'overflow': 'hidden', 'white-space': 'nowrap'
+                                }
                             )
-                        ], className='stats-card d-flex'),
-                    ],
-                    className=['d-flex', 'flex-column', 'gap-2'],
-                    xs=12, sm=12, md=12, lg=12, xl=2
-                ),
-                # Col 2 of Row 2: Two maps
-                dbc.Col(
-                    [
-                        dbc.Card([
-                            dbc.CardHeader(             
-                                id='damage-map-header', 
+                        ])
+                    ], className = ['h-100'], 
+                    xs=12, sm=12, md=12, lg=5, xl=4)
+                ])],style = {'padding': '0 0.5rem'}, className = 'justify-content-center')], 
+                className = ['col', 'dflex', 'h-100'], 
+                xs=12, sm=12, md=12, lg=10, xl=10  # Match with Col 1 of Row 1
+            )
+        ], className=['row']),  # Match with Row 2 classes
+    
+        # Row 2: Statistics cards and graphs                
+        dbc.Spinner(
+            color="black",
+            fullscreen_style={"visibility":"visible", "filter": "blur(2px)"},
+            children=[html.Div([
+                dbc.Row([
+                    # Col 1 of Row 2: Statistics
+                    dbc.Col(
+                        [
+                            # Card 1: Total deaths
+                            dbc.Card([
+                                dbc.CardHeader(
+                                    'Total Casualty',
+                                    id="tt-card1",
+                                    style={'textAlign': 'center'}
+                                ),
+                                dbc.Tooltip(
+                                    "The number of fatalities (deceased and missing combined) during the period caused by the selected disasters.",
+                                    target='tt-card1'
+                                ),
+                                dbc.CardBody(
+                                    html.Div([
+                                        html.H3(id='total-deaths-card', style={'textAlign': 'center', 'alignItems': 'center'}),
+                                    ], className='card-stats-body')
+                                )
+                            ], className='stats-card d-flex'),
+                            # Card 2: Total Affected
+                            dbc.Card([
+                                dbc.CardHeader(
+                                    'Total People Affected',
+                                    id="tt-card2",
+                                    style={'textAlign': 'center'}
+                                ),
+                                dbc.Tooltip(
+                                    "Including: 1. whom with physical injuries, trauma, or illness requiring immediate medical assistance due to the disasters; 2. whom required shelter due to their house being destroyed or heavily damaged during the disasters; 3. whom required immediate assistance due to the disasters.",
+                                    target='tt-card2'
+                                ),
+                                dbc.CardBody(
+                                    html.Div([
+                                        html.H3(id='total-affected-card', style={'textAlign': 'center', 'alignItems': 'center'}),
+                                    ], className='card-stats-body')
+                                )
+                            ], className='stats-card d-flex'),
+                            # Card 3: Total Damage
+                            dbc.Card([
+                                dbc.CardHeader(
+                                    'Total Damage',
+                                    id="tt-card3",
+                                    style={'textAlign': 'center'}
+                                ),
+                                dbc.Tooltip(
+                                    "The value of all economic losses directly or indirectly due to the disaster. Adjusted for inflation using the Consumer Price Index.",
+                                    target='tt-card3'
+                                ),
+                                dbc.CardBody(
+                                    html.Div([
+                                        html.H3(id='total-damage-card', style={'textAlign': 'center', 'alignItems': 'center'}),
+                                    ], className='card-stats-body')
+                                )
+                            ], className='stats-card d-flex'),
+                            # Card 4: Country with most deaths
+                            dbc.Card([
+                                dbc.CardHeader(
+                                    'Highest Casualty',
+                                    id="tt-card4",
+                                    style={'textAlign': 'center'}
+                                ),
+                                dbc.Tooltip(
+                                    "The country with the highest number of fatalities caused by the disasters. Hover the country to see the top 5.",
+                                    target='tt-card4'
+                                ),
+                                dbc.CardBody(
+                                    html.Div([
+                                        html.H3(id='most-deaths-country-card'),
+                                        # Top countries, filled by the stat card callback
+                                        dbc.Tooltip(id='most-deaths-ranking', target='most-deaths-country-card', placement='bottom')],
+                                        style={'textAlign': 'center', 'alignItems': 'center'},
+                                        className='card-stats-body'
+                                    )
+                                )
+                            ], className='stats-card d-flex'),
+                            # Card 5: Most affected country
+                            dbc.Card([
+                                dbc.CardHeader(
+                                    'Most People Affected',
+                                    id="tt-card5",
+                                    style={'textAlign': 'center'}
+                                ),
+                                dbc.Tooltip(
+                                    "The country with the highest number of people affected by the disasters. Hover the country to see the top 5.",
+                                    target='tt-card5'
+                                ),
+                                dbc.CardBody(
+                                    html.Div(
+                                        [html.H3(id='most-affected-country-card'),
+                                         # Top countries, filled by the stat card callback
+                                         dbc.Tooltip(id='most-affected-ranking', target='most-affected-country-card', placement='bottom')],
+                                        style={'textAlign': 'center', 'alignItems': 'center'},
+                                        className='card-stats-body'
+                                    )
+                                )
+                            ], className='stats-card d-flex'),
+                            # Card 6: Most damaged country
+                            dbc.Card([
+                                dbc.CardHeader(
+                                    'Highest Damaged',
+                                    id="tt-card6",
+                                    style={'textAlign': 'center'}
+                                ),
+                                dbc.Tooltip(
+                                    "The country suffered the highest economical losses caused by the disasters. Hover the country to see the top 5.",
+                                    target='tt-card6'
+                                ),
+                                dbc.CardBody(
+                                    html.Div(
+                                        [html.H3(id='most-damaged-country-card'),
+                                         # Top countries, filled by the stat card callback
+                                         dbc.Tooltip(id='most-damaged-ranking', target='most-damaged-country-card', placement='bottom')],
+                                        style={'textAlign': 'center', 'alignItems': 'center'},
+                                        className='card-stats-body'
+                                    )
+                                )
+                            ], className='stats-card d-flex'),
+                        ],
+                        className=['d-flex', 'flex-column', 'gap-2'],
+                        xs=12, sm=12, md=12, lg=12, xl=2
+                    ),
+                    # Col 2 of Row 2: Two maps
+                    dbc.Col(
+                        [
+                            dbc.Card([
+                                dbc.CardHeader(             
+                                    id='damage-map-header', 
+                                ),
+                                dbc.CardBody(
+                                    html.Div([
+                                        dcc.Graph(
+                                            id='damage-map',
+                                            figure=damage_map_figure,
+                                            config=map_config,
+                                            style=graph_style, 
+                                            clear_on_unhover=True
+                                        ),
+                                        dcc.Tooltip(id='damage-map-tooltip', border_color = '#4C230A')
+                                    ], className = 'h-100')
+                                )
+                                ], className = 'map-card flex-fill d-flex flex-column h-50'
                             ),
-                            dbc.CardBody(
-                                html.Div([
-                                    dcc.Graph(
-                                        id='damage-map',
-                                        config={'scrollZoom': False},  
-                                        style={'height': '100%'}, 
-                                        clear_on_unhover=True
-                                    ),
-                                    dcc.Tooltip(id='damage-map-tooltip', border_color = '#4C230A')
-                                ], className = 'h-100')
-                            )
-                            ], className = 'map-card flex-fill d-flex flex-column h-50'
-                        ),
-                        dbc.Card([
-                            dbc.CardHeader(id='disaster-count-map-header'),
-                            dbc.CardBody(
-                                html.Div([
-                                    dcc.Graph(
-                                        id='disaster-count-map', 
-                                        config={'scrollZoom': False}, 
-                                        style={'height': '100%'},  
-                                        clear_on_unhover=True
-                                    ),
-                                    dcc.Tooltip(id='disaster-count-map-tooltip', border_color = '#4C230A')
-                                ], className = 'h-100')
+                            dbc.Card([
+                                dbc.CardHeader(id='disaster-count-map-header'),
+                                dbc.CardBody(
+                                    html.Div([
+                                        dcc.Graph(
+                                            id='disaster-count-map', 
+                                            figure=disaster_count_map_figure,
+                                            config=map_config,
+                                            style=graph_style,  
+                                            clear_on_unhover=True
+                                        ),
+                                        dcc.Tooltip(id='disaster-count-map-tooltip', border_color = '#4C230A')
+                                    ], className = 'h-100')
+                                ),
+                                ], className = 'map-card flex-fill d-flex flex-column h-50'
                             ),
-                            ], className = 'map-card flex-fill d-flex flex-column h-50'
-                        ),
-                    ], 
-                    className=['d-flex','flex-column', 'gap-2'],  
-                    xs=12, sm=12, md=12, lg=12, xl=5  # Match with other Cols of Row 2
-                ),
-                # Col 3 of Row 2: Two right charts
-                dbc.Col(
-                    [
-                        dbc.Card([
-                            dbc.CardHeader(id='stacked-bar-chart-header'),
-                            dbc.CardBody(
-                                html.Div([
-                                    dcc.Graph(
-                                        id='stacked-bar-chart', 
-                                        style={'height': '100%'},
-                                        clear_on_unhover=True
-                                    ),
-                                    dcc.Tooltip(id='stacked-bar-chart-tooltip', border_color = '#4C230A')
-                                ], className = 'h-100')
+                        ], 
+                        className=['d-flex','flex-column', 'gap-2'],  
+                        xs=12, sm=12, md=12, lg=12, xl=5  # Match with other Cols of Row 2
+                    ),
+                    # Col 3 of Row 2: Two right charts
+                    dbc.Col(
+                        [
+                            dbc.Card([
+                                dbc.CardHeader(id='stacked-bar-chart-header'),
+                                dbc.CardBody(
+                                    html.Div([
+                                        dcc.Graph(
+                                            id='stacked-bar-chart', 
+                                            style=graph_style,
+                                            clear_on_unhover=True
+                                        ),
+                                        dcc.Tooltip(id='stacked-bar-chart-tooltip', border_color = '#4C230A')
+                                    ], className = 'h-100')
+                                ),
+                                ], className = 'map-card flex-fill d-flex flex-column h-50'
                             ),
-                            ], className = 'map-card flex-fill d-flex flex-column h-50'
-                        ),
-                        dbc.Card([
-                            dbc.CardHeader(id='casualty-trend-header'),
-                            dbc.CardBody(
-                                html.Div([
-                                    dcc.Graph(
-                                        id='casualty-trend', 
-                                        style={'height': '100%'}, 
-                                        clear_on_unhover=True
-                                    ),
-                                    dcc.Tooltip(id='casualty-trend-tooltip', border_color = '#4C230A')
-                            ], className = 'h-100')
+                            dbc.Card([
+                                dbc.CardHeader(id='casualty-trend-header'),
+                                dbc.CardBody(
+                                    html.Div([
+                                        dcc.Graph(
+                                            id='casualty-trend', 
+                                            style=graph_style, 
+                                            clear_on_unhover=True
+                                        ),
+                                        dcc.Tooltip(id='casualty-trend-tooltip', border_color = '#4C230A')
+                                ], className = 'h-100')
+                                )
+                                ], className = 'map-card flex-fill d-flex flex-column h-50'
                             )
-                            ], className = 'map-card flex-fill d-flex flex-column h-50'
-                        )
-                    ], 
-                    className=['d-flex','flex-column', 'gap-2'],  
-                    xs=12, sm=12, md=12, lg=12, xl=5  # Match with other Cols of Row 2
-                ),
-            ], style = {'margin-top': '1vh'}, className = ['row', 'vh-75'])
-        ])]
-    ),
-    dcc.Store(id='store-data', storage_type='session'),
-])
-
-# Store filter data for quick access
-@app.callback(
-    Output('store-data', 'data'),
-    [Input('continent-dropdown', 'value'),
-     Input('subregion-dropdown', 'value'),
-     Input('country-dropdown', 'value'),
-     Input('year-slider', 'value'),
-     Input('month-dropdown', 'value'),
-     Input('disaster-type-checkbox', 'value')]
-)
-def store_data(selected_continent=None, selected_subregion=None, selected_country=None, selected_year=[2000,2024], selected_month=None, selected_disaster_type=disaster_types):
-    # Start with the original data
-    filtered_data = data
-    
-    # Initialize mask as True for all rows
-    mask = pd.Series([True] * len(filtered_data))
-    
-    # Apply continent filter (allow multiple)
-    if selected_continent and isinstance(selected_continent, list):
-        mask &= filtered_data['region'].isin(selected_continent)
-
-    # Apply subregion filter (allow multiple)
-    if selected_subregion and isinstance(selected_subregion, list):
-        mask &= filtered_data['subregion'].isin(selected_subregion)
-
-    # Apply country filter (allow multiple)
-    if selected_country and isinstance(selected_country, list):
-        mask &= filtered_data['country'].isin(selected_country)
-
-    # Apply year filter
-    if selected_year:
-        mask &= (filtered_data['year'] >= str(selected_year[0])) & (filtered_data['year'] <= str(selected_year[1]))
-
-    # Apply month filter (allow multiple)
-    if selected_month and isinstance(selected_month, list):
-        filtered_data['month'] = filtered_data['month'].astype(int)
-        mask &= filtered_data['month'].isin(selected_month)
+                        ], 
+                        className=['d-flex','flex-column', 'gap-2'],  
+                        xs=12, sm=12, md=12, lg=12, xl=5  # Match with other Cols of Row 2
+                    ),
+                ], style = {'margin-top': '1vh'}, className = ['row', 'vh-75'])
+            ])]
+        ),
+        dcc.Store(id='store-data', storage_type='session'),
+        # Region -> subregion -> countries hierarchy of the cascading dropdowns
+        dcc.Store(id='geography-data', data=dataset.geography),
+    ])
 
+app.layout = serve_layout
 
-    # Apply disaster type filter (allow multiple)
-    if selected_disaster_type and isinstance(selected_disaster_type, list):
-        mask &= filtered_data['type'].isin(selected_disaster_type)
+# The filter controls, inputs of the views (through `store-data` when the callbacks are split)
+filter_inputs = [Input('continent-dropdown', 'value'),
+                 Input('subregion-dropdown', 'value'),
+                 Input('country-dropdown', 'value'),
+                 Input('year-slider', 'value'),
+                 Input('month-dropdown', 'value'),
+                 Input('disaster-type-checkbox', 'value')]
 
-    # Filter the DataFrame using the combined mask
-    filtered_data = filtered_data[mask]
+# Store filter data for quick access
+def store_data(selected_continent=None, selected_subregion=None, selected_country=None, selected_year=[2000,2024], selected_month=None, selected_disaster_type=None):
+    # Build the canonical filter state
+    filters = normalize_filters(selected_continent, selected_subregion, selected_country,
+                                selected_year, selected_month, selected_disaster_type)
 
-    return filtered_data.to_dict(orient='records')
+    # Only the filter state goes to the browser, not the rows. The callbacks and the exports
+    # derive the memo key and the file name from it (`filter_key`), after normalizing it again.
+    return {'filters': filters}
 
 
 # Filter B1: Update the subregion dropdown based on selected continent
-@app.callback(
+# Filter B2: Update the country dropdown based on selected continent and subregion
+# Both run clientside (see `geography` in assets/clientside.js) from the hierarchy in `geography-data`,
+# sent once with the layout, so the cascade doesn't send any request to the server.
+clientside_callback(
+    ClientsideFunction(namespace='geography', function_name='subregion_options'),
     Output('subregion-dropdown', 'options'),
-    Input('continent-dropdown', 'value')
+    Input('continent-dropdown', 'value'),
+    State('geography-data', 'data')
 )
-def update_subregions(selected_continent):
-    if selected_continent:
-        # Ensure selected_continent is a list
-        filtered_subregions = data[data['region'].isin(selected_continent)]['subregion'].unique()
-        return [{'label': s, 'value': s} for s in filtered_subregions]
-    return []
 
-
-# Filter B2: Update the country dropdown based on selected continent and subregion
-@app.callback(
+clientside_callback(
+    ClientsideFunction(namespace='geography', function_name='country_options'),
     Output('country-dropdown', 'options'),
-    Input('continent-dropdown', 'value'),  # Add continent input
-    Input('subregion-dropdown', 'value')
+    Input('continent-dropdown', 'value'),
+    Input('subregion-dropdown', 'value'),
+    State('geography-data', 'data')
 )
-def update_countries(selected_continent, selected_subregion):
-    # Start with the full DataFrame
-    filtered_data = data.copy()
-
-    # If a continent is selected, filter based on continent
-    if selected_continent:
-        filtered_data = filtered_data[filtered_data['region'].isin(selected_continent)]
-
-    # If a subregion is selected, filter based on subregion
-    if selected_subregion:
-        filtered_data = filtered_data[filtered_data['subregion'].isin(selected_subregion)]
-
-    # Get the unique countries from the filtered DataFrame
-    filtered_countries = filtered_data['country'].unique()
 
-    # Sort the list of countries alphabetically
-    filtered_countries_sorted = sorted(filtered_countries)
 
-    return [{'label': c, 'value': c} for c in filtered_countries_sorted]
-
-
-# Generate card header
-@app.callback(
+# Generate card header (clientside, see `headers.card_names` in assets/clientside.js)
+clientside_callback(
+    ClientsideFunction(namespace='headers', function_name='card_names'),
     [Output('damage-map-header', 'children'),
     Output('disaster-count-map-header', 'children'),
     Output('stacked-bar-chart-header', 'children'),
@@ -682,22 +756,6 @@ def update_countries(selected_continent, selected_subregion):
      Input('month-dropdown', 'value'),
      Input('disaster-type-checkbox', 'value')]
 )
-
-def generate_card_name(selected_continent, selected_subregion, selected_country, selected_year, selected_month, selected_disaster_type):
-    # Update the plot card header name for each card (Total of 4 cards)
-    MapA_base_header = "Total damage (in US$) inflicted by "
-    damage_header = generate_header(MapA_base_header, selected_disaster_type, selected_year, selected_month)
-    
-    MapB_base_header = "Total number of "
-    disaster_count_damage_header = generate_header(MapB_base_header, selected_disaster_type, selected_year, selected_month)
-    
-    Bar_base_header = "Trends of "
-    stacked_bar_chart_header = generate_header(Bar_base_header, selected_disaster_type, selected_year, selected_month)
-
-    Line_base_header = "Number of deaths by time from "
-    casualty_trend_header = generate_header(Line_base_header, selected_disaster_type, selected_year, selected_month)
-    
-    return damage_header, disaster_count_damage_header, stacked_bar_chart_header, casualty_trend_header
     
 # Button 1: Reset filters
 @app.callback(
@@ -709,14 +767,15 @@ def generate_card_name(selected_continent, selected_subregion, selected_country,
     Output('disaster-type-checkbox', 'value')],
     [Input("clear-filter", "n_clicks")]
 )
-def reset_filters(n_clicks):
+@registry.bind
+def reset_filters(dataset, n_clicks):
     return (
         None,  # Reset continent dropdown to None or default value
         None,  # Reset subregion dropdown to None or default value
         None,  # Reset country dropdown to None or default value
         [2000, 2024],  # Reset year slider to the default range
         None,          # Reset month dropdown to None or default value
-        disaster_types # Reset disaster type checklist to the original list
+        list(dataset.disaster_types) # Reset disaster type checklist to the original list
     )
 
 # Button 2: Dashboard guide
@@ -730,367 +789,158 @@ def toggle_modal(n1, n2, is_open):
         return not is_open
     return is_open
 
-
-# Stats: Update all the statistics cards
-@app.callback(
-    [Output('total-deaths-card', 'children'),
-     Output('total-affected-card', 'children'),
-     Output('total-damage-card', 'children'),
-     Output('most-deaths-country-card', 'children'),
-     Output('most-affected-country-card', 'children'),
-     Output('most-damaged-country-card', 'children'),
-     Output('last-updated-card', 'children')],
-    Input('store-data', 'data')
+# Button 3: Export the events of the current view
+# The buttons are links to `/export/events.<format>`, with the filter state of `store-data` in the
+# query string (clientside, see `exports.links` in assets/clientside.js). The browser downloads the
+# file straight from the streamed response: `dcc.Download` would send it base64-encoded in a
+# callback response, built whole in memory.
+clientside_callback(
+    ClientsideFunction(namespace='exports', function_name='links'),
+    Output('export-csv', 'href'),
+    Output('export-parquet', 'href'),
+    Input('store-data', 'data'),
+    State('export-csv', 'href'),
+    State('export-parquet', 'href')
 )
-def update_stat_cards(data):
-    # Convert the data back to DataFrame format
-    filtered_data = pd.DataFrame(data)
 
-    # Convert 'last_update' column to datetime, errors='coerce' will convert invalid parsing to NaT
-    filtered_data['last_update'] = pd.to_datetime(filtered_data['last_update'], errors='coerce')
 
-    # Calculate totals for the filtered data
-    total_deaths = filtered_data['total_deaths'].sum()
-    total_affected = filtered_data['total_affected'].sum()
-    total_damage = filtered_data['total_damage'].sum()
+@server.route('/export/events.<file_format>')
+def export_events(file_format):
+    if file_format not in export.FORMATS or (file_format == 'parquet' and export.pq is None):
+        flask.abort(404)
+    try:
+        filters = request_filters(flask.request.args)
+    except ValueError as error:
+        return flask.jsonify(error=str(error)), 400
+
+    dataset = registry.current()
+    chunks = export.csv_chunks if file_format == 'csv' else export.parquet_chunks
+    return flask.Response(
+        chunks(dataset, filters),
+        mimetype=export.FORMATS[file_format],
+        headers={'Content-Disposition': f'attachment; filename="disasters-{filter_key(filters)}.{file_format}"'}
+    )
 
-    # Convert sums to integers if they are not None
-    total_deaths = int(total_deaths) if pd.notna(total_deaths) else 0
-    total_affected = int(total_affected) if pd.notna(total_affected) else 0
-    total_damage = int(total_damage) if pd.notna(total_damage) else 0
 
-    # Get country with most affected
-    most_affected_country = filtered_data.groupby('country')['total_affected'].sum().idxmax() if not filtered_data.empty else 'N/A'
-    # Get country with most damage
-    most_damaged_country = filtered_data.groupby('country')['total_damage'].sum().idxmax() if not filtered_data.empty else 'N/A'
-    # Get country with most deaths
-    most_deaths_country = filtered_data.groupby('country')['total_deaths'].sum().idxmax() if not filtered_data.empty else 'N/A'
+#### API
+# Read-only JSON aggregates for other tools, with the filters of the export links (see api.py).
+# The ETag only changes with the dataset version: a poller revalidating an unchanged aggregate
+# gets a 304 before anything is computed.
+@server.route(f'/api/{api.API_VERSION}/aggregates/<name>')
+def aggregate_api(name):
+    if name not in api.AGGREGATES:
+        return flask.jsonify(error=f"Unknown aggregate, use one of: {', '.join(api.AGGREGATES)}"), 404
+    try:
+        filters = request_filters(flask.request.args)
+    except ValueError as error:
+        return flask.jsonify(error=str(error)), 400
+
+    dataset = registry.current()
+    etag = api.aggregate_etag(dataset, name, filters)
+    revalidated = revalidated_etag(etag)
+    if revalidated is not None:
+        response = flask.Response(status=304)
+        response.set_etag(revalidated)
+    else:
+        response = flask.jsonify(api.aggregate_payload(dataset, name, filters))
+        response.set_etag(etag)
+    # Clients may keep the response, but revalidate it before each use
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
+
+#### VIEWS
+# Each view is built from its aggregates only, so the same code serves the single
+# fan-out callback and the split callbacks.
+
+# Stats: Build all the statistics cards
+def ranking_list(ranking):
+    # Top countries of a stat card, shown in a tooltip under the card value
+    ranked = [html.Li(f"{country}: {format_value(value)}") for country, value in ranking if value > 0]
+    if not ranked:
+        return "No data available"
+    return html.Ol(ranked, className='mb-0 ps-3 text-start')
+
+
+def build_stat_cards(by_country):
+    # Totals and top countries of the filtered data, in a single pass over the countries
+    metrics = ['total_deaths', 'total_affected', 'total_damage']
+    totals, rankings = country_rankings(by_country, metrics, TOP_COUNTRIES)
+
+    # Countries with most deaths, most people affected and most damage
+    most_deaths_country, most_affected_country, most_damaged_country = (
+        rankings[metric][0][0] if rankings[metric] else 'N/A' for metric in metrics
+    )
 
-    # Get last updated date, handle NaT (Not a Time) values gracefully
-    last_updated = filtered_data['last_update'].max() if not filtered_data.empty else 'N/A'
+    # Get last updated date
+    last_updated = by_country['last_update'].max() if not by_country.empty else 'N/A'
 
     # Format the values with commas for better readability
-    total_deaths_str = f"{total_deaths:,}"
-    total_affected_str = f"{total_affected:,}"
-    total_damage_str = f"{total_damage:,} US$"
+    total_deaths_str = f"{int(totals['total_deaths']):,}"
+    total_affected_str = f"{int(totals['total_affected']):,}"
+    total_damage_str = f"{int(totals['total_damage']):,} US$"
     last_updated_str = f"Data last update: {last_updated.strftime('%Y-%m-%d')}" if last_updated != 'N/A' else "Last update: N/A"
 
     return (total_deaths_str, total_affected_str, total_damage_str,
-            most_deaths_country, most_affected_country, most_damaged_country, last_updated_str)
+            most_deaths_country, most_affected_country, most_damaged_country, last_updated_str,
+            *(ranking_list(rankings[metric]) for metric in metrics))
 
 
 ## MapA: Total damage choropleth map based on filters
-# MapA plotting
-@app.callback(
-    Output('damage-map', 'figure'),
-    Input('store-data', 'data')
-)
+def build_damage_map(by_country):
+    # Get the total damage by country
+    filtered_data = by_country[['country', 'iso', 'total_damage']].rename(columns={'total_damage': 'damage_by_country'})
 
-def mapA_damage_choropleth(data):
-    # Convert the data back to DataFrame format
-    filtered_data = pd.DataFrame(data)
-
-    # Calculate total damage by country
-    agg_damage = filtered_data.groupby('country')['total_damage'].sum().reset_index()
-    agg_damage.rename(columns={'total_damage': 'damage_by_country'}, inplace=True)
-    
-    # Merge to get the damage values into filtered_data
-    filtered_data = filtered_data.merge(agg_damage, on='country', how='left')
-
-    # Get the minimum and maximum damage values
-    median = filtered_data['damage_by_country'].median()
+    # Get the median damage over the events (each country counted once per event)
+    median = repeated_median(by_country['total_damage'], by_country['count'])
     
-    # Define dynamic bins based on the value ranges
-    if median < 1_000_000:
-        bins = [0, 1000, 10_000, 100_000, 1_000_000, float('inf')]
-        labels = ['0 - 1K', '1K - 10K', '10K - 100K', '100K - 1M', '> 1M']
-    elif median < 1_000_000_000:
-        bins = [0, 1_000_000, 10_000_000, 100_000_000, 1_000_000_000, float('inf')]
-        labels = ['0 - 1M', '1M - 10M', '10M - 100M', '100M - 1B', '> 1B']
-    else:
-        bins = [0, 1_000_000_000, 10_000_000_000, 100_000_000_000, float('inf')]
-        labels = ['0 - 1B', '1B - 10B', '10B - 100B', '> 100B']
-
-    # Create a new column 'damage_category' using pd.cut
-    filtered_data['damage_category'] = pd.cut(
-        filtered_data['damage_by_country'], 
-        bins=bins, labels=labels, 
-        include_lowest=True)
-
-    # Ensure 'damage_category' is a categorical type with the specified order
-    filtered_data['damage_category'] = pd.Categorical(
-        filtered_data['damage_category'],
-        categories=labels,
-        ordered=True
-    )
-
-    # Identify missing categories
-    existing_categories = filtered_data['damage_category'].dropna().unique()
-    missing_categories = set(labels) - set(existing_categories)
-
-    if missing_categories:
-        missing_df = pd.DataFrame({
-            'country': [None]*len(missing_categories),
-            'damage_by_country': [0]*len(missing_categories),
-            'damage_category': pd.Categorical(list(missing_categories), categories=labels, ordered=True)
-        })
-        filtered_data = pd.concat([filtered_data, missing_df], ignore_index=True)
-
-    # Sort the DataFrame by 'damage_category' to ensure correct plotting order
-    filtered_data.sort_values('damage_category', inplace=True)
-    
-    # Assign color for each category
-    category_color = {labels[i]: map_color[i] for i in range(len(labels))}
-
-    # Create choropleth map for total damage categorized
-    fig = px.choropleth(
-        filtered_data,
-        locations='country',
-        locationmode='country names',
-        color='damage_category',  # Use the 'damage_category' column for color
-        color_discrete_map=category_color,  # Use explicit color mapping
-        hover_name='country',  # Country name shown on hover
-        custom_data=['damage_by_country','damage_category'],  # Add damage category to custom data
-        category_orders={'damage_category': labels}  # Force the correct legend order
+    # Categorize the countries into dynamic bins based on the median
+    filtered_data, labels = bin_by_median(
+        filtered_data, 'damage_by_country', 'damage_category', median, damage_bin_options,
+        placeholder_value=0
     )
     
-    # Turn off native hover to use dash tooltip
-    fig.update_traces(hoverinfo="none", hovertemplate=None)
-
-    # Customize the map's appearance
-    fig.update_geos(
-        showcoastlines=True,
-        fitbounds='locations',
-        coastlinecolor="Black",
-        showland=True, landcolor="lightgray", visible=False
-    )
-
-    fig.update_layout(
-        margin={"r":0, "t":0, "l":0, "b":0},
-        legend=dict(
-            orientation='h',
-            yanchor="bottom",
-            y=-0.1,
-            xanchor="center",
-            x=0.5,
-            title=None
-        )
+    # Only send the new trace data, the rest of the figure is already in the browser
+    updates = choropleth_trace_updates(
+        filtered_data, 'damage_by_country', 'damage_category', labels, len(get_map_templates()[0].data)
     )
+    return choropleth_patch(updates)
 
-    return fig
-
-# MapA tooltip
-@app.callback(
-    Output("damage-map-tooltip", "show"),
-    Output("damage-map-tooltip", "bbox"),
-    Output("damage-map-tooltip", "children"),
-    [Input("damage-map", "hoverData"),
-     Input('year-slider', 'value'),
-     Input('disaster-type-checkbox', 'value')]
-)
-def mapA_hover(hover_data, selected_year, selected_disaster_type):
-    if hover_data is None:
-        # Return default values when there's no hover data
-        return False, {"x0": 0, "y0": 0, "x1": 0, "y1": 0}, "No data available"
-
-    # Get hover details
-    pt = hover_data["points"][0]
-    bbox = pt["bbox"]  # This should already have the correct structure
-    
-    # Extract country name from the hover data
-    country_name = pt["location"]
-    
-    # Extract the year based on year slider or input
-    if isinstance(selected_year, list):
-        year_display = f"{selected_year[0]} - {selected_year[1]}"
-    else:
-        year_display = f"{selected_year}"
-
-    # Extract the damage category directly from hover data
-    damage = pt.get('customdata', [None])[0]  # Adjust based on your hover data structure
-    fmt_damage = format_value(damage)
-    
-    # Create tooltip content
-    children = html.Div([
-        html.H5(f"{country_name}", style={'margin': '0', 'textAlign': 'left'}),
-        html.H6(year_display, style={'margin': '0', 'textAlign': 'left'}, className = 'text-muted b'),
-        html.P(f"Total damage suffered: {fmt_damage} US$", style={'margin': '0', 'textAlign': 'left'}, className = 'b'),
-    ])
-
-    return True, bbox, children
 
 # Map-B: The disaster count choropleth map based on filters
-@app.callback(
-    Output('disaster-count-map', 'figure'),
-    Input('store-data', 'data')
-)
-
-
-def mapB_disaster_count_choropleth(data):
-    # Convert the data back to DataFrame format
-    filtered_data = pd.DataFrame(data)
-
-    # Aggregate the number of disasters per country
-    agg_count = filtered_data.groupby('country')['id'].count().reset_index()
-    agg_count.rename(columns={'id': 'total_disasters'}, inplace=True)
+def build_disaster_count_map(by_country):
+    # Get the number of disasters per country
+    filtered_data = by_country[['country', 'iso', 'count']].rename(columns={'count': 'total_disasters'})
 
-    # Merge to get the damage values into filtered_data
-    filtered_data = filtered_data.merge(agg_count, on='country', how='left')
+    # Get the median number of disasters over the events (each country counted once per event)
+    median = repeated_median(by_country['count'], by_country['count'])
 
-    # Initialize disaster_count_filtered from filtered_data
-    disaster_count_filtered = filtered_data.copy()
-    
-    # Get the minimum and maximum damage values
-    median = filtered_data['total_disasters'].median()
-
-    # Define bins and labels based on the current range of values (0 to over 600)
-    if median <= 20:
-        bins = [0, 10, 20, 30, 40, float('inf')]
-        labels = ['0 - 10', '10 - 20', '20 - 30', '30 - 40', '> 40']
-
-    elif median <= 50:
-        bins = [0, 15, 25, 50, 100, float('inf')]
-        labels = ['0 - 15', '15 - 25', '25 - 50', '50 - 100', '> 100']
-        
-    else:
-        bins = [0, 50, 100, 200, 300, float('inf')]
-        labels = ['0 - 50', '50 - 100', '100 - 200', '200 - 300', '> 300']
-
-    # Create a new column 'disaster_category' using pd.cut
-    disaster_count_filtered['disaster_category'] = pd.cut(
-        filtered_data['total_disasters'], 
-        bins=bins, labels=labels, 
-        include_lowest=True
+    # Categorize the countries into dynamic bins based on the median (0 to over 600 disasters)
+    disaster_count_filtered, labels = bin_by_median(
+        filtered_data, 'total_disasters', 'disaster_category', median, disaster_count_bin_options,
+        inclusive=True, placeholder_value=1
     )
 
-    # Ensure 'disaster_category' is a categorical type with the specified order
-    disaster_count_filtered['disaster_category'] = pd.Categorical(
-        disaster_count_filtered['disaster_category'],
-        categories=labels,
-        ordered=True
+    # Only send the new trace data, the rest of the figure is already in the browser
+    updates = choropleth_trace_updates(
+        disaster_count_filtered, 'total_disasters', 'disaster_category', labels, len(get_map_templates()[1].data)
     )
-
-    # Identify missing categories
-    existing_categories = disaster_count_filtered['disaster_category'].dropna().unique()
-    missing_categories = set(labels) - set(existing_categories)
-
-    if missing_categories:
-        missing_df = pd.DataFrame({
-            'country': [None]*len(missing_categories),
-            'total_disasters': [1]*len(missing_categories), 
-            'disaster_category': pd.Categorical(list(missing_categories), categories=labels, ordered=True)
-        })
-        disaster_count_filtered = pd.concat([disaster_count_filtered, missing_df], ignore_index=True)
-    
-    # Sort the DataFrame by the disaster category to ensure plotting order
-    disaster_count_filtered.sort_values('disaster_category', inplace=True)
-
-    # **Explicit color mapping to ensure the correct order of categories**
-    category_color = {labels[i]: map_color[i] for i in range(len(labels))}
-
-
-    # Create scatter_geo map for total number of disasters categorized
-    fig = px.choropleth(
-        disaster_count_filtered,
-        locations='country',
-        locationmode='country names',
-        color='disaster_category',
-        color_discrete_map=category_color,
-        hover_name='country',  # Country name shown on hover
-        custom_data=['total_disasters', 'disaster_category'],
-        category_orders={'disaster_category': labels}
-    )
-    
-    # Turn off native hover to use dash tooltip
-    fig.update_traces(hoverinfo="none", hovertemplate=None)
-    
-    # Customize the map's appearance
-    fig.update_geos(
-        showcoastlines=True,
-        fitbounds='locations',
-        coastlinecolor="Black",
-        showland=True, landcolor="lightgray", visible=False
-    )
-    
-    # Adjust the layout and margins, ensuring all categories are visible and correctly ordered
-    fig.update_layout(
-        margin={"r": 0, "t": 0, "l": 0, "b": 0},
-        legend=dict(
-            orientation='h',
-            yanchor="bottom",
-            y=-0.1,
-            xanchor="center",
-            x=0.5,
-            traceorder="normal",
-            itemsizing="constant",
-            title=None
-        )
-    )
-
-    return fig
-
-# MapB tooltip
-@app.callback(
-    Output("disaster-count-map-tooltip", "show"),
-    Output("disaster-count-map-tooltip", "bbox"),
-    Output("disaster-count-map-tooltip", "children"),
-    [Input("disaster-count-map", "hoverData"),
-     Input('year-slider', 'value'),
-     Input('disaster-type-checkbox', 'value')]
-)
-def mapB_hover(hover_data, selected_year, selected_disaster_type):
-    if hover_data is None:
-        # Return default values when there's no hover data
-        return False, {"x0": 0, "y0": 0, "x1": 0, "y1": 0}, "No data available"
-
-    # Get hover details
-    pt = hover_data["points"][0]
-    bbox = pt["bbox"]  # This should already have the correct structure
-    
-    # Extract country name from the hover data
-    country_name = pt["location"]
-    
-    # Extract the year based on year slider or input
-    if isinstance(selected_year, list):
-        year_display = f"{selected_year[0]} - {selected_year[1]}"
-    else:
-        year_display = f"{selected_year}"
-
-    # Extract the damage category directly from hover data
-    count = pt.get('customdata', [None])[0]
-    #disaster_cate = pt.get('customdata', [None, 'None'])[1]
-    
-    # Create tooltip content
-    children = html.Div([
-        html.H5(f"{country_name}", style={'margin': '0', 'textAlign': 'left'}),
-        html.H6(year_display, style={'margin': '0', 'textAlign': 'left'}, className = 'text-muted b'),
-        html.P(f"Number of disasters: {count}", style={'margin': '0', 'textAlign': 'left'}, className = 'b'),
-    ])
-
-    return True, bbox, children
-
+    return choropleth_patch(updates)
 
 
 # Bar chart: The stacked bar chart based on filters
-@app.callback(
-    Output('stacked-bar-chart', 'figure'),
-    Input('store-data', 'data')
-)
-def plot_bar_total_disaster(data):
-    # Convert the data back to DataFrame format
-    filtered_data = pd.DataFrame(data)
-
-    # Group by year and type for the filtered data
-    disasters_type_and_year = filtered_data.groupby(['year', 'type']).size().reset_index(name='total_disasters')
-
-    # Convert 'year' to int
-    disasters_type_and_year['year'] = disasters_type_and_year['year'].astype(int)
+def bar_chart_template(by_year_type, disaster_types):
+    # Get the number of disasters by year and type
+    disasters_type_and_year = by_year_type[['year', 'type', 'count']].rename(columns={'count': 'total_disasters'})
     
     # Map the colors based on the disaster type
     disaster_colors = {disaster_types[i]: color_list[i] for i in range(len(disaster_types))}
 
 
     # Create stacked bar chart for total disasters by type and year
+    # (plotly express is imported on first use, it's only needed once per dataset version)
+    import plotly.express as px
     fig = px.bar(
         disasters_type_and_year,
         x='year',
@@ -1122,67 +972,16 @@ def plot_bar_total_disaster(data):
     )
     return fig
 
-# Stacked bar chart tooltip
-@app.callback(
-    Output("stacked-bar-chart-tooltip", "show"),
-    Output("stacked-bar-chart-tooltip", "bbox"),
-    Output("stacked-bar-chart-tooltip", "children"),
-    [Input("stacked-bar-chart", "hoverData"),
-     Input('year-slider', 'value'),
-     Input('disaster-type-checkbox', 'value')]
-)
-def bar_hover(hover_data, selected_year, selected_disaster_type):
-    if hover_data is None:
-        # Return default values when there's no hover data
-        return False, {"x0": 0, "y0": 0, "x1": 0, "y1": 0}, "No data available"
-
-    # Get hover details
-    pt = hover_data["points"][0]
-    bbox = pt["bbox"]
-    
-    # Extract country name from the hover data
-    disaster_type = pt.get('customdata', [None])[0]
-    disaster_count = pt['y']
-    
-    # Extract the year based on year slider or input
-    if isinstance(selected_year, list):
-        year_display = f"{selected_year[0]} - {selected_year[1]}"
-    else:
-        year_display = f"{selected_year}"
-    
-    disaster_colors = {
-        'Drought': '#4C230A', 'Extreme temperature': '#E34B48', 'Volcanic activity': '#0D160B', 'Wildfire': 'orange', 
-        'Earthquake': '#555B6E', 'Mass movement': '#84B59F', 'Flood': '#568EA3', 'Storm' : '#BBE5ED'
-    }
-    
-    type_color = disaster_colors.get(disaster_type, 'black')  # Default to 'black' if type is not found
-       
-    # Create tooltip content
-    children = html.Div([
-        html.H5(f"{disaster_type}", style={'margin': '0', 'textAlign': 'left', 'color': type_color}),
-        html.H6(year_display, style={'margin': '0', 'textAlign': 'left'}, className = 'text-muted b'),
-        html.P(f"{disaster_count} occurences", style={'margin': '0', 'textAlign': 'left'}, className = 'b'),
-    ])
-
-    return True, bbox, children
 
 # Line chart: Total death by year
-@app.callback(
-    Output('casualty-trend', 'figure'),
-    Input('store-data', 'data')
-)
-def plot_line_casualty_trend(data):
-    # Convert the data back to DataFrame format
-    filtered_data = pd.DataFrame(data)
-
-    # Group by year and country to calculate total deaths
-    deaths_by_country_year = filtered_data.groupby(['year'])['total_deaths'].sum().reset_index()
+def casualty_trend_template(by_year):
+    # Get the total deaths by year
+    deaths_by_country_year = by_year[['year', 'total_deaths']]
     # Get the mean of global total deaths
     mean_death = deaths_by_country_year['total_deaths'].mean()
-    # Convert 'year' to int
-    deaths_by_country_year['year'] = deaths_by_country_year['year'].astype(int)
 
     # Create the line chart for Casualty Trend
+    import plotly.express as px
     fig = px.area(
         deaths_by_country_year,
         x='year',
@@ -1219,35 +1018,319 @@ def plot_line_casualty_trend(data):
 
     return fig
 
-# Line chart tooltip
-@app.callback(
+
+# The bar and line charts are built with plotly express once per dataset version, on the whole dataset.
+# Each view then reuses their layout and trace properties and only fills in the data.
+chart_skeletons = LRUCache(max_items=2, max_bytes=None)
+
+
+def get_chart_skeletons(dataset):
+    # Skeletons of the bar and line charts for a version of the data layer
+    skeletons = chart_skeletons.get(dataset.version)
+    if skeletons is None:
+        full_filters = normalize_filters()
+        skeletons = (
+            figure_skeleton(bar_chart_template(dataset.aggregate(full_filters, ['year', 'type']),
+                                               list(dataset.disaster_types)), ['x', 'y', 'customdata']),
+            figure_skeleton(casualty_trend_template(dataset.aggregate(full_filters, ['year'])), ['x', 'y']),
+        )
+        chart_skeletons.put(dataset.version, skeletons)
+    return skeletons
+
+
+def build_bar_chart(by_year_type, skeleton):
+    bar_chart_layout, bar_chart_traces = skeleton
+
+    # One trace per disaster type, in order of appearance like plotly express
+    traces = []
+    for disaster_type, rows in by_year_type.groupby('type', sort=False):
+        traces.append(dict(
+            bar_chart_traces[disaster_type],
+            x=rows['year'].tolist(),
+            y=rows['count'].tolist(),
+            customdata=[[disaster_type]] * len(rows)
+        ))
+    return {'data': traces, 'layout': bar_chart_layout}
+
+
+def build_casualty_trend(by_year, skeleton):
+    casualty_trend_layout, casualty_trend_traces = skeleton
+
+    # Get the mean of global total deaths
+    mean_death = by_year['total_deaths'].mean()
+
+    # Move the mean line and its annotation
+    layout = dict(
+        casualty_trend_layout,
+        shapes=[dict(casualty_trend_layout['shapes'][0], y0=mean_death, y1=mean_death)],
+        annotations=[dict(casualty_trend_layout['annotations'][0], y=mean_death,
+                          text=f"Period mean:{format_value(mean_death)}")]
+    )
+    trace = dict(casualty_trend_traces[''], x=by_year['year'].tolist(), y=by_year['total_deaths'].tolist())
+    return {'data': [trace], 'layout': layout}
+
+
+# Outputs of the views
+stat_card_outputs = [Output('total-deaths-card', 'children'),
+                     Output('total-affected-card', 'children'),
+                     Output('total-damage-card', 'children'),
+                     Output('most-deaths-country-card', 'children'),
+                     Output('most-affected-country-card', 'children'),
+                     Output('most-damaged-country-card', 'children'),
+                     Output('last-updated-card', 'children'),
+                     Output('most-deaths-ranking', 'children'),
+                     Output('most-affected-ranking', 'children'),
+                     Output('most-damaged-ranking', 'children')]
+view_outputs = stat_card_outputs + [Output('damage-map', 'figure'),
+                                    Output('disaster-count-map', 'figure'),
+                                    Output('stacked-bar-chart', 'figure'),
+                                    Output('casualty-trend', 'figure')]
+
+# Groupings of the aggregates: by country (stat cards and maps), by year and type (bar chart), by year (line chart)
+view_groupings = [['country'], ['year', 'type'], ['year']]
+
+
+## Fan-out: all the views from one slice of the cube, in a single response
+@figure_memo.memoize
+def compute_views(dataset, store):
+    by_country, by_year_type, by_year = dataset.aggregate_many(get_filters(dataset, store), view_groupings)
+    bar_skeleton, line_skeleton = get_chart_skeletons(dataset)
+    return (*build_stat_cards(by_country),
+            build_damage_map(by_country),
+            build_disaster_count_map(by_country),
+            build_bar_chart(by_year_type, bar_skeleton),
+            build_casualty_trend(by_year, line_skeleton))
+
+
+def update_views(dataset, selected_continent, selected_subregion, selected_country, selected_year, selected_month, selected_disaster_type):
+    # Keep the filter state in `store-data` and return every view with it
+    store = store_data(selected_continent, selected_subregion, selected_country,
+                       selected_year, selected_month, selected_disaster_type)
+    return (store, *compute_views(dataset, store))
+
+
+## Split: one callback (and request) per view, each triggered by `store-data`
+@figure_memo.memoize
+def update_stat_cards(dataset, store):
+    return build_stat_cards(dataset.aggregate(get_filters(dataset, store), ['country']))
+
+
+@figure_memo.memoize
+def mapA_damage_choropleth(dataset, store):
+    return build_damage_map(dataset.aggregate(get_filters(dataset, store), ['country']))
+
+
+@figure_memo.memoize
+def mapB_disaster_count_choropleth(dataset, store):
+    return build_disaster_count_map(dataset.aggregate(get_filters(dataset, store), ['country']))
+
+
+@figure_memo.memoize
+def plot_bar_total_disaster(dataset, store):
+    return build_bar_chart(dataset.aggregate(get_filters(dataset, store), ['year', 'type']), get_chart_skeletons(dataset)[0])
+
+
+@figure_memo.memoize
+def plot_line_casualty_trend(dataset, store):
+    return build_casualty_trend(dataset.aggregate(get_filters(dataset, store), ['year']), get_chart_skeletons(dataset)[1])
+
+
+## Background: the filter state and stat cards in the request, the maps and charts in a job
+def update_store_and_cards(dataset, selected_continent, selected_subregion, selected_country, selected_year, selected_month, selected_disaster_type):
+    store = store_data(selected_continent, selected_subregion, selected_country,
+                       selected_year, selected_month, selected_disaster_type)
+    return (store, *update_stat_cards(dataset, store))
+
+
+def update_charts(dataset, store):
+    # The maps and charts of the fan-out, memoized with it
+    return compute_views(dataset, store)[len(stat_card_outputs):]
+
+
+chart_ids = ['damage-map', 'disaster-count-map', 'stacked-bar-chart', 'casualty-trend']
+
+
+# One filter change costs a single request by default (`store-data` and the 11 view outputs).
+# Set DASHBOARD_SPLIT_CALLBACKS=1 for the former behaviour: `store-data`, then one request
+# per view, e.g. to compare both with benchmarks/fanout_benchmark.py.
+split_callbacks = os.environ.get('DASHBOARD_SPLIT_CALLBACKS', '') not in ('', '0')
+
+# Set DASHBOARD_BACKGROUND_CALLBACKS=1 to build the maps and charts in background callbacks
+# (requires `pip install "dash[diskcache]"`): each filter change forks a job process from the
+# worker, and the browser polls for its result, so heavy filter changes don't hold the gunicorn
+# threads the quick callbacks (filter state, stat cards, modal, reset) need. The graphs are
+# dimmed while their job runs, and a new filter change cancels the job it supersedes.
+# Jobs and results are kept in a local disk cache (DASHBOARD_JOBS_DIR) shared by the workers,
+# results by filter state and dataset version, so no broker is needed.
+background_callbacks = os.environ.get('DASHBOARD_BACKGROUND_CALLBACKS', '') not in ('', '0')
+
+if split_callbacks:
+    app.callback(Output('store-data', 'data'), filter_inputs)(store_data)
+    app.callback(stat_card_outputs, Input('store-data', 'data'))(registry.bind(update_stat_cards))
+    app.callback(Output('damage-map', 'figure'), Input('store-data', 'data'))(registry.bind(mapA_damage_choropleth))
+    app.callback(Output('disaster-count-map', 'figure'), Input('store-data', 'data'))(registry.bind(mapB_disaster_count_choropleth))
+    app.callback(Output('stacked-bar-chart', 'figure'), Input('store-data', 'data'))(registry.bind(plot_bar_total_disaster))
+    app.callback(Output('casualty-trend', 'figure'), Input('store-data', 'data'))(registry.bind(plot_line_casualty_trend))
+elif background_callbacks:
+    import diskcache
+    from dash import DiskcacheManager
+
+    job_manager = DiskcacheManager(
+        diskcache.Cache(os.environ.get('DASHBOARD_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'dashboard-jobs'))),
+        cache_by=[lambda: registry.current().version],
+        expire=3600
+    )
+    app.callback([Output('store-data', 'data')] + stat_card_outputs, filter_inputs)(registry.bind(update_store_and_cards))
+    app.callback(
+        view_outputs[len(stat_card_outputs):],
+        Input('store-data', 'data'),
+        background=True,
+        manager=job_manager,
+        # The browser polls the job every 250 ms, and sends the id of a running job with the next
+        # filter change so the server terminates it
+        interval=250,
+        running=[(Output(chart_id, 'style'), updating_graph_style, graph_style) for chart_id in chart_ids]
+    )(registry.bind(update_charts))
+else:
+    app.callback([Output('store-data', 'data')] + view_outputs, filter_inputs)(registry.bind(update_views))
+
+
+#### TOOLTIPS
+# MapA tooltip (clientside, see `tooltips.damage_map` in assets/clientside.js)
+clientside_callback(
+    ClientsideFunction(namespace='tooltips', function_name='damage_map'),
+    Output("damage-map-tooltip", "show"),
+    Output("damage-map-tooltip", "bbox"),
+    Output("damage-map-tooltip", "children"),
+    [Input("damage-map", "hoverData"),
+     Input('year-slider', 'value'),
+     Input('disaster-type-checkbox', 'value')]
+)
+
+# MapB tooltip (clientside, see `tooltips.disaster_count_map` in assets/clientside.js)
+clientside_callback(
+    ClientsideFunction(namespace='tooltips', function_name='disaster_count_map'),
+    Output("disaster-count-map-tooltip", "show"),
+    Output("disaster-count-map-tooltip", "bbox"),
+    Output("disaster-count-map-tooltip", "children"),
+    [Input("disaster-count-map", "hoverData"),
+     Input('year-slider', 'value'),
+     Input('disaster-type-checkbox', 'value')]
+)
+
+# Stacked bar chart tooltip (clientside, see `tooltips.stacked_bar_chart` in assets/clientside.js)
+clientside_callback(
+    ClientsideFunction(namespace='tooltips', function_name='stacked_bar_chart'),
+    Output("stacked-bar-chart-tooltip", "show"),
+    Output("stacked-bar-chart-tooltip", "bbox"),
+    Output("stacked-bar-chart-tooltip", "children"),
+    [Input("stacked-bar-chart", "hoverData"),
+     Input('year-slider', 'value'),
+     Input('disaster-type-checkbox', 'value')]
+)
+
+# Line chart tooltip (clientside, see `tooltips.casualty_trend` in assets/clientside.js)
+clientside_callback(
+    ClientsideFunction(namespace='tooltips', function_name='casualty_trend'),
     Output("casualty-trend-tooltip", "show"),
     Output("casualty-trend-tooltip", "bbox"),
     Output("casualty-trend-tooltip", "children"),
     [Input("casualty-trend", "hoverData"),
      Input('disaster-type-checkbox', 'value')]
 )
-def line_hover(hover_data, selected_disaster_type):
-    if hover_data is None:
-        # Return default values when there's no hover data
-        return False, {"x0": 0, "y0": 0, "x1": 0, "y1": 0}, "No data available"
-
-    # Get hover details
-    pt = hover_data["points"][0]
-    bbox = pt["bbox"]  # This should already have the correct structure
-    
-    # Extract country name from the hover data
-    total_deaths = pt['y']
-    year = pt['x']
-    
-       
-    # Create tooltip content
-    children = html.Div([
-        html.H5(year, style={'margin': '0', 'textAlign': 'left'}),
-        html.P(f"Total deaths: {format_value(total_deaths)}", style={'margin': '0', 'textAlign': 'left'}, className = 'b'),
-    ])
 
-    return True, bbox, children
+# Pre-warm the memoized views with the default view, the one most visits start with
+def default_store(dataset):
+    # `store-data` of the default view, with every disaster type of this version of the dataset
+    return store_data(None, None, None, [2000, 2024], None, list(dataset.disaster_types))
+
+
+def warm_views(dataset):
+    store = default_store(dataset)
+    if split_callbacks:
+        for memoized_callback in [update_stat_cards, mapA_damage_choropleth, mapB_disaster_count_choropleth,
+                                  plot_bar_total_disaster, plot_line_casualty_trend]:
+            memoized_callback(dataset, store)
+    else:
+        compute_views(dataset, store)
+        if background_callbacks:
+            update_stat_cards(dataset, store)
+
+
+# The warm-up (map templates, chart skeletons and default view) isn't done at import, it would
+# delay the startup. The first request of each process, usually the page load, starts it in the
+# background, so it runs while the browser loads the page and is done by its first callback.
+# The gunicorn master (see gunicorn.conf.py) never serves requests, each worker warms up itself.
+warm_up_started = threading.Lock()
+
+
+def warm_up():
+    get_map_templates()
+    warm_views(registry.current())
+
+
+@server.before_request
+def start_warm_up():
+    # Only the first request takes the lock, it's never released
+    if warm_up_started.acquire(blocking=False):
+        threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
+#### DATASET RELOAD
+# New versions of the dataset are built and warmed in the background while the current one
+# keeps serving, then swapped in. The memoized results of the old version are dropped.
+registry.on_prepare(warm_views)
+registry.on_prepare(check_map_locations)
+registry.on_swap(lambda old, new: figure_memo.invalidate(old.version))
+
+# Set DASHBOARD_RELOAD_INTERVAL (seconds) to check the dataset files for a new extract.
+# Like the warm-up, watching starts with the first request of the process: the gunicorn master
+# and the processes of background callbacks never serve requests, they don't watch.
+reload_interval = float(os.environ.get('DASHBOARD_RELOAD_INTERVAL', 0))
+if reload_interval > 0:
+    watch_started = threading.Lock()
+
+    @server.before_request
+    def start_watching():
+        if watch_started.acquire(blocking=False):
+            registry.watch(reload_interval)
+
+# Set DASHBOARD_ADMIN_TOKEN to reload on demand with
+# `curl -X POST -H "Authorization: Bearer $DASHBOARD_ADMIN_TOKEN" <host>/admin/reload`.
+# The request only reloads the worker that serves it, use the file check with several workers.
+admin_token = os.environ.get('DASHBOARD_ADMIN_TOKEN')
+if admin_token:
+    @server.route('/admin/reload', methods=['POST'])
+    def admin_reload():
+        authorization = flask.request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {admin_token}".encode()):
+            return flask.jsonify(error='unauthorized'), 401
+        registry.reload_in_background()
+        return flask.jsonify(version=registry.current().version, reloads=registry.reloads), 202
+
+#### MONITORING
+# Set DASHBOARD_METRICS=1 to record the latency, response size, errors and concurrency of every
+# callback, exposed on `/metrics` (Prometheus format) and logged as one JSON line per request.
+if os.environ.get('DASHBOARD_METRICS', '') not in ('', '0'):
+    from monitoring import CallbackMetrics, instrument
+
+    callback_metrics = CallbackMetrics()
+    callback_metrics.gauge('dashboard_cache_entries', 'Memoized results in memory.', lambda: figure_memo.stats()['entries'])
+    callback_metrics.gauge('dashboard_cache_hits', 'Memoized results served from memory.', lambda: figure_memo.stats()['hits'])
+    callback_metrics.gauge('dashboard_cache_misses', 'Memoized results computed.', lambda: figure_memo.stats()['misses'])
+    callback_metrics.gauge('dashboard_dataset_reloads', 'New dataset versions swapped in.', lambda: registry.reloads)
+    instrument(server, callback_metrics)
+
+#### PROFILING
+# Set DASHBOARD_PROFILE_DIR to profile the callback requests (cProfile and collapsed stacks per request,
+# see profiling.py). With DASHBOARD_PROFILE_SECRET, only requests signed with `python profiling.py sign` are,
+# otherwise a DASHBOARD_PROFILE_RATE fraction of them (1% by default, 1 for every request).
+if os.environ.get('DASHBOARD_PROFILE_DIR'):
+    from profiling import ProfilerMiddleware
+
+    server.wsgi_app = ProfilerMiddleware(server.wsgi_app, os.environ['DASHBOARD_PROFILE_DIR'],
+                                         secret=os.environ.get('DASHBOARD_PROFILE_SECRET'),
+                                         sample_rate=float(os.environ.get('DASHBOARD_PROFILE_RATE', '0.01')))
 
 # Run the app
 # Unhash below to make it automatically open the dashboard in browser when running py app.
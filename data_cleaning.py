@@ -1,72 +1,38 @@
+# Raw data cleaning process: EM-DAT public table -> cleaned dataset of the dashboard.
+# Each stage is an importable, vectorized function, so the pipeline can be reused
+# and scales to extracts much larger than the public table.
+#
+# Usage (from the repository root):
+#   python data_cleaning.py [--input RAW.xlsx] [--output CLEANED.xlsx] [--no-parquet]
+
 # import libraries
+import argparse
+import sys
+
 import pandas as pd
 import numpy as np
-import datetime
-
-def load_data(file_path, max_attempts=3):
-    attempts = 0
-    while attempts < max_attempts:
-        try:
-            # Try to load the data
-            df = pd.read_excel(file_path, index_col = False)
-            return df  # If successful, return the DataFrame
-        except FileNotFoundError:
-            # If file is not found, increment the attempt counter
-            attempts += 1
-            print(f"File not found: {file_path} (Attempt {attempts} of {max_attempts})")
-            
-            # If max attempts reached, exit the loop
-            if attempts == max_attempts:
-                print("Maximum attempts reached. Exiting...")
-                return None
-            
-            # Prompt user for a new path
-            file_path = input("Please enter the correct file path: ")
-
-# The original file path
-file_path = 'dataset/backups/raw_data/public_emdat_20240923.xlsx'
-df = load_data(file_path)
-
-if df is not None:
-    print("File loaded successfully.")
-else:
-    print("Failed to load the file after 3 attempts, make sure you are choosing the relative file path.")
-
-# Choose desired variables and make a copy to avoid the warning
-data = df[["DisNo.", "Disaster Type", "ISO", "Country", "Subregion", "Region", 
-            #"Latitude", "Longitude", 
-            "Start Year", "Start Month", 
-            "Total Deaths", "Total Affected", "Total Damage, Adjusted ('000 US$)", "Last Update"]].copy()
-
-# Rename the columns
-data.rename(
-    columns = {
-        "DisNo.": "id", "Disaster Type": "type", "ISO": "iso", "Country": "country", 
-        "Subregion": "subregion", "Region": "region", 
-        #"Latitude": "latitude", "Longitude": "logitude",
-        "Start Year": "year", "Start Month": "month", 
-        "Total Deaths": "total_deaths", "Total Affected": "total_affected", 
-        "Total Damage, Adjusted ('000 US$)": "total_damage", "Last Update": "last_update"
-    },
-    inplace = True
-)
-
-# Drop non-natural disaster and disasters that only have 1 (not enough) observations
-remove_vars = ['Animal incident', 'Epidemic', 'Impact', 'Infestation']
-data = data[~data['type'].isin(remove_vars)]
-
-# Remove observations with null Month
-data = data[~data['month'].isnull()]
-
-# Convert null values in total damage, deaths and affected to '-1'
-# for i in ['total_damage', 'total_deaths', 'total_affected']:
-#    data[i] = data[i].replace(np.nan, -1)
-
-# Add a yyyy/mm variable
-data['date'] = data.apply(lambda row: f"{int(row['year'])}/{int(row['month']):02d}", axis=1)
+from data_layer import build_parquet_artifact
+
+# Default file paths
+RAW_DATA_PATH = 'dataset/backups/raw_data/public_emdat_20240923.xlsx'
+CLEANED_DATA_PATH = 'dataset/cleaned_emrat.xlsx'
+CLEANED_PARQUET_PATH = 'dataset/cleaned_emrat.parquet'
+
+# Desired variables and their new names
+COLUMN_NAMES = {
+    "DisNo.": "id", "Disaster Type": "type", "ISO": "iso", "Country": "country",
+    "Subregion": "subregion", "Region": "region",
+    #"Latitude": "latitude", "Longitude": "logitude",
+    "Start Year": "year", "Start Month": "month",
+    "Total Deaths": "total_deaths", "Total Affected": "total_affected",
+    "Total Damage, Adjusted ('000 US$)": "total_damage", "Last Update": "last_update"
+}
+
+# Non-natural disaster and disasters that only have 1 (not enough) observations
+REMOVED_TYPES = ['Animal incident', 'Epidemic', 'Impact', 'Infestation']
 
 # Define the mapping for disaster types
-disaster_mapping = {
+DISASTER_MAPPING = {
     'Flood': 'Flood',
     'Glacial lake outburst flood': 'Flood',
     'Mass movement (wet)': 'Mass movement',
@@ -79,10 +45,8 @@ disaster_mapping = {
     'Earthquake': 'Earthquake'
 }
 
-# Group the disaster types with defined mapping
-data['type'] = data['type'].map(disaster_mapping)
-# Now map each disaster type to an integer code
-type_codes = {
+# Map each disaster type to an integer code
+TYPE_CODES = {
     'Drought': 1,
     'Flood': 2,
     'Extreme temperature': 3,
@@ -92,12 +56,142 @@ type_codes = {
     'Earthquake': 7,
     'Mass movement': 8
 }
-# Disaster types but in number
-data['type_code'] = data['type'].map(type_codes)
 
-# Export the final data (with disaster events retained and categorized by country-wide total damage)
-data.to_excel("dataset/cleaned_emrat.xlsx", index = False)
 
-print("Data cleaned and saved successfully!")
+def load_data(file_path):
+    """
+    Load the raw EM-DAT public table.
+
+    Parameters:
+    - file_path (str): Path of the raw .xlsx file.
+
+    Returns:
+    - pd.DataFrame: The raw table.
+
+    Raises:
+    - FileNotFoundError: If the file doesn't exist.
+    """
+    return pd.read_excel(file_path, index_col = False)
+
+
+def select_columns(raw):
+    """
+    Keep the desired variables of the raw table and rename them.
+
+    Parameters:
+    - raw (pd.DataFrame): The raw EM-DAT table.
+
+    Returns:
+    - pd.DataFrame: A new frame with the columns of `COLUMN_NAMES`, renamed.
+    """
+    return raw[list(COLUMN_NAMES)].rename(columns = COLUMN_NAMES)
+
+
+def filter_types(data):
+    """
+    Drop non-natural disasters and disaster types with too few observations.
+
+    Parameters:
+    - data (pd.DataFrame): The output of `select_columns`.
+
+    Returns:
+    - pd.DataFrame: The rows whose type is not in `REMOVED_TYPES`.
+    """
+    return data[~data['type'].isin(REMOVED_TYPES)]
+
+
+def drop_null_months(data):
+    """
+    Remove observations with null month.
+
+    Parameters:
+    - data (pd.DataFrame): The output of `filter_types`.
+
+    Returns:
+    - pd.DataFrame: The rows with a start month.
+    """
+    return data[data['month'].notna()]
+
+
+def derive_date(data):
+    """
+    Add a yyyy/mm `date` variable.
+
+    Only the distinct (year, month) pairs are formatted, then spread to the rows
+    with an array lookup, instead of formatting each row.
+
+    Parameters:
+    - data (pd.DataFrame): The output of `drop_null_months`.
+
+    Returns:
+    - pd.DataFrame: A new frame with the `date` column.
+    """
+    year_months = data['year'].to_numpy(dtype=np.int64) * 100 + data['month'].to_numpy(dtype=np.int64)
+    codes, uniques = pd.factorize(year_months)
+    labels = np.array([f"{ym // 100}/{ym % 100:02d}" for ym in uniques], dtype=object)
+    return data.assign(date = labels[codes])
+
+
+def map_types(data):
+    """
+    Group the disaster types with the defined mapping and add their integer codes.
+
+    Parameters:
+    - data (pd.DataFrame): The output of `derive_date`.
+
+    Returns:
+    - pd.DataFrame: A new frame with grouped `type` and the `type_code` column.
+    """
+    types = data['type'].map(DISASTER_MAPPING)
+    return data.assign(type = types, type_code = types.map(TYPE_CODES))
+
+
+def clean_data(raw):
+    """
+    Run all the cleaning stages on the raw table.
+
+    Parameters:
+    - raw (pd.DataFrame): The raw EM-DAT table.
+
+    Returns:
+    - pd.DataFrame: The cleaned dataset.
+    """
+    data = select_columns(raw)
+    data = filter_types(data)
+    data = drop_null_months(data)
+    # Null values in total damage, deaths and affected are kept as missing
+    data = derive_date(data)
+    data = map_types(data)
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Clean the raw EM-DAT public table for the dashboard.')
+    parser.add_argument('--input', default=RAW_DATA_PATH, help='Path of the raw EM-DAT .xlsx file')
+    parser.add_argument('--output', default=CLEANED_DATA_PATH, help='Path of the cleaned .xlsx file')
+    parser.add_argument('--parquet', default=CLEANED_PARQUET_PATH, help='Path of the Parquet copy of the cleaned data')
+    parser.add_argument('--no-parquet', action='store_true', help='Skip the Parquet export')
+    args = parser.parse_args(argv)
+
+    try:
+        raw = load_data(args.input)
+    except FileNotFoundError:
+        print(f"File not found: {args.input}, make sure you are choosing the relative file path.")
+        return 1
+    print("File loaded successfully.")
+
+    data = clean_data(raw)
+
+    # Export the final data (with disaster events retained and categorized by country-wide total damage)
+    data.to_excel(args.output, index = False)
+
+    # Also export a Parquet copy, which the dash app loads much faster than the .xlsx file
+    if not args.no_parquet and not build_parquet_artifact(args.output, args.parquet):
+        print("pyarrow is not installed, skipped the Parquet export.")
+
+    print("Data cleaned and saved successfully!")
+    return 0
 
 
+if __name__ == '__main__':
+    sys.exit(main())
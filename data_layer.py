@@ -0,0 +1,765 @@
+# The file includes function(s) that load and filter the cleaned dataset for the dash app.
+# Reading the .xlsx file with openpyxl is slow, so a columnar Parquet copy of the
+# cleaned data is kept next to it and loaded first whenever it is up to date.
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional, we fall back to the .xlsx file
+    pa = None
+    pq = None
+
+
+# Default dataset paths
+XLSX_PATH = 'dataset/cleaned_emrat.xlsx'
+PARQUET_PATH = 'dataset/cleaned_emrat.parquet'
+
+# Text columns with few unique values, stored as categorical codes in the Parquet file
+CATEGORICAL_COLUMNS = ['type', 'region', 'subregion', 'country']
+
+# Day number standing for "no update" in the aggregate cube (the cell has no event)
+EMPTY_DAY = np.iinfo(np.int32).min
+
+# Parquet metadata key holding the hash of the .xlsx file the artifact was built from
+SOURCE_HASH_KEY = b'source_sha256'
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(file_path):
+    """
+    Compute the SHA-256 digest of a file.
+
+    Parameters:
+    - file_path (str): Path of the file to hash.
+
+    Returns:
+    - bytes: The hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest().encode()
+
+
+def read_xlsx(xlsx_path=XLSX_PATH):
+    """
+    Read the cleaned dataset from the .xlsx file.
+
+    Parameters:
+    - xlsx_path (str): Path of the cleaned .xlsx file.
+
+    Returns:
+    - pd.DataFrame: The cleaned dataset.
+    """
+    return pd.read_excel(xlsx_path)
+
+
+def write_parquet(data, parquet_path=PARQUET_PATH, source_path=XLSX_PATH):
+    """
+    Write the cleaned dataset as a Parquet artifact tagged with the hash of its source file.
+
+    Parameters:
+    - data (pd.DataFrame): The cleaned dataset, as read from `source_path`.
+    - parquet_path (str): Path of the Parquet file to write.
+    - source_path (str): Path of the .xlsx file the data was read from.
+
+    Returns:
+    - bool: True if the artifact was written, False if pyarrow is not installed.
+    """
+    if pa is None:
+        return False
+
+    data = data.copy()
+    for col in CATEGORICAL_COLUMNS:
+        data[col] = data[col].astype('category')
+
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_HASH_KEY] = file_digest(source_path)
+    table = table.replace_schema_metadata(metadata)
+
+    # Write to a temporary file first so readers never see a half-written artifact
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, parquet_path)
+    return True
+
+
+def read_parquet_if_fresh(parquet_path=PARQUET_PATH, source_path=XLSX_PATH):
+    """
+    Read the Parquet artifact if it exists and was built from the current .xlsx file.
+
+    Parameters:
+    - parquet_path (str): Path of the Parquet artifact.
+    - source_path (str): Path of the .xlsx file the artifact should match.
+      If the .xlsx file is missing, the artifact is used as is.
+
+    Returns:
+    - pd.DataFrame or None: The cleaned dataset, or None if the artifact is missing or stale.
+    """
+    if pq is None or not os.path.exists(parquet_path):
+        return None
+
+    if os.path.exists(source_path):
+        metadata = pq.read_schema(parquet_path).metadata or {}
+        if metadata.get(SOURCE_HASH_KEY) != file_digest(source_path):
+            return None
+
+    return pq.read_table(parquet_path).to_pandas()
+
+
+def load_dataset(xlsx_path=XLSX_PATH, parquet_path=PARQUET_PATH):
+    """
+    Load the cleaned dataset, preferring the Parquet artifact over the .xlsx file.
+
+    When the artifact is missing or stale, the .xlsx file is read instead and the
+    artifact is rebuilt so the next start is fast again.
+
+    Parameters:
+    - xlsx_path (str): Path of the cleaned .xlsx file.
+    - parquet_path (str): Path of the Parquet artifact.
+
+    Returns:
+    - pd.DataFrame: The cleaned dataset.
+    """
+    data = read_parquet_if_fresh(parquet_path, xlsx_path)
+    if data is not None:
+        return data
+
+    data = read_xlsx(xlsx_path)
+    try:
+        write_parquet(data, parquet_path, xlsx_path)
+    except OSError:
+        # Read-only file system: keep serving from the .xlsx file
+        pass
+    return data
+
+
+def build_parquet_artifact(xlsx_path=XLSX_PATH, parquet_path=PARQUET_PATH):
+    """
+    Rebuild the Parquet artifact from the cleaned .xlsx file.
+
+    The .xlsx file is read back (instead of reusing the in-memory frame) so both
+    load paths produce exactly the same columns and dtypes.
+
+    Parameters:
+    - xlsx_path (str): Path of the cleaned .xlsx file.
+    - parquet_path (str): Path of the Parquet artifact.
+
+    Returns:
+    - bool: True if the artifact was written, False if pyarrow is not installed.
+    """
+    return write_parquet(read_xlsx(xlsx_path), parquet_path, xlsx_path)
+
+
+def freeze(array):
+    """
+    Mark a NumPy array as read-only, so any in-place write raises instead of silently
+    changing data shared between threads.
+
+    Parameters:
+    - array (np.ndarray): The array to freeze.
+
+    Returns:
+    - np.ndarray: The same array, now read-only.
+    """
+    array.setflags(write=False)
+    return array
+
+
+def prepare_events(data):
+    """
+    Build the typed, read-only event table used by the dashboard.
+
+    Columns are converted once here (years and months as int, `last_update` as datetime,
+    text dimensions as categorical) and the underlying arrays are frozen, so callbacks
+    never need a per-request conversion and cannot modify the shared data in place.
+
+    Parameters:
+    - data (pd.DataFrame): The cleaned dataset, as returned by `load_dataset`.
+
+    Returns:
+    - pd.DataFrame: A new frame backed by read-only arrays.
+    """
+    columns = {}
+    for col in data.columns:
+        values = data[col]
+        if col in ('year', 'month', 'type_code'):
+            columns[col] = freeze(values.to_numpy(dtype=np.int64, copy=True))
+        elif col == 'last_update':
+            columns[col] = freeze(pd.to_datetime(values, errors='coerce').to_numpy(copy=True))
+        elif col in CATEGORICAL_COLUMNS:
+            categorical = pd.Categorical(values)
+            codes = freeze(categorical.codes.copy())
+            columns[col] = pd.Categorical.from_codes(codes, categorical.categories)
+        elif pd.api.types.is_numeric_dtype(values):
+            columns[col] = freeze(values.to_numpy(dtype=float, copy=True))
+        else:
+            columns[col] = freeze(values.to_numpy(dtype=object, copy=True))
+    return pd.DataFrame(columns, copy=False)
+
+
+def normalize_filters(selected_continent=None, selected_subregion=None, selected_country=None,
+                      selected_year=None, selected_month=None, selected_disaster_type=None):
+    """
+    Build a canonical filter state from the dashboard filter values.
+
+    Multi-select values are sorted and de-duplicated. Empty selections (None, [] or a
+    non-list value) become None, as they don't filter anything.
+
+    Parameters:
+    - selected_continent (list): Selected regions.
+    - selected_subregion (list): Selected subregions.
+    - selected_country (list): Selected countries.
+    - selected_year (list): The [start, end] year range.
+    - selected_month (list): Selected months (1-12).
+    - selected_disaster_type (list): Selected disaster types.
+
+    Returns:
+    - dict: The filter state with keys 'continent', 'subregion', 'country', 'year', 'month', 'type'.
+    """
+    def normalize_list(values):
+        if values and isinstance(values, list):
+            return sorted(set(values))
+        return None
+
+    return {
+        'continent': normalize_list(selected_continent),
+        'subregion': normalize_list(selected_subregion),
+        'country': normalize_list(selected_country),
+        'year': [int(selected_year[0]), int(selected_year[1])] if selected_year else None,
+        'month': normalize_list([int(m) for m in selected_month] if isinstance(selected_month, list) else None),
+        'type': normalize_list(selected_disaster_type),
+    }
+
+
+def filter_key(filters):
+    """
+    Compute a short, stable key for a normalized filter state.
+
+    Parameters:
+    - filters (dict): The filter state returned by `normalize_filters`.
+
+    Returns:
+    - str: A 16 characters hex digest of the canonical JSON of the filter state.
+    """
+    canonical = json.dumps(filters, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def request_filters(args):
+    """
+    Read the filter state of a request from its query string.
+
+    The parameters are the filters of `normalize_filters`: `continent`, `subregion`,
+    `country`, `month` and `type` repeated once per selected value, `year` twice (first
+    and last year). A missing parameter doesn't filter anything. Used by the event export
+    and the aggregate API.
+
+    Parameters:
+    - args (werkzeug.datastructures.MultiDict): The query string arguments.
+
+    Returns:
+    - dict: The filter state, see `normalize_filters`.
+
+    Raises:
+    - ValueError: If the years or months aren't integers, or there aren't 2 years.
+    """
+    years = [int(year) for year in args.getlist('year')]
+    if years and len(years) != 2:
+        raise ValueError("`year` needs the first and the last year")
+    return normalize_filters(args.getlist('continent'), args.getlist('subregion'), args.getlist('country'),
+                             years, [int(month) for month in args.getlist('month')], args.getlist('type'))
+
+
+class FilterIndex:
+    """
+    A bitmap index of the events for each value of the filterable columns.
+
+    Every (dimension, value) pair holds a packed bitset of the matching rows, so a
+    filter becomes an OR of bitsets within a dimension and an AND across dimensions,
+    on 1 bit per event instead of column scans and string comparisons. It selects the
+    rows of the event export (see `DisasterData.filter_chunks`); the charts and cards
+    read the aggregate cube instead.
+
+    Parameters:
+    - data (pd.DataFrame): The cleaned dataset.
+    """
+
+    # Filter state key -> dataset column
+    DIMENSIONS = {
+        'continent': 'region',
+        'subregion': 'subregion',
+        'country': 'country',
+        'year': 'year',
+        'month': 'month',
+        'type': 'type',
+    }
+
+    def __init__(self, data):
+        self.size = len(data)
+        self.bitmaps = {}
+        for key, col in self.DIMENSIONS.items():
+            values = data[col].astype(int) if key in ('year', 'month') else data[col]
+            codes, uniques = pd.factorize(np.asarray(values))
+            self.bitmaps[key] = {
+                value: freeze(np.packbits(codes == code)) for code, value in enumerate(uniques.tolist())
+            }
+
+    def mask(self, filters):
+        """
+        Compute the boolean row mask of a normalized filter state.
+
+        Parameters:
+        - filters (dict): The filter state returned by `normalize_filters`.
+
+        Returns:
+        - np.ndarray: A boolean array with one entry per event.
+        """
+        bits = None
+        for key, bitmaps in self.bitmaps.items():
+            selected = filters[key]
+            if not selected:
+                continue
+            if key == 'year':
+                selected = [year for year in bitmaps if selected[0] <= year <= selected[1]]
+
+            # OR within the dimension
+            dimension_bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for value in selected:
+                if value in bitmaps:
+                    dimension_bits |= bitmaps[value]
+
+            # AND across dimensions
+            bits = dimension_bits if bits is None else bits & dimension_bits
+
+        if bits is None:
+            return np.ones(self.size, dtype=bool)
+        return np.unpackbits(bits, count=self.size).astype(bool)
+
+
+class AggregateCube:
+    """
+    A dense cube of event aggregates indexed by (country, year, month, type).
+
+    Every chart and statistic card of the dashboard is a sum (or max) of these cells,
+    so any filter combination becomes a slice of the cube plus a reduction over the
+    axes that are not grouped on, instead of a groupby over the raw events.
+
+    Parameters:
+    - data (pd.DataFrame): The cleaned dataset.
+    """
+
+    AXES = ['country', 'year', 'month', 'type']
+    METRICS = ['count', 'total_deaths', 'total_affected', 'total_damage']
+
+    def __init__(self, data):
+        years = data['year'].astype(int).to_numpy()
+        months = data['month'].astype(int).to_numpy()
+
+        # Axis labels: countries and types sorted like a pandas groupby, every year and month in range
+        self.labels = {
+            'country': np.array(sorted(data['country'].unique()), dtype=object),
+            'year': np.arange(years.min(), years.max() + 1),
+            'month': np.arange(1, 13),
+            'type': np.array(sorted(data['type'].unique()), dtype=object),
+        }
+
+        # Region and subregion of each country, to turn geographic filters into a country mask,
+        # and its ISO-3 code, which locates it on the maps
+        geo = data.groupby('country', observed=True)[['region', 'subregion', 'iso']].first()
+        self.country_region = geo['region'].reindex(self.labels['country']).to_numpy(dtype=object)
+        self.country_subregion = geo['subregion'].reindex(self.labels['country']).to_numpy(dtype=object)
+        self.country_iso = geo['iso'].reindex(self.labels['country']).to_numpy(dtype=object)
+
+        # Cell coordinates of each event
+        coords = (
+            pd.Categorical(data['country'], categories=self.labels['country']).codes,
+            years - self.labels['year'][0],
+            months - 1,
+            pd.Categorical(data['type'], categories=self.labels['type']).codes,
+        )
+        shape = tuple(len(self.labels[axis]) for axis in self.AXES)
+
+        # Metric sums, with missing values counted as 0 like a pandas sum
+        self.values = np.zeros((len(self.METRICS),) + shape)
+        np.add.at(self.values[0], coords, 1)
+        for i, metric in enumerate(self.METRICS[1:], start=1):
+            np.add.at(self.values[i], coords, data[metric].fillna(0).to_numpy(dtype=float))
+
+        # Latest update of each cell, in days since epoch (empty cells hold the minimum value)
+        self.last_update = np.full(shape, EMPTY_DAY, dtype=np.int32)
+        update_days = pd.to_datetime(data['last_update']).to_numpy().astype('datetime64[D]').astype(np.int32)
+        np.maximum.at(self.last_update, coords, update_days)
+
+        # Most requests don't filter on month, so also keep the cube already summed over months
+        self.month_totals = (self.values.sum(axis=3), self.last_update.max(axis=2))
+
+        # The cube is shared by all threads and never written after this point
+        for array in (self.values, self.last_update, self.country_region, self.country_subregion,
+                      self.country_iso, *self.month_totals, *self.labels.values()):
+            freeze(array)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.values, self.last_update) + self.month_totals)
+
+    def axis_masks(self, filters):
+        """
+        Translate a normalized filter state into one boolean mask per cube axis.
+
+        Parameters:
+        - filters (dict): The filter state returned by `normalize_filters`.
+
+        Returns:
+        - dict: A boolean mask for each filtered axis in `AXES`. Unfiltered axes are left out.
+        """
+        masks = {}
+        for key, lookup in [('continent', self.country_region),
+                            ('subregion', self.country_subregion),
+                            ('country', self.labels['country'])]:
+            if filters[key]:
+                mask = np.isin(lookup, filters[key])
+                masks['country'] = masks['country'] & mask if 'country' in masks else mask
+
+        if filters['year']:
+            years = self.labels['year']
+            masks['year'] = (years >= filters['year'][0]) & (years <= filters['year'][1])
+        if filters['month']:
+            masks['month'] = np.isin(self.labels['month'], filters['month'])
+        if filters['type']:
+            masks['type'] = np.isin(self.labels['type'], filters['type'])
+
+        # Masks selecting the whole axis don't need slicing
+        return {axis: mask for axis, mask in masks.items() if not mask.all()}
+
+    def aggregate(self, filters, by=()):
+        """
+        Aggregate the events matching the filters, grouped by some of the cube axes.
+
+        Parameters:
+        - filters (dict): The filter state returned by `normalize_filters`.
+        - by (list): Axes to group on, among 'country', 'year', 'month' and 'type'.
+          An empty list returns the grand totals in a single row.
+
+        Returns:
+        - pd.DataFrame: One row per non-empty group, sorted by the group columns, with the
+          group columns followed by 'count', 'total_deaths', 'total_affected',
+          'total_damage' and 'last_update'. Grouped by country, the ISO-3 code of each
+          country follows it in an 'iso' column.
+        """
+        return self.aggregate_many(filters, [by])[0]
+
+    def aggregate_many(self, filters, groupings):
+        """
+        Aggregate the events matching the filters for several groupings at once.
+
+        The cube is sliced once by the filters, then each grouping is a reduction of
+        that slice, so computing every view of the dashboard costs a single slice.
+
+        Parameters:
+        - filters (dict): The filter state returned by `normalize_filters`.
+        - groupings (list): One list of axes to group on per result, see `aggregate`.
+
+        Returns:
+        - list: One pd.DataFrame per grouping, in the same order, as returned by `aggregate`.
+        """
+        masks = self.axis_masks(filters)
+
+        # Use the month-summed cube when months are neither filtered nor grouped on
+        if 'month' in masks or any('month' in by for by in groupings):
+            axes, values, last_update = self.AXES, self.values, self.last_update
+        else:
+            axes = [axis for axis in self.AXES if axis != 'month']
+            values, last_update = self.month_totals
+
+        # Slice the filtered axes
+        labels = {'iso': self.country_iso}
+        for i, axis in enumerate(axes):
+            labels[axis] = self.labels[axis]
+            if axis in masks:
+                values = values.compress(masks[axis], axis=i + 1)
+                last_update = last_update.compress(masks[axis], axis=i)
+                labels[axis] = labels[axis][masks[axis]]
+        if 'country' in masks:
+            labels['iso'] = labels['iso'][masks['country']]
+
+        return [self._reduce(axes, labels, values, last_update, by) for by in groupings]
+
+    def _reduce(self, axes, labels, values, last_update, by):
+        """
+        Reduce a slice of the cube over the axes that are not grouped on.
+
+        Parameters:
+        - axes (list): The axes of the slice.
+        - labels (dict): The labels of each axis of the slice, and the ISO-3 codes of its countries.
+        - values (np.ndarray): The metric sums of the slice.
+        - last_update (np.ndarray): The latest update of each cell of the slice.
+        - by (list): Axes to group on.
+
+        Returns:
+        - pd.DataFrame: The aggregates, see `aggregate`.
+        """
+        reduced = tuple(i for i, axis in enumerate(axes) if axis not in by)
+        values = values.sum(axis=tuple(i + 1 for i in reduced))
+        if last_update.size:
+            last_update = last_update.max(axis=reduced)
+        else:
+            last_update = np.full(values.shape[1:], EMPTY_DAY, dtype=np.int32)
+
+        # Keep the non-empty groups only, like a groupby on the events would
+        group_axes = [axis for axis in axes if axis in by]
+        group_shape = values.shape[1:]
+        values = values.reshape(len(self.METRICS), -1)
+        nonempty = np.flatnonzero(values[0] > 0)
+        values = values[:, nonempty]
+        last_update = last_update.reshape(-1)[nonempty]
+        nonempty = np.unravel_index(nonempty, group_shape) if group_axes else ()
+
+        result = pd.DataFrame({axis: labels[axis][idx] for axis, idx in zip(group_axes, nonempty)})
+        if 'country' in group_axes:
+            result.insert(group_axes.index('country') + 1, 'iso', labels['iso'][nonempty[group_axes.index('country')]])
+        for i, metric in enumerate(self.METRICS):
+            result[metric] = values[i]
+        result['count'] = result['count'].astype(int)
+        result['last_update'] = pd.to_datetime(last_update.astype('datetime64[D]'))
+        return result
+
+
+class DisasterData:
+    """
+    The read-only data layer of the dashboard.
+
+    Holds the typed event table and the structures derived from it (bitmap index,
+    aggregate cube, filter options, geography hierarchy). Everything is built once at
+    load and never modified afterwards, so all gunicorn threads can query it
+    concurrently without locks. Callbacks go through `aggregate` and the export through
+    `filter_chunks` rather than the raw frame.
+
+    Parameters:
+    - data (pd.DataFrame): The cleaned dataset, as returned by `load_dataset`.
+    """
+
+    def __init__(self, data):
+        self.events = prepare_events(data)
+        self.index = FilterIndex(self.events)
+        self.cube = AggregateCube(self.events)
+
+        # Filter options
+        self.continents = tuple(sorted(self.events['region'].unique()))
+        self.subregions = tuple(sorted(self.events['subregion'].unique()))
+        self.countries = tuple(sorted(self.events['country'].unique()))
+        self.disaster_types = tuple(sorted(self.events['type'].unique()))
+        self.years = tuple(int(y) for y in self.cube.labels['year'])
+
+        # Geography hierarchy of the cascading dropdowns: region -> subregion -> sorted countries
+        self.geography = {}
+        places = self.events[['region', 'subregion', 'country']].drop_duplicates().astype(str)
+        for (region, subregion), countries in places.groupby(['region', 'subregion'], sort=True)['country']:
+            self.geography.setdefault(region, {})[subregion] = tuple(sorted(countries))
+
+        # Last update date of the whole dataset
+        self.last_updated = self.events['last_update'].max()
+
+        # Content hash of the events, identifying this version of the dataset in caches
+        row_hashes = pd.util.hash_pandas_object(self.events, index=False).to_numpy()
+        self.version = hashlib.sha1(row_hashes.tobytes()).hexdigest()[:16]
+
+    def aggregate(self, filters, by=()):
+        """
+        Aggregate the events matching the filters, see `AggregateCube.aggregate`.
+        """
+        return self.cube.aggregate(filters, by)
+
+    def aggregate_many(self, filters, groupings):
+        """
+        Aggregate the events matching the filters for several groupings, slicing the
+        cube once, see `AggregateCube.aggregate_many`.
+        """
+        return self.cube.aggregate_many(filters, groupings)
+
+    def filter_chunks(self, filters, chunk_rows=50_000, columns=None):
+        """
+        Select the events matching a normalized filter state, a chunk of rows at a time.
+
+        Only the positions of the matching rows are computed up front: each chunk is copied
+        from the event table when the next one is requested, so a large selection is never
+        in memory at once.
+
+        Parameters:
+        - filters (dict): The filter state returned by `normalize_filters`.
+        - chunk_rows (int): Maximum number of rows per chunk.
+        - columns (list): Columns of the chunks, all of them by default.
+
+        Returns:
+        - generator: DataFrames of at most `chunk_rows` matching rows, in event order.
+        """
+        positions = np.flatnonzero(self.index.mask(filters))
+        column_positions = slice(None) if columns is None else [self.events.columns.get_loc(c) for c in columns]
+        for start in range(0, len(positions), chunk_rows):
+            yield self.events.iloc[positions[start:start + chunk_rows], column_positions]
+
+
+class DatasetRegistry:
+    """
+    Holds the current version of the data layer and swaps in new versions without a restart.
+
+    A new version is built in the caller's thread (or a background thread) while the
+    current one keeps serving, then swapped in with a single reference assignment.
+    Callbacks take the current version once, at the start of the request (see `bind`),
+    so in-flight callbacks finish on the version they started with.
+
+    Parameters:
+    - loader (callable): Function returning the cleaned dataset, `load_dataset` by default.
+    - watch_paths (list): Files whose changes trigger a reload when watching.
+    """
+
+    def __init__(self, loader=load_dataset, watch_paths=(XLSX_PATH, PARQUET_PATH)):
+        self.loader = loader
+        self.watch_paths = tuple(watch_paths)
+        self.reloads = 0
+        self.last_error = None
+        self._prepare_hooks = []
+        self._swap_hooks = []
+        self._reload_lock = threading.Lock()
+        self._current = DisasterData(loader())
+        # Stamped after loading, which may rebuild the Parquet artifact (see `reload`)
+        self._stamp = self._file_stamp()
+
+    def current(self):
+        """
+        Return the current version of the data layer.
+
+        Returns:
+        - DisasterData: The data layer. Keep the returned object for the whole request
+          instead of calling `current` again, as a newer version may be swapped in meanwhile.
+        """
+        return self._current
+
+    def bind(self, func):
+        """
+        Decorate a callback so it receives the current data layer as first argument.
+        """
+        @functools.wraps(func)
+        def wrapper(*args):
+            return func(self._current, *args)
+
+        return wrapper
+
+    def on_prepare(self, hook):
+        """
+        Register a function called with a new data layer before it's swapped in (e.g. to warm caches).
+        """
+        self._prepare_hooks.append(hook)
+
+    def on_swap(self, hook):
+        """
+        Register a function called with the old and new data layers right after a swap
+        (e.g. to invalidate caches of the old version).
+        """
+        self._swap_hooks.append(hook)
+
+    def _file_stamp(self):
+        # Modification time and size of the watched files, to detect a new extract cheaply
+        stamp = []
+        for path in self.watch_paths:
+            if os.path.exists(path):
+                stat = os.stat(path)
+                stamp.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def reload(self, force=False):
+        """
+        Build the data layer again from the dataset files and swap it in if the data changed.
+
+        Parameters:
+        - force (bool): Reload even if the watched files look unchanged.
+
+        Returns:
+        - bool: True if a new version was swapped in.
+        """
+        # Only one build at a time, the current version keeps serving meanwhile
+        with self._reload_lock:
+            stamp = self._file_stamp()
+            if not force and stamp == self._stamp:
+                return False
+            # Remember the stamp first, so a broken file isn't reloaded on every check
+            self._stamp = stamp
+
+            new = DisasterData(self.loader())
+            # Loading may rebuild the Parquet artifact, which isn't a new extract
+            self._stamp = self._file_stamp()
+            if new.version == self._current.version:
+                return False
+            for hook in self._prepare_hooks:
+                hook(new)
+
+            old, self._current = self._current, new
+            self.reloads += 1
+
+        logger.info("Dataset version %s swapped in (was %s)", new.version, old.version)
+        for hook in self._swap_hooks:
+            hook(old, new)
+        return True
+
+    def try_reload(self, force=False):
+        """
+        Like `reload`, but log failures (e.g. a half-written file) and keep the current version.
+
+        Returns:
+        - bool: True if a new version was swapped in.
+        """
+        try:
+            swapped = self.reload(force)
+        except Exception as error:
+            self.last_error = repr(error)
+            logger.exception("Dataset reload failed, keeping version %s", self._current.version)
+            return False
+        if swapped:
+            self.last_error = None
+        return swapped
+
+    def reload_in_background(self, force=True):
+        """
+        Start `try_reload` in a background thread and return immediately.
+
+        Returns:
+        - threading.Thread: The reload thread.
+        """
+        thread = threading.Thread(target=self.try_reload, args=(force,), name='dataset-reload', daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, interval):
+        """
+        Check the watched files every `interval` seconds in a background thread and
+        reload when they change.
+
+        Threads don't survive a fork: with gunicorn, start watching in each worker (e.g. on
+        its first request), not in the master process that loads the app before forking them.
+
+        Parameters:
+        - interval (float): Seconds between two checks.
+
+        Returns:
+        - threading.Event: Set it to stop watching.
+        """
+        stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.try_reload()
+
+        threading.Thread(target=run, name='dataset-watch', daemon=True).start()
+        return stop
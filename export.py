@@ -0,0 +1,90 @@
+# The file includes the export of the events behind the current view, as CSV or Parquet.
+# The matching rows are read from the event table a chunk at a time (see
+# `DisasterData.filter_chunks`) and each chunk is encoded and sent before the next one is
+# copied, so the memory of an export doesn't grow with the size of the selection:
+# - CSV: one block of lines per chunk, after the header line,
+# - Parquet: one row group per chunk, the file footer comes last.
+import pandas as pd
+
+from data_layer import pa, pq
+
+# Columns of the exported events, as in the cleaned dataset (without the internal type code)
+EXPORT_COLUMNS = ['id', 'type', 'iso', 'country', 'subregion', 'region', 'year', 'month',
+                  'total_deaths', 'total_affected', 'total_damage', 'last_update', 'date']
+
+# Rows encoded at a time
+CHUNK_ROWS = 50_000
+
+# Export formats and their media types
+FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+
+def csv_chunks(dataset, filters, chunk_rows=CHUNK_ROWS):
+    """
+    Encode the events matching the filters as CSV, a chunk of rows at a time.
+
+    Parameters:
+    - dataset (DisasterData): The data layer.
+    - filters (dict): The filter state returned by `normalize_filters`.
+    - chunk_rows (int): Rows encoded at a time.
+
+    Returns:
+    - generator: The bytes of the CSV file, the header line first.
+    """
+    yield pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(index=False).encode()
+    for chunk in dataset.filter_chunks(filters, chunk_rows, EXPORT_COLUMNS):
+        yield chunk.to_csv(index=False, header=False, date_format='%Y-%m-%d').encode()
+
+
+class StreamSink:
+    """
+    A write-only file for the Parquet writer, whose content is taken out as it's written.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.blocks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        # The bytes written since the last call
+        data = b''.join(self.blocks)
+        self.blocks = []
+        return data
+
+
+def parquet_chunks(dataset, filters, chunk_rows=CHUNK_ROWS):
+    """
+    Encode the events matching the filters as a Parquet file, one row group per chunk of rows.
+
+    Parameters:
+    - dataset (DisasterData): The data layer.
+    - filters (dict): The filter state returned by `normalize_filters`.
+    - chunk_rows (int): Rows per row group.
+
+    Returns:
+    - generator: The bytes of the Parquet file, each row group as soon as it's written.
+    """
+    # The schema of the whole table, so every row group (and an empty selection) gets the same one
+    schema = pa.Schema.from_pandas(dataset.events.iloc[:0][EXPORT_COLUMNS], preserve_index=False)
+    sink = StreamSink()
+    with pq.ParquetWriter(sink, schema, compression='snappy') as writer:
+        for chunk in dataset.filter_chunks(filters, chunk_rows, EXPORT_COLUMNS):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.take()
+    yield sink.take()
@@ -0,0 +1,142 @@
+# The file includes the figure templates of the dash app charts.
+# The map figures are built once at startup and each callback only sends the data
+# that changed (locations, z, customdata) as a dash `Patch`, instead of rebuilding
+# and re-sending the whole figure (geos config, legend, template) on every filter change.
+import pandas as pd
+from dash import Patch
+
+from utils import map_color
+
+
+def build_choropleth_template(value_col, category_col, labels, legend):
+    """
+    Build the base figure of a categorized choropleth map.
+
+    The figure has one empty trace per legend category, in legend order, with the
+    colors, geos and layout settings of the dashboard maps.
+
+    Parameters:
+    - value_col (str): The name of the value shown in the tooltip (first customdata entry).
+    - category_col (str): The name of the category column.
+    - labels (list): Category labels, with as many entries as the largest set of bins.
+    - legend (dict): The legend layout of the map.
+
+    Returns:
+    - plotly.graph_objects.Figure: The base figure.
+    """
+    # plotly express is imported on first use, it's only needed to build the templates
+    import plotly.express as px
+
+    # One placeholder row per category, so px creates every trace
+    placeholder = pd.DataFrame({
+        'country': [None] * len(labels),
+        'iso': [None] * len(labels),
+        value_col: [0] * len(labels),
+        category_col: labels,
+    })
+
+    # Countries are located by ISO-3 code, an exact lookup in the topojson, instead of
+    # matching their names against the country regexes of plotly.js in the browser
+    fig = px.choropleth(
+        placeholder,
+        locations='iso',
+        locationmode='ISO-3',
+        color=category_col,
+        color_discrete_map={labels[i]: map_color[i] for i in range(len(labels))},
+        hover_name='country',
+        custom_data=[value_col, category_col],
+        category_orders={category_col: labels}
+    )
+
+    # Turn off native hover to use dash tooltip
+    fig.update_traces(hoverinfo="none", hovertemplate=None)
+
+    # Customize the map's appearance
+    fig.update_geos(
+        showcoastlines=True,
+        fitbounds='locations',
+        coastlinecolor="Black",
+        showland=True, landcolor="lightgray", visible=False
+    )
+
+    fig.update_layout(
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        legend=legend
+    )
+
+    return fig
+
+
+def choropleth_trace_updates(map_data, value_col, category_col, labels, n_traces):
+    """
+    Compute the per-trace data of a categorized choropleth map.
+
+    Parameters:
+    - map_data (pd.DataFrame): The output of `utils.bin_by_median`, one row per country (with its ISO-3 code)
+      plus the placeholder rows of the empty categories.
+    - value_col (str): The column shown in the tooltip.
+    - category_col (str): The category column.
+    - labels (list): The category labels of the current bins.
+    - n_traces (int): The number of traces in the base figure.
+
+    Returns:
+    - list: One dict of trace properties per trace of the base figure. Traces beyond
+      the current number of categories are hidden.
+    """
+    updates = []
+    for i in range(n_traces):
+        if i >= len(labels):
+            updates.append({'visible': False})
+            continue
+
+        rows = map_data[map_data[category_col] == labels[i]]
+        countries = rows['country'].tolist()
+        updates.append({
+            'visible': True,
+            'name': labels[i],
+            'locations': rows['iso'].tolist(),
+            'hovertext': countries,
+            'z': [1] * len(countries),
+            'customdata': [[value, labels[i]] for value in rows[value_col].tolist()],
+        })
+    return updates
+
+
+def choropleth_patch(updates):
+    """
+    Turn per-trace updates into a dash `Patch` of the map figure.
+
+    Parameters:
+    - updates (list): The output of `choropleth_trace_updates`.
+
+    Returns:
+    - dash.Patch: The partial update of the figure.
+    """
+    patched = Patch()
+    for i, trace_update in enumerate(updates):
+        for prop, value in trace_update.items():
+            patched['data'][i][prop] = value
+    return patched
+
+
+def figure_skeleton(fig, data_props):
+    """
+    Split a figure into its layout and its traces without their data.
+
+    Building a plotly express figure costs tens of milliseconds, mostly spent on
+    validation and the template. Built once, its layout and trace properties can be
+    reused as plain dicts, and each callback only fills in the data.
+
+    Parameters:
+    - fig (plotly.graph_objects.Figure): A figure built with representative data.
+    - data_props (list): The data properties of the traces (e.g. 'x', 'y'), left out.
+
+    Returns:
+    - tuple: The layout (dict) and the trace properties (dict), keyed by trace name.
+    """
+    fig_dict = fig.to_dict()
+    traces = {
+        trace.get('name', ''): {prop: value for prop, value in trace.items() if prop not in data_props}
+        for trace in fig_dict['data']
+    }
+    return fig_dict['layout'], traces
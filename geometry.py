@@ -0,0 +1,158 @@
+# The file includes the world geometry of the dash app maps.
+# The maps locate countries by their ISO-3 code in the world topojson of plotly.js. Plotly.js
+# downloads this file from the plotly CDN unless the graph config points it somewhere else, so
+# a copy is kept in `assets/topojson/` and served by the dash app with long-lived cache headers.
+#
+# Usage (from the repository root):
+#   python geometry.py --fetch   # Download the topojson into assets/topojson/ if it isn't there
+#   python geometry.py           # Report the countries of the dataset missing from the maps
+import argparse
+import json
+import os
+import re
+import sys
+import urllib.request
+
+from data_layer import file_digest, load_dataset
+
+# Directory of the topojson files, and the file plotly.js loads for world maps (110m resolution)
+TOPOJSON_DIR = 'assets/topojson'
+TOPOJSON_NAME = 'world_110m'
+
+# Where plotly.js downloads the topojson files by default (the `topojsonURL` of the graph config)
+TOPOJSON_CDN_URL = 'https://cdn.plot.ly/un/'
+
+ISO3_PATTERN = re.compile(r'^[A-Z]{3}$')
+
+# Codes of EM-DAT that aren't current ISO 3166 countries, so no map geometry has them
+NON_STANDARD_CODES = {
+    'AZO': 'EM-DAT code of the Azores',
+    'SPI': 'EM-DAT code of the Canary Islands',
+    'SCG': 'former ISO-3 code of Serbia and Montenegro',
+    'YUG': 'former ISO-3 code of Yugoslavia',
+    'ANT': 'former ISO-3 code of the Netherlands Antilles',
+    'SUN': 'former ISO-3 code of the USSR',
+    'CSK': 'former ISO-3 code of Czechoslovakia',
+    'DDR': 'former ISO-3 code of East Germany',
+    'YMD': 'former ISO-3 code of South Yemen',
+    'YMN': 'former ISO-3 code of North Yemen',
+}
+
+
+def topojson_path(directory=TOPOJSON_DIR, name=TOPOJSON_NAME):
+    return os.path.join(directory, f"{name}.json")
+
+
+def topojson_version(directory=TOPOJSON_DIR, name=TOPOJSON_NAME):
+    """
+    Identify the content of the local topojson file, to version its URL.
+
+    Returns:
+    - str or None: The first 12 characters of its SHA-256 digest, None if the file is missing.
+    """
+    path = topojson_path(directory, name)
+    if not os.path.exists(path):
+        return None
+    return file_digest(path).decode()[:12]
+
+
+def country_codes(path):
+    """
+    Read the ISO-3 codes of the countries drawn in a topojson file.
+
+    Parameters:
+    - path (str): Path of the topojson file.
+
+    Returns:
+    - set: The `id` of every geometry of its 'countries' object.
+    """
+    with open(path) as f:
+        topology = json.load(f)
+    geometries = topology['objects']['countries']['geometries']
+    return {geometry['id'] for geometry in geometries if 'id' in geometry}
+
+
+def validate_countries(data, path=None):
+    """
+    List the countries of the dataset that can't be located on the maps.
+
+    A country fails when its ISO-3 code is missing, malformed or not a current country code,
+    when it has several codes, when several countries share its code, or when the code isn't
+    in the topojson file.
+
+    Parameters:
+    - data (pd.DataFrame): The cleaned dataset, with `country` and `iso` columns.
+    - path (str): Path of the topojson file. None to only check the codes themselves.
+
+    Returns:
+    - list: One (country, iso, reason) tuple per failing country, sorted by country.
+    """
+    places = data[['country', 'iso']].drop_duplicates().astype(str)
+    codes_per_country = places.groupby('country')['iso'].nunique()
+    countries_per_code = places.groupby('iso')['country'].nunique()
+    known_codes = country_codes(path) if path is not None else None
+
+    failures = []
+    for country, iso in places.itertuples(index=False):
+        if not ISO3_PATTERN.match(iso):
+            reason = 'missing or malformed ISO-3 code'
+        elif iso in NON_STANDARD_CODES:
+            reason = NON_STANDARD_CODES[iso]
+        elif codes_per_country[country] > 1:
+            reason = 'several ISO-3 codes'
+        elif countries_per_code[iso] > 1:
+            reason = 'ISO-3 code shared with another country'
+        elif known_codes is not None and iso not in known_codes:
+            reason = 'not in the map geometry'
+        else:
+            continue
+        failures.append((country, iso, reason))
+    return sorted(failures)
+
+
+def fetch_topojson(directory=TOPOJSON_DIR, name=TOPOJSON_NAME, base_url=TOPOJSON_CDN_URL):
+    """
+    Download a topojson file of plotly.js into the local directory.
+
+    Returns:
+    - str: Path of the downloaded file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = topojson_path(directory, name)
+    with urllib.request.urlopen(f"{base_url}{name}.json", timeout=60) as response:
+        content = response.read()
+    # Check it's a topology before replacing the current file
+    json.loads(content)['objects']['countries']
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage and validate the world geometry of the maps.')
+    parser.add_argument('--fetch', action='store_true',
+                        help="Download the topojson from the plotly CDN, if it isn't in the directory yet")
+    parser.add_argument('--directory', default=TOPOJSON_DIR, help='Directory of the topojson files')
+    args = parser.parse_args(argv)
+
+    path = topojson_path(args.directory)
+    if args.fetch and not os.path.exists(path):
+        print(f"Saved {fetch_topojson(args.directory)}")
+
+    if not os.path.exists(path):
+        print(f"{path} not found, only checking the ISO-3 codes (run with --fetch to download it).")
+        path = None
+
+    data = load_dataset()
+    failures = validate_countries(data, path)
+    print(f"{data['country'].nunique()} countries, {len(failures)} can't be located on the maps")
+    for country, iso, reason in failures:
+        events = int((data['country'] == country).sum())
+        print(f"- {country} ({iso}): {reason}, {events} events")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
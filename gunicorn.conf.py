@@ -0,0 +1,26 @@
+# gunicorn settings of the dashboard, read by gunicorn from the working directory.
+# Run with: gunicorn dash_app:server (command line options override these settings)
+#
+# The app is imported once in the master process, before the workers are forked: the
+# libraries, the data layer (events, bitmap index, aggregate cube) and the warmed views
+# are then shared copy-on-write by all the workers instead of being loaded by each one.
+# Dataset versions reloaded later (DASHBOARD_RELOAD_INTERVAL) are built by each worker.
+# See benchmarks/memory_report.py for the memory of each worker.
+import gc
+import os
+
+bind = f":{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Timeout is set to 0 to disable the timeouts of the workers to allow Cloud Run to handle instance scaling
+timeout = 0
+
+# Load the app before forking the workers
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # Move the objects loaded so far out of the garbage collector's reach: collections in the
+    # workers would otherwise write to their headers and copy the shared pages one by one
+    gc.freeze()
@@ -0,0 +1,256 @@
+# The file includes the optional instrumentation of the dash app callbacks.
+# Every `_dash-update-component` request is timed and measured on the Flask server, then
+# exposed per callback on a Prometheus-format `/metrics` route and logged as a JSON line
+# with the normalized filter state. Recording a request only takes a lock and a few
+# additions, the text format is built when `/metrics` is scraped.
+import bisect
+import json
+import logging
+import threading
+import time
+
+import flask
+
+from data_layer import normalize_filters
+
+# Upper bounds of the histogram buckets: latency in seconds and response size in bytes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+# The filter controls, in the order of the `store_data` arguments
+FILTER_CONTROLS = ['continent-dropdown', 'subregion-dropdown', 'country-dropdown',
+                   'year-slider', 'month-dropdown', 'disaster-type-checkbox']
+
+request_logger = logging.getLogger('dashboard.callbacks')
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values, in the Prometheus sense.
+
+    Parameters:
+    - buckets (tuple): Sorted upper bounds of the buckets, without +Inf.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is the +Inf bucket
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self, name, labels):
+        """
+        Render the histogram in the Prometheus text format.
+
+        Parameters:
+        - name (str): Metric name.
+        - labels (str): Labels of the series, e.g. 'callback="damage-map"'.
+
+        Returns:
+        - list: The lines of the bucket, sum and count series.
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class CallbackMetrics:
+    """
+    Thread-safe per-callback metrics: latency and response size histograms, error
+    counts and number of requests in progress.
+    """
+
+    def __init__(self):
+        self.latency = {}
+        self.size = {}
+        self.errors = {}
+        self.in_progress = {}
+        self.max_in_progress = 0
+        self.gauges = []
+        self._lock = threading.Lock()
+
+    def start(self, callback):
+        """
+        Record the start of a callback request.
+        """
+        with self._lock:
+            self.in_progress[callback] = self.in_progress.get(callback, 0) + 1
+            self.max_in_progress = max(self.max_in_progress, sum(self.in_progress.values()))
+
+    def finish(self, callback, seconds, size, error):
+        """
+        Record the end of a callback request.
+
+        Parameters:
+        - callback (str): The callback label.
+        - seconds (float): Latency of the request.
+        - size (int): Size of the response body as sent, in bytes.
+        - error (bool): Whether the request failed.
+        """
+        with self._lock:
+            self.in_progress[callback] -= 1
+            if callback not in self.latency:
+                self.latency[callback] = Histogram(LATENCY_BUCKETS)
+                self.size[callback] = Histogram(SIZE_BUCKETS)
+                self.errors[callback] = 0
+            self.latency[callback].observe(seconds)
+            self.size[callback].observe(size)
+            self.errors[callback] += error
+
+    def gauge(self, name, description, func):
+        """
+        Expose the value returned by `func` (e.g. cache hits) as a gauge on `/metrics`.
+        """
+        self.gauges.append((name, description, func))
+
+    def render(self):
+        """
+        Render all the metrics in the Prometheus text format.
+
+        Returns:
+        - str: The `/metrics` response body.
+        """
+        with self._lock:
+            lines = ['# HELP dashboard_callback_latency_seconds Latency of the dash callback requests.',
+                     '# TYPE dashboard_callback_latency_seconds histogram']
+            for callback, histogram in sorted(self.latency.items()):
+                lines += histogram.render('dashboard_callback_latency_seconds', f'callback="{callback}"')
+
+            lines += ['# HELP dashboard_callback_response_bytes Size of the dash callback responses as sent (compressed).',
+                      '# TYPE dashboard_callback_response_bytes histogram']
+            for callback, histogram in sorted(self.size.items()):
+                lines += histogram.render('dashboard_callback_response_bytes', f'callback="{callback}"')
+
+            lines += ['# HELP dashboard_callback_errors_total Failed dash callback requests.',
+                      '# TYPE dashboard_callback_errors_total counter']
+            lines += [f'dashboard_callback_errors_total{{callback="{callback}"}} {count}'
+                      for callback, count in sorted(self.errors.items())]
+
+            lines += ['# HELP dashboard_callback_in_progress Dash callback requests in progress.',
+                      '# TYPE dashboard_callback_in_progress gauge']
+            lines += [f'dashboard_callback_in_progress{{callback="{callback}"}} {count}'
+                      for callback, count in sorted(self.in_progress.items())]
+            lines += ['# HELP dashboard_callback_max_in_progress Highest number of concurrent dash callback requests.',
+                      '# TYPE dashboard_callback_max_in_progress gauge',
+                      f'dashboard_callback_max_in_progress {self.max_in_progress}']
+
+        for name, description, func in self.gauges:
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} gauge', f'{name} {func()}']
+        return '\n'.join(lines) + '\n'
+
+
+def callback_label(body):
+    """
+    Label a dash callback request by its output ids.
+
+    Parameters:
+    - body (dict): The JSON body of a `_dash-update-component` request.
+
+    Returns:
+    - str: The output component ids, comma-separated.
+    """
+    outputs = body.get('outputs')
+    outputs = outputs if isinstance(outputs, list) else [outputs]
+    return ','.join(str(output.get('id')) for output in outputs if output)
+
+
+def callback_filters(body):
+    """
+    Get the normalized filter state of a dash callback request, if it has one.
+
+    Parameters:
+    - body (dict): The JSON body of a `_dash-update-component` request.
+
+    Returns:
+    - dict or None: The filter state, from `store-data` or from the filter controls.
+    """
+    values = {item.get('id'): item.get('value') for item in body.get('inputs', []) if isinstance(item, dict)}
+    if isinstance(values.get('store-data'), dict):
+        return values['store-data'].get('filters')
+    if all(control in values for control in FILTER_CONTROLS):
+        return normalize_filters(*(values[control] for control in FILTER_CONTROLS))
+    return None
+
+
+def json_body():
+    """
+    Get the JSON object sent in the body of the current request.
+
+    Returns:
+    - dict: The decoded body, or an empty dict if it isn't a JSON object.
+    """
+    body = flask.request.get_json(silent=True)
+    return body if isinstance(body, dict) else {}
+
+
+def instrument(server, metrics, log_requests=True):
+    """
+    Measure the dash callback requests of a Flask server and add the `/metrics` route.
+
+    Parameters:
+    - server (flask.Flask): The dash app server.
+    - metrics (CallbackMetrics): Where the measures are recorded.
+    - log_requests (bool): Also log one JSON line per callback request on the
+      'dashboard.callbacks' logger.
+    """
+    if log_requests and not request_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        request_logger.addHandler(handler)
+        request_logger.setLevel(logging.INFO)
+        request_logger.propagate = False
+
+    @server.before_request
+    def start_timer():
+        if flask.request.path.endswith('/_dash-update-component'):
+            flask.g.callback = callback_label(json_body())
+            flask.g.callback_start = time.perf_counter()
+            metrics.start(flask.g.callback)
+
+    def record(response):
+        callback = flask.g.pop('callback', None)
+        if callback is None:
+            return response
+        seconds = time.perf_counter() - flask.g.pop('callback_start')
+        size = response.calculate_content_length() or 0
+        error = response.status_code >= 400
+        metrics.finish(callback, seconds, size, error)
+
+        if log_requests:
+            try:
+                filters = callback_filters(json_body())
+            except (TypeError, ValueError):
+                filters = None  # Filter values the app doesn't accept either (e.g. a scalar year)
+            request_logger.info(json.dumps({
+                'event': 'callback',
+                'callback': callback,
+                'status': response.status_code,
+                'ms': round(seconds * 1000, 2),
+                'bytes': size,
+                'filters': filters,
+            }))
+        return response
+
+    # Flask runs the `after_request` hooks in reverse order of registration: put this one first,
+    # so it runs last and measures the response as sent, after compression (see serving.py)
+    server.after_request_funcs.setdefault(None, []).insert(0, record)
+
+    @server.teardown_request
+    def release(exception):
+        # Unhandled exceptions skip `after_request`, count them as errors here
+        callback = flask.g.pop('callback', None)
+        if callback is not None:
+            seconds = time.perf_counter() - flask.g.pop('callback_start')
+            metrics.finish(callback, seconds, 0, True)
+
+    @server.route('/metrics')
+    def prometheus_metrics():
+        return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
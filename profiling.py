@@ -0,0 +1,216 @@
+# The file includes the optional profiler of the dash app callback requests.
+# It wraps the WSGI app, so a profile covers the whole request: callback, figure building
+# and JSON serialization. Each profiled request writes, in the profile directory:
+# - <name>.prof: the cProfile statistics (open with `python -m pstats` or snakeviz),
+# - <name>.txt: the 30 most expensive functions by cumulative time,
+# - <name>.collapsed: the request thread sampled every millisecond, as collapsed stacks
+#   (one "frame;frame;frame count" line per stack, for flamegraph.pl or speedscope).
+# Timings are inflated by the profiler, compare profiles with each other, not with /metrics.
+#
+# Usage: sign a request to profile it when a secret is set
+#   python profiling.py sign  ->  X-Dashboard-Profile: <value> (or cookie dashboard_profile=<value>)
+import cProfile
+import collections
+import hashlib
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+
+from monitoring import callback_label
+
+# Header (or cookie) carrying the signature of a request to profile
+PROFILE_HEADER = 'HTTP_X_DASHBOARD_PROFILE'
+PROFILE_COOKIE = 'dashboard_profile'
+
+# Signatures are valid for this many seconds
+SIGNATURE_TTL = 300
+
+
+def sign(secret, timestamp=None):
+    """
+    Sign a profiling request.
+
+    Parameters:
+    - secret (str): The profiling secret.
+    - timestamp (int): Signature time, now by default.
+
+    Returns:
+    - str: The header or cookie value, '<timestamp>.<hmac-sha256 hex digest>'.
+    """
+    timestamp = str(int(time.time() if timestamp is None else timestamp))
+    digest = hmac.new(secret.encode(), timestamp.encode(), hashlib.sha256).hexdigest()
+    return f"{timestamp}.{digest}"
+
+
+def verify(secret, value, now=None):
+    """
+    Check a profiling signature made by `sign`.
+
+    Returns:
+    - bool: True if the signature matches and isn't expired.
+    """
+    timestamp, _, _ = (value or '').partition('.')
+    if not timestamp.isdigit():
+        return False
+    now = time.time() if now is None else now
+    if abs(now - int(timestamp)) > SIGNATURE_TTL:
+        return False
+    # Compared as bytes: `compare_digest` refuses str with non-ASCII characters, which anyone can send
+    return hmac.compare_digest(sign(secret, int(timestamp)).encode(), value.encode('utf-8', 'surrogatepass'))
+
+
+class StackSampler:
+    """
+    Sample the stack of one thread at a fixed interval, from a background thread.
+
+    Parameters:
+    - thread_id (int): Identifier of the sampled thread.
+    - interval (float): Seconds between two samples.
+    - root (code): Code object of the outermost frame kept in the stacks, the frames
+      calling it (e.g. the WSGI server) are left out. None to keep whole stacks.
+    """
+
+    def __init__(self, thread_id, interval=0.001, root=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root = root
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = None if code is self.root else frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        """
+        Return the samples as collapsed stacks, one 'frame;frame count' line per stack.
+        """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilerMiddleware:
+    """
+    WSGI middleware profiling the dash callback requests.
+
+    Only one request is profiled at a time, concurrent requests run normally. With a
+    secret, only requests signed with `sign` are profiled, so it can stay enabled on a
+    production instance. Without one, a random sample of the callback requests is.
+
+    Parameters:
+    - app (callable): The WSGI app, e.g. `server.wsgi_app`.
+    - profile_dir (str): Directory of the profile files.
+    - secret (str): Profiling secret, or None to profile a sample of the callback requests.
+    - sample_rate (float): Fraction of the callback requests profiled without a secret
+      (1 for every request, e.g. locally).
+    - max_profiles (int): Number of profiled requests kept in the directory, the oldest are deleted.
+    """
+
+    def __init__(self, app, profile_dir, secret=None, sample_rate=0.01, max_profiles=100):
+        self.app = app
+        self.profile_dir = profile_dir
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(profile_dir, exist_ok=True)
+
+    def _requested(self, environ):
+        if not environ.get('PATH_INFO', '').endswith('/_dash-update-component'):
+            return False
+        if self.secret is None:
+            return random.random() < self.sample_rate
+        value = environ.get(PROFILE_HEADER)
+        if value is None:
+            match = re.search(rf'(?:^|;\s*){PROFILE_COOKIE}=([^;]+)', environ.get('HTTP_COOKIE', ''))
+            value = match.group(1) if match else None
+        return verify(self.secret, value)
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ) or not self._lock.acquire(blocking=False):
+            return self.app(environ, start_response)
+        try:
+            # Buffer the body to label the profile with the callback outputs. Without a length
+            # (chunked request), the server marks the input it ends itself: read it to the end.
+            if environ.get('CONTENT_LENGTH'):
+                body = environ['wsgi.input'].read(int(environ['CONTENT_LENGTH']))
+            elif environ.get('wsgi.input_terminated'):
+                body = environ['wsgi.input'].read()
+            else:
+                body = b''
+            environ['wsgi.input'] = io.BytesIO(body)
+            environ['CONTENT_LENGTH'] = str(len(body))
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            label = callback_label(payload) if isinstance(payload, dict) else 'unknown'
+
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            with StackSampler(threading.get_ident(), root=ProfilerMiddleware.__call__.__code__) as sampler:
+                profiler.enable()
+                try:
+                    # Consume the response inside the profile, serialization included
+                    iterable = self.app(environ, start_response)
+                    try:
+                        response = b''.join(iterable)
+                    finally:
+                        if hasattr(iterable, 'close'):
+                            iterable.close()
+                finally:
+                    profiler.disable()
+            self._write(label, time.perf_counter() - start, profiler, sampler)
+            return [response]
+        finally:
+            self._lock.release()
+
+    def _write(self, label, seconds, profiler, sampler):
+        # File names sort by time and tell the callback and the profiled duration
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', label)[:60].strip('-')
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now % 1 * 1e6):06d}"
+        name = os.path.join(self.profile_dir, f"{stamp}-{slug}-{seconds * 1000:.0f}ms")
+
+        profiler.dump_stats(f"{name}.prof")
+        with open(f"{name}.txt", 'w') as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats('cumulative').print_stats(30)
+        with open(f"{name}.collapsed", 'w') as f:
+            f.write(sampler.collapsed())
+
+        # Keep the newest profiles only
+        profiles = sorted(p for p in os.listdir(self.profile_dir) if p.endswith('.prof'))
+        for old in profiles[:-self.max_profiles]:
+            for extension in ('.prof', '.txt', '.collapsed'):
+                path = os.path.join(self.profile_dir, old[:-len('.prof')] + extension)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] != ['sign'] or not os.environ.get('DASHBOARD_PROFILE_SECRET'):
+        sys.exit('Usage: DASHBOARD_PROFILE_SECRET=<secret> python profiling.py sign')
+    print(f"X-Dashboard-Profile: {sign(os.environ['DASHBOARD_PROFILE_SECRET'])}")
@@ -0,0 +1,240 @@
+# The file includes the compression and the cache headers of the dash app responses.
+# - Compression: responses of a text type (callback JSON, layout, HTML, CSS, JS, topojson) over
+#   MINIMUM_SIZE bytes are sent with brotli, when the `brotli` package is installed, or gzip,
+#   following the Accept-Encoding header of the browser. Callback responses are compressed on
+#   the fly; files (assets, component suites, topojson) are compressed once and kept in memory.
+#   Streamed responses (e.g. downloads) are left as they are. A strong ETag gets the encoding as
+#   a suffix ('<etag>-gzip'), as the compressed bytes differ from the uncompressed ones.
+# - Cache headers: assets requested with a version in their URL can be kept a year by browsers,
+#   without revalidation. Dash versions the CSS and JS tags of the assets folder itself (`?m=`
+#   with the modification time of the file), `asset_url` versions other assets (`?v=` with a hash
+#   of their content). Either must match the current file. The other asset requests are
+#   revalidated with their ETag.
+import functools
+import gzip
+import os
+
+import flask
+
+from caching import LRUCache
+from data_layer import file_digest
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, responses are gzipped
+    brotli = None
+
+# Encodings, in order of preference
+ENCODINGS = ['br', 'gzip']
+
+# Smaller responses aren't worth compressing, the encoding overhead eats the gain
+MINIMUM_SIZE = 500
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'text/javascript', 'text/css',
+    'text/html', 'text/plain', 'text/csv', 'image/svg+xml',
+}
+
+# Callback responses are compressed on every request, files only once: they get the slower,
+# stronger settings
+GZIP_LEVELS = {'dynamic': 6, 'file': 9}
+BROTLI_QUALITIES = {'dynamic': 5, 'file': 9}
+
+# Cache-Control max-age of versioned assets (1 year)
+VERSIONED_MAX_AGE = 365 * 24 * 3600
+
+# Compressed files, by request path, ETag and encoding
+compressed_files = LRUCache(max_items=64, max_bytes=32 * 1024 * 1024, sizeof=len)
+
+
+def compress(data, encoding, kind='dynamic'):
+    """
+    Compress a response body.
+
+    Parameters:
+    - data (bytes): The response body.
+    - encoding (str): 'br' or 'gzip'.
+    - kind (str): 'dynamic' for a response built by the request, 'file' for a file
+      compressed once and cached.
+
+    Returns:
+    - bytes: The compressed body.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITIES[kind])
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(data, compresslevel=GZIP_LEVELS[kind], mtime=0)
+
+
+def is_file_response(response):
+    # Files have an ETag or a max-age (fingerprinted component suites), callback responses neither
+    return response.get_etag()[0] is not None or bool(response.cache_control.max_age)
+
+
+def encoded_etag(etag, encoding):
+    """
+    ETag of a response body compressed with an encoding.
+
+    Parameters:
+    - etag (str): The strong ETag of the uncompressed body.
+    - encoding (str): 'br' or 'gzip'.
+
+    Returns:
+    - str: The ETag with the encoding as a suffix, e.g. 'abc-gzip'.
+    """
+    return f"{etag}-{encoding}"
+
+
+def revalidated_etag(etag):
+    """
+    Find the ETag a conditional request revalidates, in any encoding (If-None-Match header).
+
+    Routes call it before building a response, to answer 304 without building it.
+
+    Parameters:
+    - etag (str): The strong ETag of the uncompressed response body.
+
+    Returns:
+    - str: The matching ETag (uncompressed or with an encoding suffix), None when the
+      request has no matching ETag.
+    """
+    if_none_match = flask.request.if_none_match
+    for tag in [etag] + [encoded_etag(etag, encoding) for encoding in ENCODINGS]:
+        if if_none_match.contains_weak(tag):
+            return tag
+    return None
+
+
+def compress_response(response, minimum_size=MINIMUM_SIZE):
+    """
+    Compress a response if it's worth it and the browser accepts it (Flask `after_request` hook).
+
+    Parameters:
+    - response (flask.Response): The response to send.
+    - minimum_size (int): Size under which the response is sent as it is, in bytes.
+
+    Returns:
+    - flask.Response: The same response, compressed or not.
+    """
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    # The body depends on the Accept-Encoding of the request, shared caches must know it
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or (response.is_streamed and not response.direct_passthrough)):
+        return response
+
+    encoding = flask.request.accept_encodings.best_match(ENCODINGS if brotli is not None else ENCODINGS[1:])
+    if encoding is None:
+        return response
+
+    # Files sent by `send_file` are read here
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < minimum_size:
+        return response
+
+    etag, weak = response.get_etag()
+    if is_file_response(response):
+        key = (flask.request.full_path, etag, encoding)
+        body = compressed_files.get(key)
+        if body is None:
+            body = compress(data, encoding, 'file')
+            compressed_files.put(key, body)
+    else:
+        body = compress(data, encoding)
+    if len(body) >= len(data):
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    # Byte ranges would refer to the compressed body
+    response.headers.pop('Accept-Ranges', None)
+    if etag is not None:
+        # A strong ETag identifies the exact bytes sent, so each encoding gets its own
+        response.set_etag(etag if weak else encoded_etag(etag, encoding), weak=weak)
+        # Browsers revalidate with the ETag of the encoding, which the routes (e.g. the
+        # component suites of dash) don't know: answer them here
+        response.make_conditional(flask.request)
+    return response
+
+
+def enable_compression(server, minimum_size=MINIMUM_SIZE):
+    """
+    Compress the responses of the Flask server.
+
+    Parameters:
+    - server (flask.Flask): The server of the dash app.
+    - minimum_size (int): Size under which responses are sent as they are, in bytes.
+    """
+    server.after_request(functools.partial(compress_response, minimum_size=minimum_size))
+
+
+@functools.lru_cache(maxsize=256)
+def _file_version(path, mtime_ns, size):
+    return file_digest(path).decode()[:12]
+
+
+def asset_version(app, path):
+    """
+    Identify the content of an asset, to version its URL.
+
+    Parameters:
+    - app (dash.Dash): The dash app.
+    - path (str): Path of the asset in the assets folder, e.g. 'images/logo.png'.
+
+    Returns:
+    - str: The first 12 characters of the SHA-256 digest of the file (cached until it changes).
+    """
+    file_path = os.path.join(app.config.assets_folder, path)
+    stat = os.stat(file_path)
+    return _file_version(file_path, stat.st_mtime_ns, stat.st_size)
+
+
+def asset_url(app, path):
+    """
+    URL of an asset, versioned by its content so browsers can keep it for a year.
+
+    Parameters:
+    - app (dash.Dash): The dash app.
+    - path (str): Path of the asset in the assets folder, e.g. 'images/logo.png'.
+
+    Returns:
+    - str: The asset URL with a `v` query parameter.
+    """
+    return f"{app.get_asset_url(path)}?v={asset_version(app, path)}"
+
+
+def cache_assets(app):
+    """
+    Let browsers keep the assets requested with a version in their URL for a year.
+
+    Parameters:
+    - app (dash.Dash): The dash app.
+    """
+    def cache_versioned_asset(response):
+        request = flask.request
+        if not request.endpoint or not request.endpoint.endswith('_dash_assets.static'):
+            return response
+        if response.status_code not in (200, 304):
+            return response
+        # A stale `v` or `m` (an older URL, or any value) gets the current file, which mustn't be
+        # cached as that version
+        filename = request.view_args['filename']
+        try:
+            if 'v' in request.args:
+                versioned = request.args['v'] == asset_version(app, filename)
+            else:
+                # Dash writes the modification time as a float, or an int for other resources
+                mtime = os.stat(os.path.join(app.config.assets_folder, filename)).st_mtime
+                versioned = request.args.get('m') in (str(mtime), str(int(mtime)))
+        except OSError:
+            versioned = False
+        if versioned:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = VERSIONED_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    app.server.after_request(cache_versioned_asset)
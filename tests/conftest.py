@@ -0,0 +1,8 @@
+# Shared setup of the tests: they import the app modules from the repository root, which is also
+# the working directory the app expects (the dataset and the assets are found by relative paths).
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
@@ -0,0 +1,51 @@
+# The aggregate API (api.py): the records of each aggregate keep the same types whatever the
+# filters, and a poller sending back the ETag gets a 304 until the dataset changes.
+import pytest
+
+import api
+import dash_app
+
+URL = f'/api/{api.API_VERSION}/aggregates'
+
+# Fiji had no drought in February 2001
+EMPTY_QUERY = '?country=Fiji&year=2001&year=2001&month=2&type=Drought'
+
+
+@pytest.fixture
+def client():
+    return dash_app.server.test_client()
+
+
+@pytest.mark.parametrize('name', list(api.AGGREGATES))
+def test_aggregate(client, name):
+    response = client.get(f'{URL}/{name}?continent=Asia&year=2010&year=2020')
+    assert response.status_code == 200
+    assert response.get_json()['version'] == dash_app.registry.current().version
+
+    revalidated = client.get(f'{URL}/{name}?continent=Asia&year=2010&year=2020',
+                             headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_empty_selection_totals(client):
+    totals = client.get(f'{URL}/totals').get_json()['data']
+    empty = client.get(f'{URL}/totals{EMPTY_QUERY}').get_json()['data']
+    assert empty == {'count': 0, 'total_deaths': 0.0, 'total_affected': 0.0, 'total_damage': 0.0,
+                     'last_update': None}
+    # JSON keeps the difference between 0 and 0.0, clients may rely on it
+    assert {column: type(value) for column, value in empty.items() if value is not None} == \
+           {column: type(value) for column, value in totals.items() if column != 'last_update'}
+
+
+@pytest.mark.parametrize('name', ['countries', 'years-by-type', 'yearly-deaths'])
+def test_empty_selection_records(client, name):
+    assert client.get(f'{URL}/{name}{EMPTY_QUERY}').get_json()['data'] == []
+
+
+def test_unknown_aggregate(client):
+    assert client.get(f'{URL}/unknown').status_code == 404
+
+
+def test_invalid_filters(client):
+    assert client.get(f'{URL}/totals?year=recent').status_code == 400
@@ -0,0 +1,60 @@
+# Smoke test of DASHBOARD_BACKGROUND_CALLBACKS: the app is imported with the flag set in a fresh
+# interpreter (the mode is chosen at import), then a filter change runs a background job.
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Dependencies of the Dash diskcache manager (`dash[diskcache]`)
+for module in ('diskcache', 'multiprocess', 'psutil'):
+    pytest.importorskip(module)
+
+# Checks the registered callbacks, then sends a filter change to the background callback and
+# polls its job like the browser does, until the charts come back
+SMOKE_SCRIPT = """
+import json, time
+import dash_app
+
+client = dash_app.server.test_client()
+dependencies = client.get('/_dash-dependencies').get_json()
+background = [d['output'] for d in dependencies if d['output'] in dash_app.app.callback_map
+              and dash_app.app.callback_map[d['output']].get('background')]
+sync = [d['output'] for d in dependencies if 'store-data.data' in d['output']]
+
+dependency = next(d for d in dependencies if d['output'] in background)
+outputs = [dict(zip(('id', 'property'), output.rsplit('.', 1)))
+           for output in dependency['output'].strip('.').split('...')]
+store = dash_app.default_store(dash_app.dataset)
+body = {'output': dependency['output'], 'outputs': outputs, 'changedPropIds': ['store-data.data'],
+        'inputs': [{'id': 'store-data', 'property': 'data', 'value': store}]}
+job = client.post('/_dash-update-component', json=body).get_json()
+
+response = {}
+deadline = time.time() + 60
+while 'response' not in response and time.time() < deadline:
+    time.sleep(0.25)
+    response = client.post(f"/_dash-update-component?cacheKey={job['cacheKey']}&job={job['job']}",
+                           json=body).get_json()
+print(json.dumps({'background': background, 'sync': sync, 'job': sorted(job),
+                  'charts': sorted(response.get('response', {}))}))
+"""
+
+
+def test_background_callbacks(tmp_path):
+    env = {**os.environ, 'DASHBOARD_BACKGROUND_CALLBACKS': '1', 'DASHBOARD_JOBS_DIR': str(tmp_path)}
+    result = subprocess.run([sys.executable, '-c', SMOKE_SCRIPT], env=env, capture_output=True,
+                            text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    smoke = json.loads(result.stdout.splitlines()[-1])
+
+    # The maps and charts are built in one background callback, the store and cards stay synchronous
+    assert len(smoke['background']) == 1
+    for chart in ('damage-map', 'disaster-count-map', 'stacked-bar-chart', 'casualty-trend'):
+        assert f'{chart}.figure' in smoke['background'][0]
+    assert len(smoke['sync']) == 1 and smoke['sync'][0] not in smoke['background']
+
+    # The filter change started a job, whose result holds the four charts
+    assert smoke['job'] == ['cacheKey', 'job']
+    assert smoke['charts'] == ['casualty-trend', 'damage-map', 'disaster-count-map', 'stacked-bar-chart']
@@ -0,0 +1,62 @@
+# The clientside ports of `format_value` and `generate_header` (assets/clientside.js) must give
+# the same output as utils.py: the card headers and chart tooltips are built in the browser.
+# The ports run under node, the tests are skipped without it.
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from utils import format_value, generate_header
+
+# Runs assets/clientside.js with a stub `window`, then calls `dash_clientside.utils[name]` with
+# each list of arguments read from stdin
+NODE_SCRIPT = """
+const fs = require('fs');
+const vm = require('vm');
+const context = {window: {}};
+vm.runInNewContext(fs.readFileSync('assets/clientside.js', 'utf8'), context);
+const calls = JSON.parse(fs.readFileSync(0, 'utf8'));
+const utils = context.window.dash_clientside.utils;
+process.stdout.write(JSON.stringify(calls.map(([name, args]) => utils[name](...args))));
+"""
+
+FORMAT_VALUE_CASES = [
+    None, 0, 1, 0.4, 0.5, 1.5, 2.5, 3.5, 999, 999.4, 999.5,
+    # Thousands: boundaries and ties of the first decimal
+    1_000, 1_049, 1_050, 1_150, 1_250, 2_250, 9_950, 999_949, 999_950, 999_999,
+    # Millions
+    1_000_000, 1_050_000, 1_250_000, 2_350_000, 999_949_999, 999_999_999,
+    # Billions
+    1_000_000_000, 1_050_000_000, 1_250_000_000, 4_521_139_407, 2_500_000_000_000,
+    # Negative values stay below every threshold
+    -1, -0.5, -1_500, -2_500_000,
+]
+
+HEADER_CASES = [
+    (disasters, year, month)
+    for disasters in [[], ['Flood'], ['Flood', 'Storm'], ['Drought', 'Flood', 'Storm'],
+                      ['Drought', 'Earthquake', 'Flood', 'Storm', 'Wildfire']]
+    for year in [[2000, 2024], [2010, 2010], 2015, None]
+    for month in [None, [], [3], [3, 7], [1, 2, 3], [1, 5, 9, 12], 5]
+]
+
+
+def run_clientside(calls):
+    result = subprocess.run(['node', '-e', NODE_SCRIPT], input=json.dumps(calls),
+                            capture_output=True, text=True, check=True, timeout=60)
+    return json.loads(result.stdout)
+
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+
+
+def test_format_value_parity():
+    expected = [format_value(value) for value in FORMAT_VALUE_CASES]
+    assert run_clientside([['format_value', [value]] for value in FORMAT_VALUE_CASES]) == expected
+
+
+def test_generate_header_parity():
+    expected = [generate_header('Total number of ', *case) for case in HEADER_CASES]
+    calls = [['generate_header', ['Total number of ', *case]] for case in HEADER_CASES]
+    assert run_clientside(calls) == expected
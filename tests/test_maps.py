@@ -0,0 +1,52 @@
+# Each country must be drawn once on the choropleth maps: a country in several traces (bins)
+# is drawn in the color of the last one and counted twice in the legend.
+import copy
+
+import pytest
+
+import dash_app
+
+FILTER_STATES = {
+    'default view': dict(selected_year=[2000, 2024]),
+    'all years': dict(),
+    'Asia, floods': dict(selected_continent=['Asia'], selected_disaster_type=['Flood']),
+    'one country and month': dict(selected_country=['Fiji'], selected_year=[2001, 2010], selected_month=[2]),
+    'several regions and types': dict(selected_continent=['Africa', 'Europe'], selected_year=[2010, 2015],
+                                      selected_disaster_type=['Drought', 'Storm', 'Wildfire']),
+    'no events': dict(selected_country=['Fiji'], selected_year=[2001, 2001], selected_month=[2],
+                      selected_disaster_type=['Drought']),
+}
+
+
+def apply_patch(figure, patch):
+    # The figure the browser gets: the base figure with the assignments of the patch
+    figure = copy.deepcopy(figure)
+    for operation in patch.to_plotly_json()['operations']:
+        assert operation['operation'] == 'Assign'
+        *path, prop = operation['location']
+        target = figure
+        for key in path:
+            target = target[key]
+        target[prop] = operation['params']['value']
+    return figure
+
+
+@pytest.mark.parametrize('build_map, template_index', [
+    (dash_app.build_damage_map, 0),
+    (dash_app.build_disaster_count_map, 1),
+])
+@pytest.mark.parametrize('filters', FILTER_STATES.values(), ids=FILTER_STATES.keys())
+def test_each_country_drawn_once(build_map, template_index, filters):
+    defaults = dict(selected_disaster_type=list(dash_app.dataset.disaster_types))
+    store = dash_app.store_data(**dict(defaults, **filters))
+    by_country = dash_app.dataset.aggregate(dash_app.get_filters(dash_app.dataset, store), ['country'])
+
+    template = dash_app.get_map_templates()[template_index].to_dict()
+    figure = apply_patch(template, build_map(by_country))
+
+    # Placeholder rows (no location) only keep the empty bins in the legend
+    locations = [location for trace in figure['data']
+                 for location in trace.get('locations') or [] if location is not None]
+    assert len(locations) == len(set(locations))
+    assert len(locations) <= len(by_country)
+    assert set(locations) <= set(by_country['iso'])
@@ -0,0 +1,61 @@
+# The instrumentation hooks (monitoring.py) must record every callback request and never turn
+# one into an error, whatever the body: they run on a bare Flask app with a stub callback route.
+import json
+import logging
+
+import flask
+import pytest
+
+from monitoring import FILTER_CONTROLS, CallbackMetrics, instrument
+
+
+class RecordList(logging.Handler):
+    # Keeps the records of the callback logger, which doesn't propagate to the root logger
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def client():
+    server = flask.Flask(__name__)
+    server.add_url_rule('/_dash-update-component', 'update', lambda: '{}', methods=['POST'])
+    instrument(server, CallbackMetrics())
+    return server.test_client()
+
+
+@pytest.fixture
+def logged(client):
+    # After `instrument`, which sets the logger up
+    handler = RecordList()
+    logging.getLogger('dashboard.callbacks').addHandler(handler)
+    yield handler.records
+    logging.getLogger('dashboard.callbacks').removeHandler(handler)
+
+
+def filter_inputs(**values):
+    return [{'id': control, 'property': 'value', 'value': values.get(control)} for control in FILTER_CONTROLS]
+
+
+def test_logs_normalized_filters(client, logged):
+    body = {'outputs': {'id': 'store-data', 'property': 'data'},
+            'inputs': filter_inputs(**{'year-slider': [2000, 2024], 'month-dropdown': [7, 3, 7]})}
+    assert client.post('/_dash-update-component', json=body).status_code == 200
+    [record] = logged
+    assert record['callback'] == 'store-data'
+    assert record['filters']['year'] == [2000, 2024]
+    assert record['filters']['month'] == [3, 7]
+
+
+@pytest.mark.parametrize('body', [
+    {'outputs': {'id': 'store-data', 'property': 'data'}, 'inputs': filter_inputs(**{'year-slider': 2010})},
+    {'outputs': {'id': 'store-data', 'property': 'data'}, 'inputs': filter_inputs(**{'month-dropdown': ['x']})},
+    [{'id': 'store-data'}],
+])
+def test_unexpected_bodies_are_logged_without_filters(client, logged, body):
+    assert client.post('/_dash-update-component', json=body).status_code == 200
+    [record] = logged
+    assert record['filters'] is None
@@ -0,0 +1,92 @@
+# The profiler (profiling.py) must only profile the requests it is asked to, and must hand every
+# request to the app unchanged, whatever its signature or body. It wraps a stub WSGI app here.
+import io
+import json
+import os
+
+import pytest
+
+from profiling import PROFILE_HEADER, ProfilerMiddleware, sign, verify
+
+SECRET = 'secret'
+BODY = json.dumps({'outputs': {'id': 'damage-map', 'property': 'figure'}}).encode()
+
+
+class EchoApp:
+    # Answers with the request body, and remembers whether its response was closed
+    def __init__(self):
+        self.closed = False
+
+    def __call__(self, environ, start_response):
+        self.body = environ['wsgi.input'].read()
+        start_response('200 OK', [('Content-Type', 'application/json')])
+        return self
+
+    def __iter__(self):
+        yield self.body
+
+    def close(self):
+        self.closed = True
+
+
+def callback_environ(body=BODY, chunked=False, **headers):
+    environ = {'PATH_INFO': '/_dash-update-component', 'REQUEST_METHOD': 'POST',
+               'wsgi.input': io.BytesIO(body), **headers}
+    if chunked:
+        environ['wsgi.input_terminated'] = True
+    else:
+        environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def call(middleware, environ):
+    return b''.join(middleware(environ, lambda status, headers: None))
+
+
+def profiles(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith('.prof'))
+
+
+def test_verify():
+    assert verify(SECRET, sign(SECRET, 1_000), now=1_000)
+    assert not verify(SECRET, sign(SECRET, 1_000), now=10_000)
+    assert not verify('other', sign(SECRET, 1_000), now=1_000)
+    assert not verify(SECRET, None)
+
+
+@pytest.mark.parametrize('value', ['1000.é', '1000.\udcff', f"1000.{'é' * 64}"])
+def test_verify_non_ascii(value):
+    assert not verify(SECRET, value, now=1_000)
+
+
+def test_signed_requests_only(tmp_path):
+    middleware = ProfilerMiddleware(EchoApp(), str(tmp_path), secret=SECRET)
+    assert call(middleware, callback_environ(**{PROFILE_HEADER: 'é'})) == BODY
+    assert profiles(tmp_path) == []
+    assert call(middleware, callback_environ(**{PROFILE_HEADER: sign(SECRET)})) == BODY
+    assert len(profiles(tmp_path)) == 1
+
+
+@pytest.mark.parametrize('sample_rate, expected', [(0, 0), (1, 1)])
+def test_sample_rate(tmp_path, sample_rate, expected):
+    middleware = ProfilerMiddleware(EchoApp(), str(tmp_path), sample_rate=sample_rate)
+    call(middleware, callback_environ())
+    assert len(profiles(tmp_path)) == expected
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_profiled_request(tmp_path, chunked):
+    app = EchoApp()
+    middleware = ProfilerMiddleware(app, str(tmp_path), sample_rate=1)
+    assert call(middleware, callback_environ(chunked=chunked)) == BODY
+    assert app.closed
+    [profile] = profiles(tmp_path)
+    assert '-damage-map-' in profile
+
+
+@pytest.mark.parametrize('body', [b'[{"id": "damage-map"}]', b'"outputs"', b'not json'])
+def test_unexpected_body(tmp_path, body):
+    middleware = ProfilerMiddleware(EchoApp(), str(tmp_path), sample_rate=1)
+    assert call(middleware, callback_environ(body)) == body
+    [profile] = profiles(tmp_path)
+    assert '-unknown-' in profile
@@ -0,0 +1,34 @@
+# Browsers keep an asset for a year only when its URL carries the version of the current file
+# (serving.py): any other `m` or `v` value must be revalidated, or a stale URL would pin it.
+import os
+import re
+
+import pytest
+
+import dash_app
+from serving import asset_version
+
+ASSET = 'clientside.js'
+
+
+def cache_control(query):
+    return dash_app.server.test_client().get(f'/assets/{ASSET}{query}').headers['Cache-Control']
+
+
+def test_layout_assets_are_immutable():
+    html = dash_app.server.test_client().get('/').get_data(as_text=True)
+    urls = re.findall(r'/assets/[^"]+\?m=[^"]+', html)
+    assert urls
+    for url in urls:
+        assert 'immutable' in dash_app.server.test_client().get(url).headers['Cache-Control']
+
+
+def test_current_versions_are_immutable():
+    mtime = os.stat(os.path.join(dash_app.app.config.assets_folder, ASSET)).st_mtime
+    for query in [f'?m={mtime}', f'?m={int(mtime)}', f'?v={asset_version(dash_app.app, ASSET)}']:
+        assert 'immutable' in cache_control(query)
+
+
+@pytest.mark.parametrize('query', ['', '?m=1', '?m=', '?m=%C3%A9', '?v=0123456789ab'])
+def test_other_versions_are_revalidated(query):
+    assert cache_control(query) == 'no-cache'
@@ -0,0 +1,28 @@
+# Startup of the dash app: `import dash_app` in a fresh interpreter (`-X importtime`, see
+# benchmarks/import_time.py) must not load the modules that are only needed on first use.
+# The time budget depends on the machine and its load, it is only checked with
+# DASHBOARD_TEST_IMPORT_BUDGET=1 (e.g. on a quiet CI runner); benchmarks/import_time.py checks it too.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+from import_time import DEFAULT_BUDGET, DEFAULT_LAZY_MODULES, import_report
+
+
+def test_lazy_modules():
+    imported = {name for name, _, _, _ in import_report()}
+    assert not imported & set(DEFAULT_LAZY_MODULES)
+
+
+@pytest.mark.skipif(os.environ.get('DASHBOARD_TEST_IMPORT_BUDGET', '') in ('', '0'),
+                    reason='set DASHBOARD_TEST_IMPORT_BUDGET=1 to check the import time budget')
+def test_import_time_budget():
+    # The fastest of a few imports, the first one also warms the OS file cache
+    totals = []
+    for _ in range(3):
+        totals.append(import_report()[-1][3])
+        if totals[-1] <= DEFAULT_BUDGET:
+            break
+    assert min(totals) <= DEFAULT_BUDGET, f"import dash_app takes {min(totals):.2f} s"
@@ -1,6 +1,8 @@
 # The file includes function(s) that help to run the dash app.
 # They help manipulate data and reduce repeating codes.
 import dash_bootstrap_components as dbc
+import numpy as np
+import pandas as pd
 from dash import dcc, html
 
 def generate_header(header_text, selected_disasters, selected_year, selected_month):
@@ -89,6 +91,134 @@ def format_value(value):
         return f"{value / 1_000_000:.1f}M"  # Millions
     else:
         return f"{value / 1_000_000_000:.1f}B"  # Billions
+
+
+# Median of grouped values, as if each value was repeated once per event of its group
+def repeated_median(values, counts):
+    """
+    Compute the median of `values` where each value is repeated `counts` times.
+
+    This gives the same result as merging a per-country aggregate back onto the event rows
+    and taking the median over the events, without building the event-level table.
+
+    Parameters:
+    - values (array-like): The value of each group.
+    - counts (array-like): The number of events in each group.
+
+    Returns:
+    - float: The median, or NaN if there are no events.
+    """
+    values = np.asarray(values, dtype=float)
+    counts = np.asarray(counts)
+    if counts.sum() == 0:
+        return np.nan
+
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    cum_counts = np.cumsum(counts[order])
+    n = cum_counts[-1]
+
+    # Values at the two middle positions (the same one when n is odd)
+    lower = sorted_values[np.searchsorted(cum_counts, (n - 1) // 2, side='right')]
+    upper = sorted_values[np.searchsorted(cum_counts, n // 2, side='right')]
+    return (lower + upper) / 2
+
+
+# Totals and top countries of several metrics, for the stat cards
+def country_rankings(by_country, metrics, top_k=5):
+    """
+    Sum several per-country metrics and rank the countries on each, in a single pass.
+
+    The metric columns are taken as one (countries x metrics) array: a single sum gives
+    every total and a single sort every ranking. Ties keep the country order, so the
+    first country of a ranking is the one `idxmax` would return.
+
+    Parameters:
+    - by_country (pd.DataFrame): One row per country, with a 'country' column and the metric columns.
+    - metrics (list): The metric columns.
+    - top_k (int): Number of countries kept per ranking.
+
+    Returns:
+    - tuple: (totals, rankings). `totals` maps each metric to its sum, `rankings` maps each
+      metric to a list of up to `top_k` (country, value) pairs, highest value first
+      (empty when there are no countries).
+    """
+    # Stacked column by column: selecting the columns as a DataFrame first copies it
+    values = np.column_stack([by_country[metric].to_numpy(dtype=float) for metric in metrics])
+    countries = by_country['country'].to_numpy(dtype=object)
+    totals = values.sum(axis=0)
+    top = np.argsort(-values, axis=0, kind='stable')[:top_k]
+
+    rankings = {metric: [(countries[row], values[row, i]) for row in top[:, i]]
+                for i, metric in enumerate(metrics)}
+    return dict(zip(metrics, totals)), rankings
+
+
+# Choropleth bins, chosen from the median value: (median threshold, bin edges, labels).
+# The first option whose threshold is above the median is used, the last one otherwise.
+damage_bin_options = [
+    (1_000_000, [0, 1000, 10_000, 100_000, 1_000_000, float('inf')],
+     ['0 - 1K', '1K - 10K', '10K - 100K', '100K - 1M', '> 1M']),
+    (1_000_000_000, [0, 1_000_000, 10_000_000, 100_000_000, 1_000_000_000, float('inf')],
+     ['0 - 1M', '1M - 10M', '10M - 100M', '100M - 1B', '> 1B']),
+    (float('inf'), [0, 1_000_000_000, 10_000_000_000, 100_000_000_000, float('inf')],
+     ['0 - 1B', '1B - 10B', '10B - 100B', '> 100B']),
+]
+
+disaster_count_bin_options = [
+    (20, [0, 10, 20, 30, 40, float('inf')],
+     ['0 - 10', '10 - 20', '20 - 30', '30 - 40', '> 40']),
+    (50, [0, 15, 25, 50, 100, float('inf')],
+     ['0 - 15', '15 - 25', '25 - 50', '50 - 100', '> 100']),
+    (float('inf'), [0, 50, 100, 200, 300, float('inf')],
+     ['0 - 50', '50 - 100', '100 - 200', '200 - 300', '> 300']),
+]
+
+
+def bin_by_median(by_country, value_col, category_col, median, bin_options, inclusive=False, placeholder_value=0):
+    """
+    Categorize per-country values into bins chosen from the median, for the choropleth maps.
+
+    One placeholder row (without country) is added for each bin that has no country,
+    so every category always appears in the map legend.
+
+    Parameters:
+    - by_country (pd.DataFrame): One row per country with `country`, `iso` and `value_col` columns.
+    - value_col (str): The column holding the value to categorize.
+    - category_col (str): The name of the category column to add.
+    - median (float): The median used to choose the bins.
+    - bin_options (list): (threshold, bins, labels) options, see `damage_bin_options`.
+    - inclusive (bool): Whether a median equal to the threshold selects the option.
+    - placeholder_value (int): The value given to the placeholder rows.
+
+    Returns:
+    - tuple: The categorized frame sorted by category, and the list of category labels.
+    """
+    for threshold, bins, labels in bin_options:
+        if median < threshold or (inclusive and median == threshold):
+            break
+
+    map_data = by_country[['country', 'iso', value_col]].copy()
+    map_data[category_col] = pd.Categorical(
+        pd.cut(map_data[value_col], bins=bins, labels=labels, include_lowest=True),
+        categories=labels,
+        ordered=True
+    )
+
+    # Add a placeholder row for each category without country
+    existing_categories = set(map_data[category_col].dropna().unique())
+    missing_categories = [label for label in labels if label not in existing_categories]
+    if missing_categories:
+        missing_df = pd.DataFrame({
+            'country': [None] * len(missing_categories),
+            'iso': [None] * len(missing_categories),
+            value_col: [placeholder_value] * len(missing_categories),
+            category_col: pd.Categorical(missing_categories, categories=labels, ordered=True)
+        })
+        map_data = pd.concat([map_data, missing_df], ignore_index=True)
+
+    # Sort by category to ensure the plotting order
+    return map_data.sort_values(category_col), labels
     
 color_list = [
     '#4C230A', '#555B6E', '#C44802', '#568EA3', '#84B59F', '#BBE5ED','#0D160B', 'orange',